@@ -0,0 +1,5 @@
+"""Mediciones de rendimiento del sistema de asistencias.
+
+Se ejecutan desde la carpeta src, por ejemplo:
+    python -m benchmarks.arranque
+"""
@@ -0,0 +1,233 @@
+"""Tiempo de arranque: importación de main y ventana lista para escanear.
+
+Uso:
+    python -m benchmarks.arranque
+    python -m benchmarks.arranque --repeticiones 10 --json arranque.json
+
+Termina con código 1 si se supera el presupuesto de tiempo o si al importar
+main se cargó algún módulo que debería cargarse recién al usarse.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Carpeta con main.py
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Presupuesto en milisegundos
+PRESUPUESTO_IMPORTACION_MS = 300
+PRESUPUESTO_VENTANA_MS = 1000
+
+# Módulos que no se deben importar antes de mostrar la vista de escaneo
+MODULOS_DIFERIDOS = [
+    "openpyxl",
+    "ttkbootstrap.tableview",
+    "ttkbootstrap.scrolled",
+    "ttkbootstrap.toast",
+    "ttkbootstrap.dialogs.dialogs",
+]
+
+# Mide, en un proceso nuevo, desde antes de importar main hasta que el campo
+# del código de barras está visible
+SCRIPT_VENTANA = """
+import json, sys, time, tkinter
+inicio = time.perf_counter()
+import main
+importado = time.perf_counter()
+try:
+    ventana = main.Tk()
+except tkinter.TclError as error:
+    print(json.dumps({"error": str(error)}))
+    sys.exit()
+ventana.withdraw()
+app = main.Main(ventana, sys.argv[1])
+ventana.deiconify()
+ventana.update()
+lista = time.perf_counter()
+ventana.update()
+completo = time.perf_counter()
+ventana.destroy()
+print(json.dumps({
+    "importacion_ms": (importado - inicio) * 1000,
+    "ventana_ms": (lista - inicio) * 1000,
+    "arranque_completo_ms": (completo - inicio) * 1000,
+}))
+"""
+
+
+def _python(*argumentos):
+    """Ejecutar el intérprete en la carpeta src y devolver el proceso terminado"""
+    return subprocess.run(
+        [sys.executable, *argumentos],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def leer_importtime(texto):
+    """Líneas de -X importtime -> lista de (propio_us, acumulado_us, nivel, modulo)"""
+    modulos = []
+    for linea in texto.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:") :].split("|")
+        nivel = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        modulos.append((int(propio), int(acumulado), nivel, nombre.strip()))
+    return modulos
+
+
+def informe_importacion(modulo="main", top=15):
+    """Tiempo de importación de un módulo y las dependencias que más pesan"""
+    proceso = _python(
+        "-X",
+        "importtime",
+        "-c",
+        f"import sys, {modulo}; print(','.join(sorted(sys.modules)))",
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1])
+
+    modulos = leer_importtime(proceso.stderr)
+
+    # -X importtime escribe cada módulo después de sus dependencias: el árbol
+    # de main son las líneas desde la anterior de nivel 0 hasta la de main
+    fin = next(
+        i
+        for i, (_, _, nivel, nombre) in enumerate(modulos)
+        if nombre == modulo and nivel == 0
+    )
+    inicio = fin
+    while inicio > 0 and modulos[inicio - 1][2] > 0:
+        inicio -= 1
+    arbol = modulos[inicio:fin]
+    cargados = set(proceso.stdout.strip().split(","))
+    return {
+        "total_ms": modulos[fin][1] / 1000,
+        "directos": [
+            {"modulo": nombre, "acumulado_ms": acumulado / 1000}
+            for _, acumulado, nivel, nombre in sorted(arbol, key=lambda m: -m[1])
+            if nivel == 1
+        ][:top],
+        "mas_lentos": [
+            {"modulo": nombre, "propio_ms": propio / 1000}
+            for propio, _, _, nombre in sorted(modulos[inicio : fin + 1], key=lambda m: -m[0])
+        ][:top],
+        "diferidos_cargados": [nombre for nombre in MODULOS_DIFERIDOS if nombre in cargados],
+    }
+
+
+def medir_ventana(db):
+    """Tiempos de arranque de la interfaz, o None si no hay pantalla disponible"""
+    # Se usa una copia: Main crea tablas e índices al arrancar
+    with tempfile.TemporaryDirectory() as carpeta:
+        copia = os.path.join(carpeta, "escuela.db")
+        shutil.copyfile(db, copia)
+        proceso = _python("-c", SCRIPT_VENTANA, copia)
+
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1])
+    resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+    return None if "error" in resultado else resultado
+
+
+def medir(repeticiones=5, db=None):
+    """Mediana de varias ejecuciones en procesos nuevos"""
+    if db is None:
+        db = os.path.join(SRC, "escuela.db")
+
+    _python("-c", "import main")  # compilar los .pyc antes de medir
+
+    importaciones = [informe_importacion() for _ in range(repeticiones)]
+    ventanas = [medir_ventana(db) for _ in range(repeticiones)]
+
+    resultado = {
+        "repeticiones": repeticiones,
+        "python": sys.version.split()[0],
+        "importacion_ms": statistics.median(i["total_ms"] for i in importaciones),
+        "presupuesto_importacion_ms": PRESUPUESTO_IMPORTACION_MS,
+        "directos": importaciones[-1]["directos"],
+        "mas_lentos": importaciones[-1]["mas_lentos"],
+        "diferidos_cargados": importaciones[-1]["diferidos_cargados"],
+        "ventana_ms": None,
+        "arranque_completo_ms": None,
+        "presupuesto_ventana_ms": PRESUPUESTO_VENTANA_MS,
+    }
+    if all(ventanas):
+        resultado["ventana_ms"] = statistics.median(v["ventana_ms"] for v in ventanas)
+        resultado["arranque_completo_ms"] = statistics.median(
+            v["arranque_completo_ms"] for v in ventanas
+        )
+    return resultado
+
+
+def problemas(resultado):
+    """Mensajes de los presupuestos no cumplidos"""
+    mensajes = []
+    if resultado["importacion_ms"] > PRESUPUESTO_IMPORTACION_MS:
+        mensajes.append(
+            f"Importar main tomó {resultado['importacion_ms']:.0f} ms "
+            f"(presupuesto: {PRESUPUESTO_IMPORTACION_MS} ms)"
+        )
+    if resultado["ventana_ms"] is not None and resultado["ventana_ms"] > PRESUPUESTO_VENTANA_MS:
+        mensajes.append(
+            f"La vista de escaneo tardó {resultado['ventana_ms']:.0f} ms "
+            f"(presupuesto: {PRESUPUESTO_VENTANA_MS} ms)"
+        )
+    for nombre in resultado["diferidos_cargados"]:
+        mensajes.append(f"{nombre} se importa al arrancar")
+    return mensajes
+
+
+def imprimir(resultado):
+    """Informe legible"""
+    print(
+        f"Importar main: {resultado['importacion_ms']:.1f} ms "
+        f"(presupuesto {PRESUPUESTO_IMPORTACION_MS} ms)"
+    )
+    if resultado["ventana_ms"] is None:
+        print("Vista de escaneo: sin pantalla disponible, no se midió")
+    else:
+        print(
+            f"Vista de escaneo lista: {resultado['ventana_ms']:.1f} ms "
+            f"(presupuesto {PRESUPUESTO_VENTANA_MS} ms), "
+            f"arranque completo: {resultado['arranque_completo_ms']:.1f} ms"
+        )
+
+    print("\nImportaciones más pesadas (acumulado):")
+    for fila in resultado["directos"]:
+        print(f"  {fila['acumulado_ms']:8.1f} ms  {fila['modulo']}")
+    print("\nMódulos más lentos (tiempo propio):")
+    for fila in resultado["mas_lentos"]:
+        print(f"  {fila['propio_ms']:8.1f} ms  {fila['modulo']}")
+
+
+def main(argv=None):
+    """Punto de entrada"""
+    parser = argparse.ArgumentParser(description="Medir el tiempo de arranque")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--db", help="Base de datos (por defecto, src/escuela.db)")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    resultado = medir(args.repeticiones, args.db)
+    imprimir(resultado)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+
+    mensajes = problemas(resultado)
+    for mensaje in mensajes:
+        print(f"\nFUERA DE PRESUPUESTO: {mensaje}")
+    return 1 if mensajes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
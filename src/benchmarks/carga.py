@@ -0,0 +1,370 @@
+"""Simulación de la hora de entrada: escaneos de varias estaciones a la vez.
+
+Reproduce una mañana de escaneos con la misma lógica de marcación que la
+interfaz (marcacion.py): llegadas en grupos (buses), códigos repetidos,
+códigos desconocidos y salidas antes de la entrada. Cada estación es un hilo
+con su propia conexión, como una computadora más en la puerta.
+
+Uso:
+    python -m benchmarks.carga --escala mediana
+    python -m benchmarks.carga --estaciones 1 --estaciones 4 --velocidad 60
+    python -m benchmarks.carga --db escuela.db --json carga.json
+
+Con --velocidad 0 (por defecto) cada estación escanea lo más rápido que puede
+y se mide la capacidad máxima; con --velocidad N la mañana se reproduce N
+veces más rápido que en la realidad y la latencia incluye la espera en cola.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from escuela.basedatos import asegurar_esquema, consultor
+from escuela.fechas import fecha_dia, numero_dia
+from escuela.marcacion import ERROR, marcar_entrada, marcar_salida
+
+from benchmarks.datos import agregar_argumentos, generar, parametros
+from benchmarks.rendimiento import version
+
+ENTRADA = "entrada"
+SALIDA = "salida"
+
+# Patrón de llegada (segundos desde medianoche)
+LLEGADA_INICIO = 6 * 3600 + 50 * 60
+LLEGADA_FIN = 8 * 3600 + 10 * 60
+SALIDA_INICIO = 13 * 3600 + 30 * 60
+SALIDA_FIN = 14 * 3600 + 10 * 60
+BUSES = 6
+# Proporción de alumnos que llega en bus y dispersión de su llegada (s)
+EN_BUS = 0.6
+DISPERSION_BUS = 45
+
+# Proporciones de escaneos anómalos
+DUPLICADOS = 0.05
+DESCONOCIDOS = 0.01
+SALIDA_ANTICIPADA = 0.02
+SALIDA_DUPLICADA = 0.02
+
+# Reintentos de un escaneo que encontró la base de datos bloqueada
+REINTENTOS = 50
+ESPERA_REINTENTO = 0.005
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def patron_llegadas(codigos, asistencia, semilla):
+    """Eventos (segundo del día, tipo, código, estación preferida) ordenados.
+
+    La estación preferida es un número al azar; cada simulación la reduce
+    al número de estaciones que tiene.
+    """
+    azar = random.Random(semilla)
+    buses = sorted(
+        azar.uniform(LLEGADA_INICIO + 600, LLEGADA_FIN - 900) for _ in range(BUSES)
+    )
+    eventos = []
+
+    for codigo in codigos:
+        if azar.random() > asistencia:
+            continue
+        estacion = azar.randrange(1 << 16)
+        if azar.random() < EN_BUS:
+            llegada = azar.gauss(azar.choice(buses), DISPERSION_BUS)
+        else:
+            llegada = azar.uniform(LLEGADA_INICIO, LLEGADA_FIN)
+        salida = azar.uniform(SALIDA_INICIO, SALIDA_FIN)
+
+        if azar.random() < SALIDA_ANTICIPADA:
+            # Escanea en el lector de salida antes de haber entrado
+            eventos.append((llegada - azar.uniform(1, 30), SALIDA, codigo, estacion))
+        eventos.append((llegada, ENTRADA, codigo, estacion))
+        if azar.random() < DUPLICADOS:
+            # Vuelve a pasar el carné, a veces en otra estación
+            otra = estacion if azar.random() < 0.5 else azar.randrange(1 << 16)
+            eventos.append((llegada + azar.uniform(0.2, 10), ENTRADA, codigo, otra))
+
+        eventos.append((salida, SALIDA, codigo, estacion))
+        if azar.random() < SALIDA_DUPLICADA:
+            eventos.append((salida + azar.uniform(0.2, 10), SALIDA, codigo, estacion))
+
+    desconocidos = int(len(eventos) * DESCONOCIDOS)
+    for numero in range(desconocidos):
+        eventos.append(
+            (
+                azar.uniform(LLEGADA_INICIO, LLEGADA_FIN),
+                ENTRADA,
+                f"DESCONOCIDO{numero:05d}",
+                azar.randrange(1 << 16),
+            )
+        )
+
+    eventos.sort()
+    return eventos
+
+
+def pico_por_segundo(eventos, ventana=10):
+    """Mayor cantidad de escaneos por segundo en una ventana de `ventana` s"""
+    conteo = Counter(int(segundo // ventana) for segundo, *_ in eventos)
+    return max(conteo.values()) / ventana if conteo else 0.0
+
+
+class Estacion(threading.Thread):
+    """Una computadora de la puerta: procesa sus escaneos en orden"""
+
+    def __init__(self, numero, db, dia, eventos, velocidad, reloj, timeout):
+        super().__init__(name=f"estacion-{numero}", daemon=True)
+        self.numero = numero
+        self.dia = dia
+        self.eventos = eventos
+        self.velocidad = velocidad
+        self.reloj = reloj
+        self._consultar = consultor(db, timeout)
+        # Resultados
+        self.servicio_ms = []
+        self.latencia_ms = []
+        self.resultados = Counter()
+        self.bloqueos = 0
+        self.fallidos = 0
+
+    def consultar(self, query, parameters=()):
+        """run_query que cuenta y reintenta los "database is locked" """
+        for _ in range(REINTENTOS):
+            try:
+                return self._consultar(query, parameters)
+            except sqlite3.OperationalError as error:
+                if "locked" not in str(error) and "busy" not in str(error):
+                    raise
+                self.bloqueos += 1
+                time.sleep(ESPERA_REINTENTO)
+        raise sqlite3.OperationalError("database is locked")
+
+    def run(self):
+        for segundo, tipo, codigo, _ in self.eventos:
+            programado = time.perf_counter()
+            if self.velocidad:
+                programado = self.reloj.esperar_hasta(segundo / self.velocidad)
+
+            ahora = datetime.combine(self.dia, datetime.min.time()) + timedelta(
+                seconds=segundo
+            )
+            marcar = marcar_entrada if tipo == ENTRADA else marcar_salida
+            comienzo = time.perf_counter()
+            try:
+                resultado = marcar(self.consultar, codigo, ahora).resultado
+            except sqlite3.OperationalError:
+                resultado = ERROR
+                self.fallidos += 1
+            fin = time.perf_counter()
+
+            self.resultados[f"{tipo}.{resultado}"] += 1
+            self.servicio_ms.append((fin - comienzo) * 1000)
+            self.latencia_ms.append((fin - programado) * 1000)
+
+
+class Reloj:
+    """Punto de partida común para que las estaciones reproduzcan la mañana"""
+
+    def __init__(self, primer_segundo):
+        # Segundo del día que corresponde al arranque
+        self.primer_segundo = primer_segundo
+        self.cero = None
+        self.listo = threading.Event()
+
+    def arrancar(self):
+        self.cero = time.perf_counter()
+        self.listo.set()
+
+    def esperar_hasta(self, segundos):
+        """Dormir hasta el momento que corresponde a `segundos` del día
+        (ya escalado por la velocidad); devuelve ese momento"""
+        self.listo.wait()
+        momento = self.cero + segundos - self.primer_segundo
+        restante = momento - time.perf_counter()
+        if restante > 0:
+            time.sleep(restante)
+        return momento
+
+
+def percentiles(tiempos):
+    """Percentiles en milisegundos de una lista de tiempos"""
+    if not tiempos:
+        return {}
+    ordenados = sorted(tiempos)
+    resultado = {
+        f"p{p}_ms": ordenados[min(len(ordenados) - 1, len(ordenados) * p // 100)]
+        for p in PERCENTILES
+    }
+    resultado["maximo_ms"] = ordenados[-1]
+    return resultado
+
+
+def entradas_dobles(db, dia):
+    """Alumnos con más de una fila de asistencia en el día (carrera entre estaciones)"""
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute(
+            """
+            SELECT COUNT(*) FROM (
+                SELECT alumno_id FROM asistencias WHERE fecha = ?
+                GROUP BY alumno_id HAVING COUNT(*) > 1
+            )
+            """,
+            [numero_dia(dia)],
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def simular(db, dia, eventos, estaciones, velocidad=0, timeout=5.0):
+    """Reproducir los eventos repartidos entre `estaciones` estaciones"""
+    colas = [[] for _ in range(estaciones)]
+    for evento in eventos:
+        colas[evento[3] % estaciones].append(evento)
+
+    reloj = Reloj(eventos[0][0] / velocidad if velocidad and eventos else 0)
+    hilos = [
+        Estacion(numero, db, dia, cola, velocidad, reloj, timeout)
+        for numero, cola in enumerate(colas)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    inicio = time.perf_counter()
+    reloj.arrancar()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    servicio = [t for hilo in hilos for t in hilo.servicio_ms]
+    latencia = [t for hilo in hilos for t in hilo.latencia_ms]
+    resultados = Counter()
+    for hilo in hilos:
+        resultados.update(hilo.resultados)
+
+    return {
+        "estaciones": estaciones,
+        "velocidad": velocidad,
+        "escaneos": len(servicio),
+        "duracion_s": duracion,
+        "escaneos_por_s": len(servicio) / duracion if duracion else 0.0,
+        "servicio": percentiles(servicio),
+        "latencia": percentiles(latencia),
+        "bloqueos": sum(hilo.bloqueos for hilo in hilos),
+        "fallidos": sum(hilo.fallidos for hilo in hilos),
+        "entradas_dobles": entradas_dobles(db, dia),
+        "resultados": dict(sorted(resultados.items())),
+    }
+
+
+def imprimir(resultado):
+    """Informe legible de una simulación"""
+    servicio, latencia = resultado["servicio"], resultado["latencia"]
+    print(
+        f"{resultado['estaciones']} estación(es): {resultado['escaneos']} escaneos en "
+        f"{resultado['duracion_s']:.2f} s = {resultado['escaneos_por_s']:.0f} escaneos/s"
+    )
+    print(
+        "  servicio  "
+        + "  ".join(f"{clave[:-3]} {valor:.1f}" for clave, valor in servicio.items())
+        + " ms"
+    )
+    if resultado["velocidad"]:
+        print(
+            "  latencia  "
+            + "  ".join(f"{clave[:-3]} {valor:.1f}" for clave, valor in latencia.items())
+            + " ms"
+        )
+    print(
+        f"  bloqueos {resultado['bloqueos']}, fallidos {resultado['fallidos']}, "
+        f"entradas dobles {resultado['entradas_dobles']}"
+    )
+    print(
+        "  "
+        + ", ".join(f"{clave} {valor}" for clave, valor in resultado["resultados"].items())
+    )
+
+
+def main(argv=None):
+    """Punto de entrada"""
+    parser = argparse.ArgumentParser(description="Simular la hora de entrada")
+    agregar_argumentos(parser)
+    parser.add_argument("--db", help="Usar una copia de esta base de datos en vez de generarla")
+    parser.add_argument(
+        "--estaciones",
+        type=int,
+        action="append",
+        help="Estaciones de escaneo simultáneas (se puede repetir; por defecto 1 y 4)",
+    )
+    parser.add_argument(
+        "--velocidad",
+        type=float,
+        default=0,
+        help="Reproducir la mañana N veces más rápido (0: lo más rápido posible)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=5.0,
+        help="Segundos de espera de sqlite3 ante un bloqueo (0: contar cada bloqueo)",
+    )
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        original = os.path.join(carpeta, "original.db")
+        if args.db:
+            shutil.copyfile(args.db, original)
+            datos = {"db": args.db}
+        else:
+            datos = generar(original, **parametros(args))
+
+        # Una base de datos anterior se migra antes de leer sus fechas
+        asegurar_esquema(consultor(original))
+        conn = sqlite3.connect(original)
+        codigos = [fila[0] for fila in conn.execute("SELECT codigo FROM alumnos")]
+        ultimo = conn.execute("SELECT MAX(fecha) FROM asistencias").fetchone()[0]
+        conn.close()
+        dia = fecha_dia(ultimo) + timedelta(days=1) if ultimo is not None else date.today()
+
+        eventos = patron_llegadas(codigos, args.asistencia, args.semilla)
+        pico = pico_por_segundo(eventos)
+        print(f"{len(eventos)} escaneos; pico de llegada: {pico:.1f} escaneos/s\n")
+
+        simulaciones = []
+        for estaciones in args.estaciones or [1, 4]:
+            copia = os.path.join(carpeta, f"estaciones-{estaciones}.db")
+            shutil.copyfile(original, copia)
+            resultado = simular(copia, dia, eventos, estaciones, args.velocidad, args.timeout)
+            resultado["soporta_pico"] = resultado["escaneos_por_s"] >= pico
+            simulaciones.append(resultado)
+            imprimir(resultado)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(
+                {
+                    "version": version(),
+                    "fecha": datetime.now().isoformat(timespec="seconds"),
+                    "python": sys.version.split()[0],
+                    "datos": datos,
+                    "escaneos": len(eventos),
+                    "pico_por_s": pico,
+                    "simulaciones": simulaciones,
+                },
+                archivo,
+                ensure_ascii=False,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""Base de datos sintética para las mediciones.
+
+Los grados y secciones se copian de escuela.db y los nombres se toman al azar
+de alumnos.csv; con la misma semilla siempre se genera la misma base.
+
+Uso:
+    python -m benchmarks.datos --salida /tmp/escuela.db --escala grande
+    python -m benchmarks.datos --salida /tmp/escuela.db --alumnos 3000 --dias 60
+"""
+
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+from escuela.basedatos import asegurar_esquema, consultor
+from escuela.fechas import numero_dia
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLANTILLA_DB = os.path.join(SRC, "escuela.db")
+PLANTILLA_CSV = os.path.join(os.path.dirname(SRC), "alumnos.csv")
+
+# Tablas que se copian de la plantilla (estructura); grados y detalle_grados
+# también con sus filas
+TABLAS = ["grados", "detalle_grados", "alumnos", "asistencias"]
+
+# Escalas predefinidas
+ESCALAS = {
+    "pequena": {"alumnos": 300, "secciones": 2, "dias": 20},
+    "mediana": {"alumnos": 1500, "secciones": 5, "dias": 80},
+    "grande": {"alumnos": 6000, "secciones": 10, "dias": 180},
+}
+
+# Grados de secundaria
+GRADOS = range(7, 12)
+
+# Hora de entrada: promedio y desviación (segundos desde medianoche)
+ENTRADA_MEDIA = 7 * 3600 + 50 * 60
+ENTRADA_DESVIACION = 8 * 60
+SALIDA_INICIO = 13 * 3600 + 30 * 60
+# Proporción de asistencias sin salida marcada
+SIN_SALIDA = 0.02
+
+
+def leer_plantilla(csv_path=PLANTILLA_CSV):
+    """Listas de nombres, apellidos paternos y maternos de alumnos.csv"""
+    nombres, paternos, maternos = [], [], []
+    with open(csv_path, newline="", encoding="utf-8") as archivo:
+        for fila in csv.DictReader(archivo):
+            nombres.append(fila["nombres"].strip())
+            paternos.append(fila["apellido_paterno"].strip())
+            maternos.append(fila["apellido_materno"].strip())
+    return nombres, paternos, maternos
+
+
+def dias_de_clase(hasta, cantidad):
+    """Los últimos `cantidad` días de lunes a viernes anteriores a `hasta`"""
+    dias = []
+    dia = hasta - timedelta(days=1)
+    while len(dias) < cantidad:
+        if dia.weekday() < 5:
+            dias.append(dia)
+        dia -= timedelta(days=1)
+    return dias[::-1]
+
+
+def crear_esquema(conn, plantilla_db=PLANTILLA_DB):
+    """Crear las tablas de la plantilla y copiar grados y detalle_grados"""
+    conn.execute("ATTACH DATABASE ? AS plantilla", [plantilla_db])
+    for tabla in TABLAS:
+        (sql,) = conn.execute(
+            "SELECT sql FROM plantilla.sqlite_master WHERE type = 'table' AND name = ?",
+            [tabla],
+        ).fetchone()
+        conn.execute(sql)
+    conn.execute("INSERT INTO grados SELECT * FROM plantilla.grados")
+    conn.execute("INSERT INTO detalle_grados SELECT * FROM plantilla.detalle_grados")
+    conn.commit()
+    conn.execute("DETACH DATABASE plantilla")
+
+
+def generar(
+    destino,
+    alumnos=1500,
+    secciones=5,
+    dias=80,
+    asistencia=0.92,
+    semilla=1,
+    hasta=None,
+    plantilla_db=PLANTILLA_DB,
+    plantilla_csv=PLANTILLA_CSV,
+):
+    """Crear `destino` con alumnos repartidos en las secciones y sus asistencias.
+
+    `dias` días de clase (lunes a viernes) terminan el día anterior a `hasta`
+    (por defecto, hoy). Devuelve un resumen de lo generado.
+    """
+    if hasta is None:
+        hasta = date.today()
+    if os.path.exists(destino):
+        os.remove(destino)
+
+    azar = random.Random(semilla)
+    nombres, paternos, maternos = leer_plantilla(plantilla_csv)
+    fechas = dias_de_clase(hasta, dias)
+
+    conn = sqlite3.connect(destino)
+    crear_esquema(conn, plantilla_db)
+
+    # Secciones: las primeras de cada grado de secundaria
+    detalles = []
+    for grado_id in GRADOS:
+        detalles.extend(
+            fila[0]
+            for fila in conn.execute(
+                """
+                SELECT detalle_grado_id FROM detalle_grados
+                WHERE grado_id = ? ORDER BY seccion LIMIT ?
+                """,
+                [grado_id, secciones],
+            )
+        )
+
+    # Alumnos: la mayoría desde el primer día, algunos ingresan después
+    filas_alumnos = []
+    for numero in range(alumnos):
+        ingreso = fechas[0]
+        if azar.random() < 0.03:
+            ingreso = azar.choice(fechas)
+        filas_alumnos.append(
+            (
+                numero + 1,
+                f"BEN{numero + 1:08d}",
+                azar.choice(nombres),
+                azar.choice(paternos),
+                azar.choice(maternos),
+                ingreso.isoformat(),
+                detalles[numero % len(detalles)],
+            )
+        )
+    conn.executemany(
+        """
+        INSERT INTO alumnos(alumno_id, codigo, nombres, apellido_paterno,
+            apellido_materno, fecha_ingreso, detalle_grado_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        filas_alumnos,
+    )
+
+    # Asistencias: cada alumno tiene su propia tasa alrededor de la general
+    tasas = [min(1.0, max(0.3, azar.gauss(asistencia, 0.06))) for _ in filas_alumnos]
+    total = 0
+    for fecha in fechas:
+        filas = []
+        dia = numero_dia(fecha)
+        for alumno, tasa in zip(filas_alumnos, tasas):
+            if alumno[5] > fecha.isoformat() or azar.random() > tasa:
+                continue
+            entrada = int(azar.gauss(ENTRADA_MEDIA, ENTRADA_DESVIACION))
+            salida = None
+            if azar.random() > SIN_SALIDA:
+                salida = SALIDA_INICIO + azar.randrange(1800)
+            filas.append((alumno[0], entrada, salida, dia))
+        conn.executemany(
+            "INSERT INTO asistencias(alumno_id, hora_entrada, hora_salida, fecha) VALUES (?, ?, ?, ?)",
+            filas,
+        )
+        total += len(filas)
+    conn.commit()
+    conn.close()
+
+    asegurar_esquema(consultor(destino))
+    return {
+        "alumnos": alumnos,
+        "secciones": len(detalles),
+        "dias": len(fechas),
+        "asistencia": asistencia,
+        "semilla": semilla,
+        "desde": fechas[0].isoformat(),
+        "hasta": fechas[-1].isoformat(),
+        "asistencias": total,
+    }
+
+
+def agregar_argumentos(parser):
+    """Argumentos de escala comunes a las mediciones"""
+    parser.add_argument("--escala", choices=list(ESCALAS), default="mediana")
+    parser.add_argument("--alumnos", type=int, help="Cantidad de alumnos")
+    parser.add_argument(
+        "--secciones", type=int, help="Secciones por grado de secundaria"
+    )
+    parser.add_argument("--dias", type=int, help="Días de clase con asistencias")
+    parser.add_argument(
+        "--asistencia", type=float, default=0.92, help="Tasa de asistencia (0 a 1)"
+    )
+    parser.add_argument("--semilla", type=int, default=1)
+
+
+def parametros(args):
+    """Parámetros de generar() según la escala y los valores indicados"""
+    valores = dict(ESCALAS[args.escala])
+    for clave in ("alumnos", "secciones", "dias"):
+        if getattr(args, clave) is not None:
+            valores[clave] = getattr(args, clave)
+    valores["asistencia"] = args.asistencia
+    valores["semilla"] = args.semilla
+    return valores
+
+
+def main(argv=None):
+    """Punto de entrada"""
+    parser = argparse.ArgumentParser(description="Generar una base de datos sintética")
+    parser.add_argument("--salida", required=True, help="Archivo .db a crear")
+    agregar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    resumen = generar(args.salida, **parametros(args))
+    print(
+        f"{args.salida}: {resumen['alumnos']} alumnos en {resumen['secciones']} secciones, "
+        f"{resumen['asistencias']} asistencias en {resumen['dias']} días "
+        f"({time.perf_counter() - inicio:.1f} s)"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""Tiempos del escaneo, los reportes, la búsqueda y las exportaciones.
+
+Genera una base sintética (benchmarks.datos), mide cada operación varias veces
+y guarda los resultados en JSON para compararlos entre versiones.
+
+Uso:
+    python -m benchmarks.rendimiento --escala mediana --json actual.json
+    python -m benchmarks.rendimiento --json nuevo.json --comparar actual.json
+    python -m benchmarks.rendimiento --solo reporte --solo exportar
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from escuela.alertas import MotorInasistencias
+from escuela.basedatos import consultor
+from escuela.calendario import CalendarioEscolar
+from escuela.consultas import RegistroConsultas
+from escuela.exportacion import ESCRITORES, escribir
+from escuela.indice_nombres import IndiceNombres
+from escuela.marcacion import marcar_entrada, marcar_salida
+from escuela.paginacion import PaginadorAlumnos
+from escuela.puntualidad import AGRUPACIONES, resumen_puntualidad
+from escuela.reportes import (
+    asistencias_alumno,
+    asistencias_dia,
+    matriz_mensual,
+    reporte_asistencias,
+    reporte_mensual,
+    reporte_padron,
+    secciones_con_alumnos,
+)
+
+from benchmarks.datos import SRC, agregar_argumentos, generar, parametros
+
+# Cuánto más lento tiene que ser un resultado para contarlo como regresión
+UMBRAL_REGRESION = 1.25
+
+# Escaneos por medición del escaneo
+ESCANEOS = 200
+
+
+def cronometrar(funcion, repeticiones):
+    """Tiempos en milisegundos de varias llamadas a funcion()"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def resumir(tiempos):
+    """Estadísticas de una lista de tiempos en milisegundos"""
+    ordenados = sorted(tiempos)
+    return {
+        "repeticiones": len(ordenados),
+        "mediana_ms": statistics.median(ordenados),
+        "minimo_ms": ordenados[0],
+        "p95_ms": ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))],
+        "maximo_ms": ordenados[-1],
+    }
+
+
+class Mediciones:
+    """Casos de medición sobre una base de datos generada"""
+
+    def __init__(self, db, resumen, repeticiones, carpeta):
+        self.consultas = RegistroConsultas()
+        self.consultar = consultor(db, registro=self.consultas)
+        self.resumen = resumen
+        self.repeticiones = repeticiones
+        self.carpeta = carpeta
+        self.calendario = CalendarioEscolar(self.consultar)
+        self.hasta = date.fromisoformat(resumen["hasta"])
+        self.desde = date.fromisoformat(resumen["desde"])
+        self.azar = random.Random(resumen["semilla"])
+
+        # Una sección con alumnos y un alumno cualquiera para los reportes
+        self.grado_id, self.grado, self.seccion = secciones_con_alumnos(self.consultar)[0]
+        self.alumno_id = self.consultar("SELECT MIN(alumno_id) FROM alumnos").fetchone()[0]
+        self.codigos = [
+            fila[0] for fila in self.consultar("SELECT codigo FROM alumnos").fetchall()
+        ]
+
+    def casos(self):
+        """(grupo, nombre, función que devuelve una lista de tiempos)"""
+        yield from self.casos_escaneo()
+        yield from self.casos_reportes()
+        yield from self.casos_busqueda()
+        yield from self.casos_exportacion()
+
+    def casos_escaneo(self):
+        """Entradas y salidas de un día nuevo, cronometradas una por una"""
+        codigos = self.azar.sample(self.codigos, min(ESCANEOS, len(self.codigos)))
+        manana = self.hasta + timedelta(days=1)
+        entrada = datetime.combine(manana, datetime.min.time()).replace(hour=7, minute=45)
+        salida = entrada.replace(hour=13, minute=40)
+
+        def escanear(marcar, lista, ahora):
+            return lambda: [
+                cronometrar(lambda codigo=codigo: marcar(self.consultar, codigo, ahora), 1)[0]
+                for codigo in lista
+            ]
+
+        yield "escaneo", "entrada", escanear(marcar_entrada, codigos, entrada)
+        yield "escaneo", "entrada_duplicada", escanear(marcar_entrada, codigos, entrada)
+        yield "escaneo", "codigo_desconocido", escanear(
+            marcar_entrada, [f"X{codigo}" for codigo in codigos], entrada
+        )
+        yield "escaneo", "salida", escanear(marcar_salida, codigos, salida)
+
+    def casos_reportes(self):
+        """Fase de datos de cada vista de reportes"""
+        year = self.hasta.year
+
+        def alertas():
+            motor = MotorInasistencias(self.consultar, self.calendario)
+            motor.actualizar(self.hasta)
+            return motor.alertas()
+
+        reportes = {
+            "mensual": lambda: matriz_mensual(
+                self.consultar, self.calendario, self.grado_id, self.seccion, year
+            ),
+            "diario": lambda: list(
+                asistencias_dia(self.consultar, self.grado_id, self.seccion, self.hasta)
+            ),
+            "alumno": lambda: list(asistencias_alumno(self.consultar, self.alumno_id)),
+            "alertas": alertas,
+            "alumnos_pagina": lambda: PaginadorAlumnos(self.consultar).pagina_actual(),
+        }
+        for agrupar in AGRUPACIONES:
+            reportes[f"puntualidad_{agrupar}"] = (
+                lambda agrupar=agrupar: resumen_puntualidad(
+                    self.consultar, self.desde, self.hasta, agrupar
+                )
+            )
+
+        for nombre, funcion in reportes.items():
+            yield "reporte", nombre, lambda funcion=funcion: cronometrar(
+                funcion, self.repeticiones
+            )
+
+    def casos_busqueda(self):
+        """Carga del índice de nombres y búsquedas por nombre y en la lista de alumnos"""
+        indice = IndiceNombres()
+        indice.cargar(self.consultar)
+        # Los tres primeros caracteres de algunos apellidos
+        textos = [
+            fila[0][:3]
+            for fila in self.consultar("SELECT apellido_paterno FROM alumnos LIMIT 50")
+        ]
+
+        yield "busqueda", "cargar_indice", lambda: cronometrar(
+            lambda: IndiceNombres().cargar(self.consultar), self.repeticiones
+        )
+        yield "busqueda", "nombre", lambda: [
+            cronometrar(lambda texto=texto: indice.buscar(texto, 20), 1)[0]
+            for texto in textos
+        ]
+        yield "busqueda", "lista_alumnos", lambda: [
+            cronometrar(
+                lambda texto=texto: PaginadorAlumnos(self.consultar)
+                .configurar(busqueda=texto),
+                1,
+            )[0]
+            for texto in textos
+        ]
+
+    def casos_exportacion(self):
+        """Cada reporte exportable en cada formato"""
+        reportes = {
+            "mensual": lambda: reporte_mensual(
+                self.consultar,
+                self.calendario,
+                self.grado_id,
+                self.grado,
+                self.seccion,
+                self.hasta.year,
+            ),
+            "asistencias": lambda: reporte_asistencias(
+                self.consultar, self.desde, self.hasta
+            ),
+            "padron": lambda: reporte_padron(self.consultar),
+        }
+        for nombre, crear in reportes.items():
+            for formato in ESCRITORES:
+                file_path = os.path.join(self.carpeta, f"{nombre}.{formato}")
+                yield "exportar", f"{nombre}_{formato}", (
+                    lambda crear=crear, file_path=file_path, formato=formato: cronometrar(
+                        lambda: escribir(file_path, crear(), formato),
+                        self.repeticiones,
+                    )
+                )
+
+
+def version():
+    """Commit actual del repositorio, si se puede obtener"""
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=SRC,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar(valores, repeticiones=5, grupos=None):
+    """Generar la base, medir todos los casos y devolver los resultados"""
+    with tempfile.TemporaryDirectory() as carpeta:
+        db = os.path.join(carpeta, "escuela.db")
+        inicio = time.perf_counter()
+        resumen = generar(db, **valores)
+        generacion_s = time.perf_counter() - inicio
+
+        mediciones = Mediciones(db, resumen, repeticiones, carpeta)
+        resultados = {}
+        for grupo, nombre, medir in mediciones.casos():
+            if grupos and grupo not in grupos:
+                continue
+            clave = f"{grupo}.{nombre}"
+            mediciones.consultas.abrir_vista(clave)
+            tiempos = medir()
+            resultados[clave] = resumir(tiempos)
+            # Consultas SQL por llamada
+            consultas = {vista: n for vista, _, n, _, _ in mediciones.consultas.resumen_vistas()}
+            resultados[clave]["consultas"] = consultas.get(clave, 0) / len(tiempos)
+            print(f"{clave:<36} {resultados[clave]['mediana_ms']:10.2f} ms", flush=True)
+
+    return {
+        "version": version(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "datos": resumen,
+        "generacion_s": generacion_s,
+        "resultados": resultados,
+    }
+
+
+def comparar(actual, anterior, umbral=UMBRAL_REGRESION):
+    """Imprimir la comparación de medianas y devolver las regresiones"""
+    regresiones = []
+    print(f"\nComparación con {anterior.get('version')} ({anterior.get('fecha')}):")
+    for nombre, resultado in actual["resultados"].items():
+        previo = anterior["resultados"].get(nombre)
+        if previo is None:
+            continue
+        razon = resultado["mediana_ms"] / max(previo["mediana_ms"], 1e-6)
+        marca = ""
+        if razon > umbral:
+            marca = "  <-- más lento"
+            regresiones.append(nombre)
+        print(
+            f"  {nombre:<36} {previo['mediana_ms']:10.2f} -> "
+            f"{resultado['mediana_ms']:10.2f} ms  x{razon:.2f}{marca}"
+        )
+    escala = ("alumnos", "secciones", "dias", "asistencia", "semilla")
+    if any(actual["datos"][clave] != anterior["datos"].get(clave) for clave in escala):
+        print("  Atención: los datos generados no son los mismos en ambas mediciones")
+    return regresiones
+
+
+def main(argv=None):
+    """Punto de entrada"""
+    parser = argparse.ArgumentParser(description="Medir el rendimiento")
+    agregar_argumentos(parser)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument(
+        "--solo",
+        action="append",
+        choices=["escaneo", "reporte", "busqueda", "exportar"],
+        help="Medir solo este grupo (se puede repetir)",
+    )
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    parser.add_argument("--comparar", help="Resultados anteriores (JSON) para comparar")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION)
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(parametros(args), args.repeticiones, args.solo)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            anterior = json.load(archivo)
+        if comparar(resultado, anterior, args.umbral):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,23 @@
+-- grados
+CREATE TABLE grados (
+    grado_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    grado VARCHAR(250)
+);
+
+INSERT INTO
+    grados (grado)
+VALUES ("1ro de primaria"),
+    ("2do de primaria"),
+    ("3ro de primaria"),
+    ("4to de primaria"),
+    ("5to de primaria"),
+    ("6to de primaria"),
+    ("1ro de secundaria"),
+    ("2do de secundaria"),
+    ("3ro de secundaria"),
+    ("4to de secundaria"),
+    ("5to de secundaria");
+
 -- detalle_grados
 CREATE TABLE detalle_grados (
     detalle_grado_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -143,13 +163,11 @@ CREATE TABLE alumnos (
     grupo TEXT,
     grado TEXT,
     detalle_grado_id INTEGER DEFAULT 1,
+    -- 'activo', 'egresado' (terminó el colegio) o 'retirado' (eliminado de la lista)
+    estado VARCHAR(10) NOT NULL DEFAULT 'activo',
     FOREIGN KEY (detalle_grado_id) REFERENCES detalle_grados (detalle_grado_id)
 );
 
-ALTER TABLE alumnos DROP COLUMN grupo;
-
-ALTER TABLE alumnos DROP COLUMN grado;
-
 UPDATE alumnos
 SET
     detalle_grado_id = (
@@ -166,4 +184,57 @@ SET fecha_ingreso =
     SUBSTR(fecha_ingreso, 7, 4) || '-' || 
     SUBSTR(fecha_ingreso, 4, 2) || '-' || 
     SUBSTR(fecha_ingreso, 1, 2)
-WHERE fecha_ingreso LIKE '%%/%%/%%%%';
\ No newline at end of file
+WHERE fecha_ingreso LIKE '%%/%%/%%%%';
+
+ALTER TABLE alumnos DROP COLUMN grupo;
+
+ALTER TABLE alumnos DROP COLUMN grado;
+
+-- asistencias (fecha: días desde 1970-01-01; horas: segundos desde medianoche)
+CREATE TABLE asistencias (
+    asistencia_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    alumno_id INTEGER,
+    hora_entrada INTEGER,
+    hora_salida INTEGER,
+    fecha INTEGER,
+    FOREIGN KEY (alumno_id) REFERENCES alumnos (alumno_id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- calendario
+CREATE TABLE calendario (
+    calendario_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha_inicio DATE NOT NULL,
+    fecha_fin DATE NOT NULL,
+    tipo VARCHAR(20) NOT NULL,
+    descripcion VARCHAR(250)
+);
+
+-- horarios (segundos desde medianoche)
+CREATE TABLE horarios (
+    grado_id INTEGER PRIMARY KEY,
+    hora_inicio INTEGER NOT NULL,
+    tolerancia INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (grado_id) REFERENCES grados (grado_id)
+);
+
+-- preferencias
+CREATE TABLE configuracion (
+    clave VARCHAR(100) PRIMARY KEY,
+    valor TEXT
+);
+
+-- reportes generados automáticamente
+CREATE TABLE reportes_generados (
+    tipo VARCHAR(10) NOT NULL,
+    periodo VARCHAR(10) NOT NULL,
+    grado_id INTEGER NOT NULL,
+    seccion VARCHAR(10) NOT NULL,
+    huella TEXT NOT NULL,
+    archivo TEXT NOT NULL,
+    generado DATETIME NOT NULL,
+    PRIMARY KEY (tipo, periodo, grado_id, seccion)
+);
+
+-- Los datos ya están en el formato de todas las migraciones (basedatos.MIGRACIONES);
+-- los índices y la vista asistencias_texto los crea basedatos.asegurar_esquema
+PRAGMA user_version = 1;
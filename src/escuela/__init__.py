@@ -0,0 +1,118 @@
+"""Núcleo del sistema de asistencias, sin interfaz gráfica.
+
+Datos (repositorios, catálogos y cachés), reglas de marcación, reportes y
+exportaciones. Lo usan la ventana (main.py), la línea de comandos
+(exportar.py) y las mediciones (benchmarks); nada de aquí importa tkinter.
+"""
+
+from escuela.basedatos import Instantanea, asegurar_esquema, consultor, transaccion
+from escuela.calendario import CalendarioEscolar
+from escuela.grados import CatalogoGrados
+from escuela.indice_nombres import IndiceNombres
+from escuela.marcacion import ServicioMarcacion
+from escuela.promocion import mapa_promocion, promover, vista_previa
+from escuela.reportes import ServicioReportes
+from escuela.repositorios import RepositorioAlumnos, RepositorioAsistencias
+
+
+class Escuela:
+    """Repositorios y servicios construidos sobre una función consultar
+    (Main.run_query o basedatos.consultor); lector() abre la
+    basedatos.Instantanea de la que leen los reportes y las exportaciones, y
+    transaccion() la basedatos.transaccion de los cambios de varias sentencias"""
+
+    def __init__(self, consultar, lector=None, transaccion=None):
+        self.consultar = consultar
+        self.transaccion = transaccion
+        asegurar_esquema(consultar)
+
+        # Datos de referencia en memoria
+        self.calendario = CalendarioEscolar(consultar)
+        self.grados = CatalogoGrados(consultar)
+        # Se llena con cargar_indice (lee todos los alumnos)
+        self.indice_nombres = IndiceNombres()
+
+        self.alumnos = RepositorioAlumnos(consultar)
+        self.asistencias = RepositorioAsistencias(consultar)
+        self.marcacion = ServicioMarcacion(consultar)
+        self.reportes = ServicioReportes(
+            consultar, self.calendario, self.grados, lector
+        )
+
+    @classmethod
+    def abrir(cls, db_name, **opciones):
+        """Núcleo sobre un archivo de base de datos (opciones de consultor)"""
+        return cls(
+            consultor(db_name, **opciones),
+            lambda: Instantanea(db_name, **opciones),
+            lambda: transaccion(db_name, opciones.get("timeout", 5.0)),
+        )
+
+    def cargar_indice(self):
+        """Leer todos los alumnos en el índice de nombres"""
+        self.indice_nombres.cargar(self.consultar)
+
+    def crear_alumno(
+        self, codigo, nombres, paterno, materno, fecha_ingreso, grado_id, seccion
+    ):
+        """Registrar un alumno y agregarlo al índice de nombres.
+
+        Devuelve el alumno_id (None si falló); ValueError si el grado no
+        tiene esa sección.
+        """
+        detalle_grado_id = self._detalle_grado_id(grado_id, seccion)
+        alumno_id = self.alumnos.crear(
+            codigo, nombres, paterno, materno, fecha_ingreso, detalle_grado_id
+        )
+        if alumno_id is not None:
+            self.indice_nombres.refrescar_alumno(self.consultar, alumno_id)
+        return alumno_id
+
+    def actualizar_alumno(
+        self, alumno_id, codigo, nombres, paterno, materno, fecha_ingreso, grado_id, seccion
+    ):
+        """Modificar un alumno y su entrada en el índice; True si se guardó"""
+        detalle_grado_id = self._detalle_grado_id(grado_id, seccion)
+        guardado = self.alumnos.actualizar(
+            alumno_id, codigo, nombres, paterno, materno, fecha_ingreso, detalle_grado_id
+        )
+        if guardado:
+            self.indice_nombres.refrescar_alumno(self.consultar, alumno_id)
+        return guardado
+
+    def eliminar_alumno(self, alumno_id):
+        """Retirar a un alumno y quitarlo del índice; True si se ejecutó.
+
+        Él y sus asistencias siguen en la base de datos hasta que se
+        archiven (archivo.archivar).
+        """
+        eliminado = self.alumnos.retirar(alumno_id)
+        if eliminado:
+            self.indice_nombres.eliminar(alumno_id)
+        return eliminado
+
+    def vista_promocion(self):
+        """(cambios, bloqueados) de la promoción de fin de año (promocion.vista_previa)"""
+        mapa, sin_destino = mapa_promocion(self.consultar)
+        return vista_previa(self.consultar, mapa, sin_destino)
+
+    def promover(self, year=None, forzar=False):
+        """Pasar a todos los alumnos al grado siguiente y volver a leer el índice.
+
+        Todo se hace en una transacción (hace falta `transaccion`).
+        Devuelve (promovidos, egresados); PromocionInvalida si no se puede.
+        """
+        if self.transaccion is None:
+            raise RuntimeError("La promoción necesita una transacción (Escuela.abrir)")
+        with self.transaccion() as consultar:
+            mapa, sin_destino = mapa_promocion(consultar)
+            resultado = promover(consultar, mapa, sin_destino, year, forzar)
+        self.cargar_indice()
+        return resultado
+
+    def _detalle_grado_id(self, grado_id, seccion):
+        """detalle_grado_id del grado y sección, o ValueError si no existe"""
+        detalle_grado_id = self.grados.detalle_grado_id(grado_id, seccion)
+        if detalle_grado_id is None:
+            raise ValueError("El grado no tiene esa sección")
+        return detalle_grado_id
@@ -0,0 +1,242 @@
+"""Detección de inasistencias consecutivas y baja asistencia"""
+
+from collections import deque
+from datetime import date, timedelta
+
+from escuela.fechas import numero_dia
+
+# Días lectivos considerados para el porcentaje reciente
+VENTANA_DIAS = 20
+
+# Máximo de alumno_id en cada IN (...) (SQLite limita los parámetros por consulta)
+ALUMNOS_POR_CONSULTA = 500
+
+
+class EstadoAlumno:
+    """Acumulados de asistencia de un alumno"""
+
+    __slots__ = ("ingreso", "racha", "racha_max", "presentes", "dias", "ventana")
+
+    def __init__(self, ingreso):
+        self.ingreso = ingreso
+        self.racha = 0
+        self.racha_max = 0
+        self.presentes = 0
+        self.dias = 0
+        self.ventana = deque(maxlen=VENTANA_DIAS)
+
+    def registrar(self, presente):
+        """Sumar un día lectivo"""
+        self.dias += 1
+        self.ventana.append(presente)
+        if presente:
+            self.presentes += 1
+            self.racha = 0
+        else:
+            self.racha += 1
+            self.racha_max = max(self.racha_max, self.racha)
+
+    @property
+    def porcentaje(self):
+        """Porcentaje de asistencia del año"""
+        return self.presentes / self.dias * 100 if self.dias else 100.0
+
+    @property
+    def porcentaje_reciente(self):
+        """Porcentaje de asistencia de los últimos días lectivos"""
+        if not self.ventana:
+            return 100.0
+        return sum(self.ventana) / len(self.ventana) * 100
+
+
+class MotorInasistencias:
+    """Calcula rachas de inasistencia y porcentajes de todos los alumnos a la vez.
+
+    Cada llamada a `actualizar` procesa solo los días lectivos que aún no se
+    habían procesado, con una consulta por rango de fechas. Si cambiaron las
+    asistencias de un día ya procesado (una corrección), lo detecta por la
+    huella de cada día y vuelve a calcular el año.
+    """
+
+    def __init__(self, consultar, calendario):
+        self.consultar = consultar
+        self.calendario = calendario
+        self.alumnos = {}
+        self._estados = {}
+        self._year = None
+        self._version = None
+        self._procesado_hasta = None
+        # Número de día -> huella de las asistencias de los días procesados
+        self._huellas = {}
+
+    def reiniciar(self, year):
+        """Descartar los acumulados y empezar el año desde cero"""
+        self._estados = {}
+        self._year = year
+        self._version = self.calendario.version
+        self._procesado_hasta = None
+        self._huellas = {}
+
+    def actualizar(self, hasta=None):
+        """Procesar los días lectivos pendientes hasta la fecha (por defecto, ayer)"""
+        if hasta is None:
+            hasta = date.today() - timedelta(days=1)
+
+        if self._year != hasta.year or self._version != self.calendario.version:
+            self.reiniciar(hasta.year)
+
+        # Huellas leídas antes de procesar: un cambio posterior se nota la
+        # próxima vez en lugar de perderse
+        huellas = self._leer_huellas(max(hasta, self._procesado_hasta or hasta))
+        if self._procesado_hasta is not None:
+            ultimo = numero_dia(self._procesado_hasta)
+            procesadas = {dia: huella for dia, huella in huellas.items() if dia <= ultimo}
+            if procesadas != self._huellas:
+                self.reiniciar(hasta.year)
+
+        self._cargar_alumnos()
+
+        # Alumnos nuevos: ponerse al día con los días ya procesados
+        nuevos = [
+            alumno_id for alumno_id in self.alumnos if alumno_id not in self._estados
+        ]
+        for alumno_id in nuevos:
+            self._estados[alumno_id] = EstadoAlumno(self.alumnos[alumno_id][4])
+        if nuevos and self._procesado_hasta is not None:
+            self._procesar(self._dias_entre(None, self._procesado_hasta), nuevos)
+
+        # Alumnos eliminados
+        for alumno_id in set(self._estados) - set(self.alumnos):
+            del self._estados[alumno_id]
+
+        if self._procesado_hasta is None or hasta > self._procesado_hasta:
+            self._procesar(self._dias_entre(self._procesado_hasta, hasta))
+            self._procesado_hasta = hasta
+            ultimo = numero_dia(hasta)
+            self._huellas = {dia: huella for dia, huella in huellas.items() if dia <= ultimo}
+
+    def alertas(self, racha_minima=3, porcentaje_minimo=85.0):
+        """Alumnos con una racha de inasistencias o un porcentaje por debajo del mínimo"""
+        filas = []
+        for alumno_id, estado in self._estados.items():
+            if estado.dias == 0:
+                continue
+            if (
+                estado.racha < racha_minima
+                and estado.porcentaje >= porcentaje_minimo
+                and estado.porcentaje_reciente >= porcentaje_minimo
+            ):
+                continue
+
+            alumno = self.alumnos[alumno_id]
+            filas.append(
+                (
+                    alumno_id,
+                    alumno[0],
+                    alumno[1],
+                    alumno[2],
+                    alumno[3],
+                    estado.racha,
+                    estado.racha_max,
+                    round(estado.porcentaje, 1),
+                    round(estado.porcentaje_reciente, 1),
+                )
+            )
+
+        filas.sort(key=lambda fila: (-fila[5], fila[7]))
+        return filas
+
+    def _cargar_alumnos(self):
+        """Alumnos con su grado, sección y fecha de ingreso"""
+        filas = self.consultar(
+            """
+            SELECT
+                al.alumno_id,
+                al.codigo,
+                TRIM(al.nombres) || ' ' || al.apellido_paterno || ' ' || al.apellido_materno,
+                g.grado,
+                dg.seccion,
+                al.fecha_ingreso
+            FROM
+                alumnos al
+            LEFT JOIN detalle_grados dg ON
+                al.detalle_grado_id = dg.detalle_grado_id
+            LEFT JOIN grados g ON
+                dg.grado_id = g.grado_id
+            WHERE al.estado = 'activo'
+            """
+        ).fetchall()
+
+        self.alumnos = {}
+        for alumno_id, codigo, nombre, grado, seccion, ingreso in filas:
+            ingreso = date.fromisoformat(ingreso) if ingreso else None
+            self.alumnos[alumno_id] = (codigo, nombre, grado, seccion, ingreso)
+
+    def _leer_huellas(self, hasta):
+        """Resumen de las asistencias de cada día del año hasta la fecha:
+        {número de día: huella}"""
+        return dict(
+            self.consultar(
+                """
+                SELECT
+                    fecha,
+                    COUNT(*) || '-' || MAX(asistencia_id) || '-' || SUM(asistencia_id)
+                FROM asistencias
+                WHERE fecha BETWEEN ? AND ?
+                GROUP BY fecha
+                """,
+                [numero_dia(date(self._year, 1, 1)), numero_dia(hasta)],
+            )
+        )
+
+    def _dias_entre(self, despues_de, hasta):
+        """Días lectivos del año en (despues_de, hasta]"""
+        return [
+            dia
+            for dia in self.calendario.dias_lectivos(self._year)
+            if (despues_de is None or dia > despues_de) and dia <= hasta
+        ]
+
+    def _procesar(self, dias, alumno_ids=None):
+        """Aplicar los días indicados a los alumnos (todos, por defecto)"""
+        if not dias:
+            return
+
+        rango = [numero_dia(dias[0]), numero_dia(dias[-1])]
+        if alumno_ids is None:
+            consultas = [("", rango)]
+        else:
+            consultas = [
+                (
+                    f"AND alumno_id IN ({', '.join('?' * len(grupo))})",
+                    rango + grupo,
+                )
+                for grupo in (
+                    alumno_ids[inicio : inicio + ALUMNOS_POR_CONSULTA]
+                    for inicio in range(0, len(alumno_ids), ALUMNOS_POR_CONSULTA)
+                )
+            ]
+
+        presentes_por_dia = {}
+        for filtro, parametros in consultas:
+            for alumno_id, fecha in self.consultar(
+                f"""
+                SELECT alumno_id, fecha
+                FROM asistencias
+                WHERE fecha BETWEEN ? AND ? {filtro}
+                """,
+                parametros,
+            ):
+                presentes_por_dia.setdefault(fecha, set()).add(alumno_id)
+
+        if alumno_ids is None:
+            estados = list(self._estados.items())
+        else:
+            estados = [(alumno_id, self._estados[alumno_id]) for alumno_id in alumno_ids]
+
+        for dia in dias:
+            presentes = presentes_por_dia.get(numero_dia(dia), ())
+            for alumno_id, estado in estados:
+                if estado.ingreso is not None and dia < estado.ingreso:
+                    continue
+                estado.registrar(alumno_id in presentes)
@@ -0,0 +1,262 @@
+"""Archivo histórico: alumnos retirados o egresados y asistencias de años anteriores.
+
+Se guardan en otra base de datos (escuela_archivo.db junto a la principal)
+con las mismas tablas, así que los reportes de exportar.py también sirven
+para consultarla:
+
+    python exportar.py --db escuela_archivo.db asistencias --desde 2023-01-01 ...
+"""
+
+import os
+from collections import namedtuple
+from datetime import date, datetime
+
+from escuela.basedatos import conectar, consultor, migrar, punto_de_control
+from escuela.fechas import numero_dia
+from escuela.metricas import metricas
+
+ARCHIVO_HISTORICO = "escuela_archivo.db"
+
+# Mismas columnas que en la base de datos principal; alumnos.archivado es
+# la fecha en que el alumno pasó al archivo
+ESQUEMA_ARCHIVO = [
+    """
+    CREATE TABLE IF NOT EXISTS archivo.grados (
+        grado_id INTEGER PRIMARY KEY,
+        grado VARCHAR(250)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archivo.detalle_grados (
+        detalle_grado_id INTEGER PRIMARY KEY,
+        grado_id INTEGER,
+        seccion VARCHAR(10),
+        FOREIGN KEY (grado_id) REFERENCES grados (grado_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archivo.alumnos (
+        alumno_id INTEGER PRIMARY KEY,
+        codigo VARCHAR(150),
+        nombres VARCHAR(250),
+        apellido_paterno VARCHAR(250),
+        apellido_materno VARCHAR(250),
+        fecha_ingreso DATE,
+        foto TEXT,
+        detalle_grado_id INTEGER,
+        estado VARCHAR(10) NOT NULL DEFAULT 'activo',
+        archivado DATETIME,
+        FOREIGN KEY (detalle_grado_id) REFERENCES detalle_grados (detalle_grado_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archivo.asistencias (
+        asistencia_id INTEGER PRIMARY KEY,
+        alumno_id INTEGER,
+        hora_entrada TIME,
+        hora_salida TIME,
+        fecha DATE,
+        FOREIGN KEY (alumno_id) REFERENCES alumnos (alumno_id)
+            ON DELETE CASCADE ON UPDATE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS archivo.idx_asistencias_alumno_fecha ON asistencias (alumno_id, fecha)",
+    "CREATE INDEX IF NOT EXISTS archivo.idx_asistencias_fecha ON asistencias (fecha)",
+]
+
+# Columnas de alumnos que se copian al archivo
+COLUMNAS_ALUMNOS = (
+    "alumno_id, codigo, nombres, apellido_paterno, apellido_materno, "
+    "fecha_ingreso, foto, detalle_grado_id, estado"
+)
+
+# - alumnos: alumnos no activos que salieron de la base de datos principal
+# - asistencias: asistencias copiadas al archivo
+# - huerfanas: asistencias de alumnos que ya no existían (se borran)
+Resumen = namedtuple("Resumen", ["alumnos", "asistencias", "huerfanas"])
+
+# Asistencias de la base principal que se archivan (parámetro: corte)
+ASISTENCIAS_A_MOVER = """
+    fecha < ?
+    OR alumno_id IN (SELECT alumno_id FROM main.alumnos WHERE estado != 'activo')
+"""
+
+
+class ArchivoInconsistente(Exception):
+    """El archivo ya tiene otras asistencias con los mismos asistencia_id"""
+
+
+def archivo_historico(db_name):
+    """Base de datos del archivo junto a la principal"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_name)), ARCHIVO_HISTORICO)
+
+
+def _corte(year):
+    """Primer día del año escolar que se queda en la base de datos principal"""
+    return numero_dia(date(date.today().year if year is None else year, 1, 1))
+
+
+def pendientes(consultar, year=None):
+    """Lo que moverá archivar: Resumen con las cantidades actuales"""
+    corte = _corte(year)
+    alumnos = consultar(
+        "SELECT COUNT(*) FROM alumnos WHERE estado != 'activo'"
+    ).fetchone()[0]
+    asistencias = consultar(
+        """
+        SELECT COUNT(*) FROM asistencias
+        WHERE
+            alumno_id IN (SELECT alumno_id FROM alumnos)
+            AND (
+                fecha < ?
+                OR alumno_id IN (SELECT alumno_id FROM alumnos WHERE estado != 'activo')
+            )
+        """,
+        [corte],
+    ).fetchone()[0]
+    huerfanas = consultar(
+        """
+        SELECT COUNT(*) FROM asistencias
+        WHERE alumno_id IS NULL OR alumno_id NOT IN (SELECT alumno_id FROM alumnos)
+        """
+    ).fetchone()[0]
+    return Resumen(alumnos, asistencias, huerfanas)
+
+
+def archivar(db_name, year=None, destino=None, compactar=False):
+    """Mover al archivo los alumnos no activos y las asistencias anteriores a `year`.
+
+    Todo se hace en una transacción sobre una sola conexión con el archivo
+    adjunto (ATTACH): se copian los alumnos y sus asistencias y luego se
+    borran los alumnos de la base principal, lo que borra sus asistencias en
+    cascada. Las asistencias de años anteriores de los alumnos activos
+    también se mueven; en el archivo queda una copia de esos alumnos para
+    poder consultarlas. `compactar` ejecuta VACUUM al final para devolver al
+    disco el espacio liberado. ArchivoInconsistente (y no se mueve nada) si
+    el archivo ya tiene otras asistencias con los mismos números.
+    """
+    if destino is None:
+        destino = archivo_historico(db_name)
+    corte = _corte(year)
+    archivado = datetime.now().isoformat(" ", "seconds")
+    if os.path.exists(destino):
+        # Un archivo creado antes de guardar las fechas como números
+        migrar(consultor(destino))
+
+    conn = conectar(db_name)
+    # Las transacciones se manejan aquí (BEGIN / COMMIT explícitos)
+    conn.isolation_level = None
+    try:
+        conn.execute("ATTACH DATABASE ? AS archivo", [destino])
+        for sentencia in ESQUEMA_ARCHIVO:
+            conn.execute(sentencia)
+
+        with metricas.cronometro("archivo"):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                resumen = _mover(conn, corte, archivado)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        conn.execute("DETACH DATABASE archivo")
+        if compactar:
+            conn.execute("VACUUM")
+            # En modo WAL, VACUUM reescribe toda la base de datos en el -wal
+            punto_de_control(conn.execute, "TRUNCATE")
+    finally:
+        conn.close()
+    return resumen
+
+
+def _mover(conn, corte, archivado):
+    """Copiar al archivo y borrar de la base principal (dentro de la transacción)"""
+    huerfanas = conn.execute(
+        """
+        DELETE FROM main.asistencias
+        WHERE alumno_id IS NULL OR alumno_id NOT IN (SELECT alumno_id FROM main.alumnos)
+        """
+    ).rowcount
+
+    # Catálogos: el archivo debe poder leerse solo
+    conn.execute(
+        """
+        INSERT INTO archivo.grados (grado_id, grado)
+        SELECT grado_id, grado FROM main.grados WHERE true
+        ON CONFLICT (grado_id) DO UPDATE SET grado = excluded.grado
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO archivo.detalle_grados (detalle_grado_id, grado_id, seccion)
+        SELECT detalle_grado_id, grado_id, seccion FROM main.detalle_grados WHERE true
+        ON CONFLICT (detalle_grado_id) DO UPDATE SET
+            grado_id = excluded.grado_id,
+            seccion = excluded.seccion
+        """
+    )
+
+    # Con ON CONFLICT DO UPDATE (no REPLACE) para no borrar en cascada las
+    # asistencias que el alumno ya tenía en el archivo
+    conn.execute(
+        f"""
+        INSERT INTO archivo.alumnos ({COLUMNAS_ALUMNOS}, archivado)
+        SELECT {COLUMNAS_ALUMNOS}, ? FROM main.alumnos
+        WHERE
+            estado != 'activo'
+            OR alumno_id IN (SELECT alumno_id FROM main.asistencias WHERE fecha < ?)
+        ON CONFLICT (alumno_id) DO UPDATE SET
+            codigo = excluded.codigo,
+            nombres = excluded.nombres,
+            apellido_paterno = excluded.apellido_paterno,
+            apellido_materno = excluded.apellido_materno,
+            fecha_ingreso = excluded.fecha_ingreso,
+            foto = excluded.foto,
+            detalle_grado_id = excluded.detalle_grado_id,
+            estado = excluded.estado,
+            archivado = excluded.archivado
+        """,
+        [archivado, corte],
+    )
+
+    # Una asistencia igual ya archivada (un archivo anterior que no terminó)
+    # se salta; una distinta con el mismo id se perdería al borrarla de la
+    # base principal, así que se cancela todo (por ejemplo, después de
+    # restaurar una copia vieja de la base principal)
+    distintas = conn.execute(
+        f"""
+        SELECT COUNT(*)
+        FROM (SELECT * FROM main.asistencias WHERE {ASISTENCIAS_A_MOVER}) m
+        INNER JOIN archivo.asistencias a ON a.asistencia_id = m.asistencia_id
+        WHERE
+            a.alumno_id IS NOT m.alumno_id
+            OR a.hora_entrada IS NOT m.hora_entrada
+            OR a.hora_salida IS NOT m.hora_salida
+            OR a.fecha IS NOT m.fecha
+        """,
+        [corte],
+    ).fetchone()[0]
+    if distintas:
+        raise ArchivoInconsistente(
+            f"{distintas} asistencias tienen el mismo número que otras ya archivadas"
+        )
+
+    asistencias = conn.execute(
+        f"""
+        INSERT INTO archivo.asistencias
+            (asistencia_id, alumno_id, hora_entrada, hora_salida, fecha)
+        SELECT asistencia_id, alumno_id, hora_entrada, hora_salida, fecha
+        FROM main.asistencias
+        WHERE {ASISTENCIAS_A_MOVER}
+        ON CONFLICT (asistencia_id) DO NOTHING
+        """,
+        [corte],
+    ).rowcount
+
+    conn.execute("DELETE FROM main.asistencias WHERE fecha < ?", [corte])
+    # Sus asistencias se borran en cascada
+    alumnos = conn.execute(
+        "DELETE FROM main.alumnos WHERE estado != 'activo'"
+    ).rowcount
+    return Resumen(alumnos, asistencias, huerfanas)
@@ -0,0 +1,293 @@
+"""Conexión, esquema e índices de la base de datos"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from escuela.fechas import fecha_sql, hora_sql
+
+# Modo WAL: quien lee no bloquea a quien escribe ni al revés. Cada conexión
+# hace un checkpoint automático cuando el -wal pasa de PAGINAS_CHECKPOINT
+# páginas (unos 16 MB; el valor de SQLite es 1000) y después lo recorta a
+# LIMITE_WAL bytes, para que la hora de entrada no pague checkpoints seguidos.
+PAGINAS_CHECKPOINT = 4000
+LIMITE_WAL = 32 * 2**20
+
+# Columnas agregadas a tablas que ya existían: (tabla, columna, definición)
+COLUMNAS = [
+    # Alumnos que siguen en el colegio ('activo'), que ya terminaron ('egresado')
+    # o que se eliminaron de la lista ('retirado')
+    ("alumnos", "estado", "VARCHAR(10) NOT NULL DEFAULT 'activo'"),
+]
+
+ESQUEMA = [
+    # Escaneo de código de barras
+    "CREATE INDEX IF NOT EXISTS idx_alumnos_codigo ON alumnos (codigo)",
+    # Paginación, orden y búsqueda de la lista de alumnos (solo se listan los
+    # activos: estado va primero para que cada página se lea del índice ya
+    # ordenada). Reemplazan a los índices sin estado de versiones anteriores.
+    "DROP INDEX IF EXISTS idx_alumnos_nombres",
+    "DROP INDEX IF EXISTS idx_alumnos_paterno",
+    "DROP INDEX IF EXISTS idx_alumnos_materno",
+    "DROP INDEX IF EXISTS idx_alumnos_codigo_orden",
+    "DROP INDEX IF EXISTS idx_alumnos_ingreso",
+    "DROP INDEX IF EXISTS idx_alumnos_detalle",
+    "CREATE INDEX IF NOT EXISTS idx_alumnos_estado_id ON alumnos (estado, alumno_id)",
+    "CREATE INDEX IF NOT EXISTS idx_alumnos_estado_nombres ON alumnos (estado, IFNULL(nombres, ''), alumno_id)",
+    "CREATE INDEX IF NOT EXISTS idx_alumnos_estado_paterno ON alumnos (estado, IFNULL(apellido_paterno, ''), alumno_id)",
+    "CREATE INDEX IF NOT EXISTS idx_alumnos_estado_materno ON alumnos (estado, IFNULL(apellido_materno, ''), alumno_id)",
+    "CREATE INDEX IF NOT EXISTS idx_alumnos_estado_codigo ON alumnos (estado, IFNULL(codigo, ''), alumno_id)",
+    "CREATE INDEX IF NOT EXISTS idx_alumnos_estado_ingreso ON alumnos (estado, IFNULL(fecha_ingreso, ''), alumno_id)",
+    "CREATE INDEX IF NOT EXISTS idx_alumnos_estado_grado ON alumnos (estado, IFNULL(detalle_grado_id, 0), alumno_id)",
+    # Alumnos activos por sección
+    "CREATE INDEX IF NOT EXISTS idx_alumnos_estado_detalle ON alumnos (estado, detalle_grado_id)",
+    # Asistencias por alumno y por fecha
+    "CREATE INDEX IF NOT EXISTS idx_asistencias_alumno_fecha ON asistencias (alumno_id, fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_asistencias_fecha ON asistencias (fecha)",
+    # Calendario escolar: feriados, vacaciones y días especiales con clases
+    """
+    CREATE TABLE IF NOT EXISTS calendario (
+        calendario_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fecha_inicio DATE NOT NULL,
+        fecha_fin DATE NOT NULL,
+        tipo VARCHAR(20) NOT NULL,
+        descripcion VARCHAR(250)
+    )
+    """,
+    # Hora de ingreso y tolerancia por grado, en segundos desde medianoche
+    """
+    CREATE TABLE IF NOT EXISTS horarios (
+        grado_id INTEGER PRIMARY KEY,
+        hora_inicio INTEGER NOT NULL,
+        tolerancia INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (grado_id) REFERENCES grados (grado_id)
+    )
+    """,
+    # Preferencias guardadas en la base de datos (clave -> valor)
+    """
+    CREATE TABLE IF NOT EXISTS configuracion (
+        clave VARCHAR(100) PRIMARY KEY,
+        valor TEXT
+    )
+    """,
+    # Asistencias con la fecha y las horas como texto, igual que antes de
+    # guardarlas como números (para consultas hechas a mano u otros programas)
+    f"""
+    CREATE VIEW IF NOT EXISTS asistencias_texto AS
+    SELECT
+        asistencia_id,
+        alumno_id,
+        {hora_sql("hora_entrada")} AS hora_entrada,
+        {hora_sql("hora_salida")} AS hora_salida,
+        {fecha_sql("fecha")} AS fecha
+    FROM asistencias
+    """,
+    # Reportes generados automáticamente y la huella de los datos que usaron
+    """
+    CREATE TABLE IF NOT EXISTS reportes_generados (
+        tipo VARCHAR(10) NOT NULL,
+        periodo VARCHAR(10) NOT NULL,
+        grado_id INTEGER NOT NULL,
+        seccion VARCHAR(10) NOT NULL,
+        huella TEXT NOT NULL,
+        archivo TEXT NOT NULL,
+        generado DATETIME NOT NULL,
+        PRIMARY KEY (tipo, periodo, grado_id, seccion)
+    )
+    """,
+]
+
+
+# Cambios de formato de los datos ya guardados, en orden; PRAGMA user_version
+# indica cuántos se aplicaron. Cada uno es una sola sentencia (se aplica entera
+# o no se aplica) y repetirlo no cambia nada.
+MIGRACIONES = [
+    # asistencias.fecha 'AAAA-MM-DD' -> días desde 1970-01-01 y
+    # hora_entrada / hora_salida 'HH:MM:SS' -> segundos desde medianoche
+    """
+    UPDATE asistencias SET
+        fecha = CAST(julianday(fecha) - 2440587.5 AS INTEGER),
+        hora_entrada = CAST(
+            strftime('%s', '1970-01-01 ' || NULLIF(hora_entrada, '')) AS INTEGER
+        ),
+        hora_salida = CAST(
+            strftime('%s', '1970-01-01 ' || NULLIF(hora_salida, '')) AS INTEGER
+        )
+    WHERE typeof(fecha) = 'text'
+    """,
+]
+
+
+def migrar(consultar):
+    """Aplicar las migraciones pendientes; devuelve cuántas se aplicaron"""
+    version = consultar("PRAGMA user_version").fetchone()[0]
+    for numero, sentencia in enumerate(MIGRACIONES[version:], start=version + 1):
+        consultar(sentencia)
+        consultar(f"PRAGMA user_version = {numero}")
+    return max(0, len(MIGRACIONES) - version)
+
+
+def asegurar_esquema(consultar):
+    """Activar el modo WAL, crear las tablas, columnas e índices que falten y
+    migrar los datos"""
+    activar_wal(consultar)
+
+    for tabla, columna, definicion in COLUMNAS:
+        existentes = {fila[1] for fila in consultar(f"PRAGMA table_info({tabla})")}
+        if columna not in existentes:
+            consultar(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+
+    for sentencia in ESQUEMA:
+        consultar(sentencia)
+
+    migrar(consultar)
+
+
+def leer_configuracion(consultar, clave, defecto=None):
+    """Valor guardado de una preferencia"""
+    fila = consultar(
+        "SELECT valor FROM configuracion WHERE clave = ?", [clave]
+    ).fetchone()
+    return defecto if fila is None or fila[0] is None else fila[0]
+
+
+def guardar_configuracion(consultar, clave, valor):
+    """Guardar (o reemplazar) una preferencia"""
+    return consultar(
+        """
+        INSERT INTO configuracion(clave, valor) VALUES (?, ?)
+        ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor
+        """,
+        [clave, None if valor is None else str(valor)],
+    )
+
+
+def activar_wal(consultar):
+    """Pasar la base de datos al modo WAL (queda guardado en el archivo).
+
+    Devuelve el modo resultante; sigue en 'delete' si el sistema de archivos
+    no permite WAL (por ejemplo, una carpeta de red).
+    """
+    return consultar("PRAGMA journal_mode = WAL").fetchone()[0]
+
+
+def punto_de_control(consultar, modo="PASSIVE"):
+    """Copiar el -wal a la base de datos sin esperar a los lectores.
+
+    Devuelve (bloqueado, páginas en el -wal, páginas copiadas). Con
+    modo="TRUNCATE" espera a las conexiones abiertas y deja el -wal vacío.
+    """
+    return tuple(consultar(f"PRAGMA wal_checkpoint({modo})").fetchone())
+
+
+def conectar(db_name, timeout=5.0, **opciones):
+    """Conexión con las claves foráneas activadas.
+
+    SQLite no las aplica si no se pide en cada conexión; con ellas, borrar
+    un alumno borra también sus asistencias (ON DELETE CASCADE). `timeout`
+    es el busy_timeout: lo que se espera a otra conexión antes de fallar con
+    "database is locked". `opciones` se pasan a sqlite3.connect.
+    """
+    conn = sqlite3.connect(db_name, timeout=timeout, **opciones)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute(f"PRAGMA wal_autocheckpoint = {PAGINAS_CHECKPOINT}")
+    conn.execute(f"PRAGMA journal_size_limit = {LIMITE_WAL}")
+    return conn
+
+
+@contextmanager
+def transaccion(db_name, timeout=5.0):
+    """Función consultar sobre una sola conexión con BEGIN IMMEDIATE.
+
+    Para cambios de varias sentencias que deben aplicarse juntos: al salir
+    del bloque with se hace COMMIT, o ROLLBACK si hubo una excepción. Con
+    IMMEDIATE otra transacción igual espera a que esta termine, así que lo
+    que se lee dentro no cambia antes de escribir.
+    """
+    conn = conectar(db_name, timeout)
+    # BEGIN / COMMIT explícitos: sqlite3 no abre ni cierra transacciones solo
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn.execute
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+class Instantanea:
+    """Lectura consistente en una conexión propia, para reportes y exportaciones.
+
+    Abre una transacción de solo lectura: todas las consultas ven los datos
+    como estaban al crearla, aunque mientras tanto se registren marcaciones.
+    En modo WAL no bloquea a las escrituras ni las espera. Se llama igual
+    que run_query (también desde otro hilo) y se cierra con cerrar() o al
+    salir del bloque with.
+    """
+
+    def __init__(self, db_name, timeout=5.0, registro=None):
+        self.registro = registro
+        self.conn = conectar(db_name, timeout, check_same_thread=False)
+        # BEGIN / COMMIT explícitos: sqlite3 no abre ni cierra transacciones solo
+        self.conn.isolation_level = None
+        self.conn.execute("PRAGMA query_only = ON")
+        self.conn.execute("BEGIN")
+        # La instantánea se toma con la primera lectura, no con BEGIN
+        self.conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        self._candado = threading.Lock()
+
+    def __call__(self, query, parameters=()):
+        """Ejecutar una consulta dentro de la instantánea"""
+        inicio = time.perf_counter()
+        with self._candado:
+            if self.conn is None:
+                raise sqlite3.ProgrammingError("La instantánea ya está cerrada")
+            result = self.conn.execute(query, parameters)
+            if self.registro is not None:
+                self.registro.registrar(
+                    self.conn, query, parameters, (time.perf_counter() - inicio) * 1000
+                )
+        return result
+
+    def cerrar(self):
+        """Terminar la transacción y cerrar la conexión (se puede llamar más de una vez)"""
+        with self._candado:
+            if self.conn is None:
+                return
+            self.conn.execute("ROLLBACK")
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def consultor(db_name, timeout=5.0, registro=None):
+    """Función equivalente a Main.run_query para usar sin la interfaz.
+
+    `timeout`: segundos que se espera a que otra conexión libere la base de
+    datos antes de fallar con "database is locked" (5 es el valor de sqlite3).
+    `registro`: RegistroConsultas donde contar el tiempo de cada consulta.
+    """
+
+    def run_query(query, parameters=()):
+        """Ejecutar cualquier query y obtener el resultado"""
+        inicio = time.perf_counter()
+        with conectar(db_name, timeout) as conn:
+            cursor = conn.cursor()
+            result = cursor.execute(query, parameters)
+            if registro is not None:
+                registro.registrar(
+                    conn, query, parameters, (time.perf_counter() - inicio) * 1000
+                )
+        return result
+
+    return run_query
@@ -0,0 +1,125 @@
+"""Calendario escolar: días lectivos, feriados y vacaciones"""
+
+from datetime import date, timedelta
+
+from escuela.metricas import metricas
+
+DIAS_ES = ["L", "M", "M", "J", "V", "S", "D"]
+
+MESES_ES = [
+    "Enero",
+    "Febrero",
+    "Marzo",
+    "Abril",
+    "Mayo",
+    "Junio",
+    "Julio",
+    "Agosto",
+    "Septiembre",
+    "Octubre",
+    "Noviembre",
+    "Diciembre",
+]
+
+# Tipo -> (descripción, ¿hay clases?)
+TIPOS = {
+    "feriado": ("Feriado", False),
+    "vacaciones": ("Vacaciones", False),
+    "especial": ("Día especial con clases", True),
+}
+
+
+class CalendarioEscolar:
+    """Días lectivos por año, calculados una vez y guardados en caché"""
+
+    def __init__(self, consultar):
+        self.consultar = consultar
+        # Aumenta cada vez que cambia el calendario
+        self.version = 0
+        # year -> {"dias": tuple de fechas, "por_mes": {mes: tuple}, "conjunto": set}
+        self._cache = {}
+
+    def invalidar(self):
+        """Olvidar los días calculados (después de modificar el calendario)"""
+        self._cache.clear()
+        self.version += 1
+
+    def dias_lectivos(self, year):
+        """Días con clases del año, en orden"""
+        return self._indice(year)["dias"]
+
+    def dias_lectivos_mes(self, year, mes):
+        """Días con clases del mes indicado"""
+        return self._indice(year)["por_mes"].get(mes, ())
+
+    def es_lectivo(self, fecha):
+        """Indica si hay clases en la fecha indicada"""
+        return fecha in self._indice(fecha.year)["conjunto"]
+
+    def dias_lectivos_hasta(self, fecha):
+        """Cantidad de días con clases del año hasta la fecha (inclusive)"""
+        return sum(1 for dia in self.dias_lectivos(fecha.year) if dia <= fecha)
+
+    def listar(self, year):
+        """Feriados, vacaciones y días especiales que tocan el año"""
+        return self.consultar(
+            """
+            SELECT calendario_id, fecha_inicio, fecha_fin, tipo, descripcion
+            FROM calendario
+            WHERE fecha_inicio <= ? AND fecha_fin >= ?
+            ORDER BY fecha_inicio ASC
+            """,
+            [f"{year}-12-31", f"{year}-01-01"],
+        ).fetchall()
+
+    def agregar(self, fecha_inicio, fecha_fin, tipo, descripcion=""):
+        """Registrar un feriado, un rango de vacaciones o un día especial"""
+        resultado = self.consultar(
+            "INSERT INTO calendario(fecha_inicio, fecha_fin, tipo, descripcion) VALUES (?, ?, ?, ?)",
+            [fecha_inicio.isoformat(), fecha_fin.isoformat(), tipo, descripcion],
+        )
+        self.invalidar()
+        return resultado
+
+    def eliminar(self, calendario_id):
+        """Quitar un registro del calendario"""
+        resultado = self.consultar(
+            "DELETE FROM calendario WHERE calendario_id = ?", [calendario_id]
+        )
+        self.invalidar()
+        return resultado
+
+    def _indice(self, year):
+        """Calcular (una sola vez por año) los días con clases"""
+        metricas.cache("calendario", year in self._cache)
+        if year in self._cache:
+            return self._cache[year]
+
+        sin_clases = set()
+        con_clases = set()
+        for _, inicio, fin, tipo, _ in self.listar(year):
+            destino = con_clases if TIPOS.get(tipo, ("", False))[1] else sin_clases
+            dia = date.fromisoformat(inicio)
+            ultimo = date.fromisoformat(fin)
+            while dia <= ultimo:
+                destino.add(dia)
+                dia += timedelta(days=1)
+
+        dias = []
+        dia = date(year, 1, 1)
+        while dia.year == year:
+            if (dia.weekday() < 5 and dia not in sin_clases) or dia in con_clases:
+                dias.append(dia)
+            dia += timedelta(days=1)
+
+        por_mes = {}
+        for dia in dias:
+            por_mes.setdefault(dia.month, []).append(dia)
+
+        indice = {
+            "dias": tuple(dias),
+            "por_mes": {mes: tuple(valores) for mes, valores in por_mes.items()},
+            "conjunto": frozenset(dias),
+        }
+        self._cache[year] = indice
+        return indice
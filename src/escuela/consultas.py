@@ -0,0 +1,178 @@
+"""Tiempos de las consultas SQL y registro de las lentas con su plan de ejecución"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Las consultas que tardan más que esto se escriben en el archivo de lentas
+UMBRAL_LENTA_MS = 100
+ARCHIVO_LENTAS = "consultas_lentas.log"
+
+# Vista a la que se atribuyen las consultas de hilos en segundo plano
+SEGUNDO_PLANO = "(segundo plano)"
+SIN_VISTA = "(sin vista)"
+
+_TEXTOS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_ESPACIOS = re.compile(r"\s+")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALORES = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+
+
+def normalizar(query):
+    """SQL sin literales ni espacios de más, para agrupar consultas iguales"""
+    query = _TEXTOS.sub("?", query)
+    query = _NUMEROS.sub("?", query)
+    query = _ESPACIOS.sub(" ", query).strip()
+    query = _LISTAS.sub("(...)", query)
+    return _VALORES.sub(r"\1", query)
+
+
+def plan_consulta(conn, query, parameters=()):
+    """Líneas de EXPLAIN QUERY PLAN, con sangría según la jerarquía"""
+    niveles = {0: -1}
+    lineas = []
+    for nodo, padre, _, detalle in conn.execute(f"EXPLAIN QUERY PLAN {query}", parameters):
+        niveles[nodo] = niveles.get(padre, -1) + 1
+        lineas.append("  " * niveles[nodo] + detalle)
+    return lineas
+
+
+class RegistroConsultas:
+    """Cantidad y tiempo de las consultas por SQL normalizado y por vista.
+
+    `registrar` se llama después de cada consulta; las que superan el umbral
+    se escriben en `archivo` junto con su plan (calculado una vez por SQL).
+    El tiempo medido va desde abrir la conexión hasta que la consulta
+    devuelve su primera fila; leer el resto del cursor no se cuenta.
+    """
+
+    def __init__(self, umbral_ms=UMBRAL_LENTA_MS, archivo=None):
+        self.umbral_ms = umbral_ms
+        self.archivo = archivo
+        self.vista = SIN_VISTA
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Empezar los conteos desde cero"""
+        with self._lock:
+            # SQL normalizado -> [cantidad, total_ms, maximo_ms]
+            self.por_sql = {}
+            # vista -> [aperturas, consultas, total_ms]
+            self.por_vista = {}
+            # SQL normalizado -> líneas del plan
+            self.planes = {}
+            self.lentas = 0
+            self.desde = time.time()
+
+    def abrir_vista(self, vista):
+        """Atribuir las consultas siguientes a `vista`"""
+        with self._lock:
+            self.vista = vista
+            self.por_vista.setdefault(vista, [0, 0, 0.0])[0] += 1
+
+    def registrar(self, conn, query, parameters, duracion_ms):
+        """Contar una consulta ya ejecutada en `conn`"""
+        sql = normalizar(query)
+        if threading.current_thread() is threading.main_thread():
+            vista = self.vista
+        else:
+            vista = SEGUNDO_PLANO
+
+        with self._lock:
+            estadistica = self.por_sql.get(sql)
+            if estadistica is None:
+                estadistica = self.por_sql[sql] = [0, 0.0, 0.0]
+            estadistica[0] += 1
+            estadistica[1] += duracion_ms
+            if duracion_ms > estadistica[2]:
+                estadistica[2] = duracion_ms
+
+            por_vista = self.por_vista.setdefault(vista, [0, 0, 0.0])
+            por_vista[1] += 1
+            por_vista[2] += duracion_ms
+
+        if duracion_ms >= self.umbral_ms:
+            self._registrar_lenta(conn, sql, query, parameters, duracion_ms, vista)
+
+    def _registrar_lenta(self, conn, sql, query, parameters, duracion_ms, vista):
+        """Escribir la consulta lenta y su plan en el archivo"""
+        # Con el lock, dos consultas lentas iguales no calculan el plan dos
+        # veces (EXPLAIN es rápido y se hace una vez por SQL)
+        with self._lock:
+            self.lentas += 1
+            plan = self.planes.get(sql)
+            if plan is None:
+                try:
+                    plan = plan_consulta(conn, query, parameters)
+                except sqlite3.Error as error:
+                    plan = [f"(sin plan: {error})"]
+                self.planes[sql] = plan
+
+        if self.archivo is None:
+            return
+        momento = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        texto = [f"{momento}  {duracion_ms:.1f} ms  vista: {vista}", f"  {sql}"]
+        texto.extend(f"    {linea}" for linea in plan)
+        try:
+            with open(self.archivo, "a", encoding="utf-8") as archivo:
+                archivo.write("\n".join(texto) + "\n\n")
+        except OSError:
+            pass
+
+    def resumen_sql(self, limite=None, orden="total"):
+        """(sql, cantidad, total_ms, promedio_ms, maximo_ms) ordenado por tiempo total
+        (orden="total") o por cantidad (orden="cantidad")"""
+        with self._lock:
+            filas = [
+                (sql, cantidad, total, total / cantidad, maximo)
+                for sql, (cantidad, total, maximo) in self.por_sql.items()
+            ]
+        columna = 2 if orden == "total" else 1
+        filas.sort(key=lambda fila: -fila[columna])
+        return filas[:limite]
+
+    def resumen_vistas(self):
+        """(vista, aperturas, consultas, total_ms, consultas por apertura)"""
+        with self._lock:
+            filas = [
+                (vista, aperturas, consultas, total, consultas / max(aperturas, 1))
+                for vista, (aperturas, consultas, total) in self.por_vista.items()
+            ]
+        return sorted(filas, key=lambda fila: -fila[3])
+
+    def informe(self, limite=20):
+        """Texto con los conteos por vista y las consultas que más tiempo suman"""
+        lineas = [
+            f"Consultas desde {datetime.fromtimestamp(self.desde):%Y-%m-%d %H:%M:%S}"
+            f" ({self.lentas} lentas de más de {self.umbral_ms} ms)",
+            "",
+            "Por vista: aperturas, consultas, ms, consultas por apertura",
+        ]
+        for vista, aperturas, consultas, total, por_apertura in self.resumen_vistas():
+            lineas.append(
+                f"  {vista:<32} {aperturas:6d} {consultas:8d} {total:10.1f} {por_apertura:8.1f}"
+            )
+        lineas.extend(["", "Por consulta: cantidad, ms total, ms promedio, ms máximo"])
+        for sql, cantidad, total, promedio, maximo in self.resumen_sql(limite):
+            lineas.append(f"  {cantidad:8d} {total:10.1f} {promedio:8.2f} {maximo:8.1f}  {sql}")
+        return "\n".join(lineas)
+
+    def guardar_informe(self):
+        """Agregar el informe al archivo de consultas lentas"""
+        if self.archivo is None:
+            return
+        try:
+            with open(self.archivo, "a", encoding="utf-8") as archivo:
+                archivo.write(self.informe() + "\n\n")
+        except OSError:
+            pass
+
+
+def archivo_lentas(db_name):
+    """Archivo de consultas lentas junto a la base de datos"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_name)), ARCHIVO_LENTAS)
@@ -0,0 +1,442 @@
+"""Exportación de reportes a Excel, CSV y formato columnar comprimido"""
+
+import csv
+import json
+import os
+import struct
+import threading
+import uuid
+import zlib
+from array import array
+from collections import namedtuple
+from itertools import islice
+
+from escuela.metricas import metricas
+
+# Formato columnar: cabecera del archivo y filas por grupo
+FIRMA_COLUMNAR = b"ASISCOL1"
+FILAS_POR_GRUPO = 65536
+
+# Cada cuántas filas se avisa el progreso
+FILAS_POR_AVISO = 500
+
+
+class ExportacionCancelada(Exception):
+    """El usuario canceló la exportación"""
+
+
+class ReporteVacio(Exception):
+    """El reporte no tiene filas de datos (solo metadatos y cabeceras)"""
+
+
+class FormatoNoSoportado(ValueError):
+    """La extensión del archivo no corresponde a ningún formato de exportación"""
+
+
+# Datos a exportar:
+# - nombre: nombre sugerido del archivo (sin extensión)
+# - metadatos: filas (etiqueta, valor) al inicio de la hoja
+# - bloques: tablas que se escriben una debajo de otra
+# - combinar: combinar las celdas B:D de los metadatos
+Reporte = namedtuple(
+    "Reporte", ["nombre", "metadatos", "bloques", "combinar"], defaults=[True]
+)
+
+# Una tabla del reporte:
+# - titulo: fila (etiqueta, valor) antes de las cabeceras, o None
+# - cabeceras: nombres de las columnas
+# - filas: cualquier iterable (puede ser un generador) de filas
+# - separar: dejar una fila en blanco antes del bloque
+Bloque = namedtuple(
+    "Bloque", ["titulo", "cabeceras", "filas", "separar"], defaults=[None, False]
+)
+
+
+def con_progreso(filas, progreso):
+    """Llamar a progreso(n) cada FILAS_POR_AVISO filas con las filas nuevas.
+
+    progreso puede lanzar ExportacionCancelada para detener la exportación.
+    """
+    if progreso is None:
+        yield from filas
+        return
+
+    pendientes = 0
+    for fila in filas:
+        yield fila
+        pendientes += 1
+        if pendientes == FILAS_POR_AVISO:
+            progreso(pendientes)
+            pendientes = 0
+    progreso(pendientes)
+
+
+def filas_hoja(reporte):
+    """Generar, en orden, todas las filas de la hoja del reporte"""
+    for etiqueta, valor in reporte.metadatos:
+        yield [etiqueta, valor]
+
+    for bloque in reporte.bloques:
+        if bloque.separar:
+            yield []
+        if bloque.titulo is not None:
+            yield list(bloque.titulo)
+        yield list(bloque.cabeceras)
+        yield from bloque.filas
+
+
+def _escribir_hoja(wb, titulo, reporte, progreso=None):
+    """Agregar una hoja de solo escritura con el reporte y devolver sus filas"""
+    ws = wb.create_sheet(titulo)
+
+    if reporte.combinar:
+        for fila in range(1, len(reporte.metadatos) + 1):
+            ws.merged_cells.add(f"B{fila}:D{fila}")
+
+    filas = 0
+    for fila in con_progreso(filas_hoja(reporte), progreso):
+        ws.append(fila)
+        filas += 1
+    return filas
+
+
+def escribir_excel(file_path, reporte, progreso=None):
+    """Escribir el reporte en modo de solo escritura: las filas se agregan
+    directamente desde los generadores y no se guardan en memoria"""
+    from openpyxl import Workbook  # se carga recién al exportar a Excel
+
+    wb = Workbook(write_only=True)
+    filas = _escribir_hoja(wb, "Reporte", reporte, progreso)
+    wb.save(file_path)
+    return filas
+
+
+def escribir_excel_hojas(file_path, hojas, progreso=None):
+    """Escribir varios reportes en un solo libro, uno por hoja.
+
+    hojas: iterable de (titulo_hoja, reporte); se escribe a medida que llega.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    filas = 0
+    for titulo, reporte in hojas:
+        filas += _escribir_hoja(wb, titulo_hoja(titulo), reporte, progreso)
+    wb.save(file_path)
+    return filas
+
+
+def titulo_hoja(texto):
+    """Título válido para una hoja de Excel (máximo 31 caracteres, sin : / ? * [ ])"""
+    for caracter in ":\\/?*[]":
+        texto = texto.replace(caracter, " ")
+    return texto[:31]
+
+
+def materializar(reporte):
+    """Copia del reporte con las filas en listas (para enviarlo entre procesos)"""
+    return reporte._replace(
+        bloques=[
+            bloque._replace(filas=[list(fila) for fila in bloque.filas])
+            for bloque in reporte.bloques
+        ]
+    )
+
+
+def escribir_csv(file_path, reporte, progreso=None):
+    """Escribir el reporte como CSV, fila por fila"""
+    # utf-8-sig para que Excel reconozca las tildes al abrir el archivo
+    with open(file_path, "w", newline="", encoding="utf-8-sig") as archivo:
+        writer = csv.writer(archivo)
+        filas = 0
+        for fila in con_progreso(filas_hoja(reporte), progreso):
+            writer.writerow(fila)
+            filas += 1
+    return filas
+
+
+def _codificar_columna(valores):
+    """Tipo y bytes comprimidos de una columna de un grupo de filas"""
+    if all(type(valor) is int for valor in valores):
+        try:
+            return b"i", zlib.compress(array("q", valores).tobytes())
+        except OverflowError:
+            pass
+    if all(type(valor) in (int, float) for valor in valores):
+        return b"f", zlib.compress(array("d", valores).tobytes())
+
+    # Números con nulos (por ejemplo, la hora de salida sin marcar): máscara
+    # de nulos + los números, con 0 en lugar de cada nulo
+    numeros = [valor for valor in valores if valor is not None]
+    if numeros and len(numeros) < len(valores):
+        nulos = bytes(valor is None for valor in valores)
+        if all(type(valor) is int for valor in numeros):
+            try:
+                enteros = array("q", [valor or 0 for valor in valores]).tobytes()
+                return b"I", zlib.compress(nulos + enteros)
+            except OverflowError:
+                pass
+        if all(type(valor) in (int, float) for valor in numeros):
+            reales = array("d", [valor or 0 for valor in valores]).tobytes()
+            return b"F", zlib.compress(nulos + reales)
+
+    # Texto: máscara de nulos + longitudes + contenido UTF-8
+    nulos = bytes(valor is None for valor in valores)
+    textos = [b"" if valor is None else str(valor).encode("utf-8") for valor in valores]
+    longitudes = array("I", [len(texto) for texto in textos]).tobytes()
+    contenido = b"".join(textos)
+    return b"s", zlib.compress(
+        struct.pack("<II", len(nulos), len(longitudes)) + nulos + longitudes + contenido
+    )
+
+
+def _decodificar_columna(tipo, datos, cantidad):
+    """Valores de una columna codificada con _codificar_columna"""
+    datos = zlib.decompress(datos)
+    if tipo == b"i":
+        return array("q", datos).tolist()
+    if tipo == b"f":
+        return array("d", datos).tolist()
+    if tipo in (b"I", b"F"):
+        nulos = datos[:cantidad]
+        numeros = array("q" if tipo == b"I" else "d", datos[cantidad:])
+        return [None if nulos[i] else numeros[i] for i in range(cantidad)]
+
+    largo_nulos, largo_longitudes = struct.unpack_from("<II", datos)
+    inicio = 8
+    nulos = datos[inicio : inicio + largo_nulos]
+    inicio += largo_nulos
+    longitudes = array("I", datos[inicio : inicio + largo_longitudes])
+    inicio += largo_longitudes
+
+    valores = []
+    for i in range(cantidad):
+        fin = inicio + longitudes[i]
+        valores.append(None if nulos[i] else datos[inicio:fin].decode("utf-8"))
+        inicio = fin
+    return valores
+
+
+def _escribir_registro(archivo, tipo, datos):
+    """Registro: 1 byte de tipo + 4 bytes de longitud + datos"""
+    archivo.write(tipo + struct.pack("<I", len(datos)) + datos)
+
+
+def escribir_columnar(file_path, reporte, progreso=None):
+    """Archivo columnar comprimido con zlib para archivar (solo biblioteca estándar).
+
+    Cada bloque se guarda en grupos de filas; dentro de cada grupo los valores
+    se guardan por columna, así que la memoria usada no depende del total.
+    """
+    filas = 0
+    with open(file_path, "wb") as archivo:
+        archivo.write(FIRMA_COLUMNAR)
+        _escribir_registro(
+            archivo,
+            b"M",
+            json.dumps(
+                {"nombre": reporte.nombre, "metadatos": reporte.metadatos},
+                ensure_ascii=False,
+                default=str,
+            ).encode("utf-8"),
+        )
+
+        for bloque in reporte.bloques:
+            cabeceras = list(bloque.cabeceras)
+            _escribir_registro(
+                archivo,
+                b"B",
+                json.dumps(
+                    {"titulo": bloque.titulo, "cabeceras": cabeceras},
+                    ensure_ascii=False,
+                    default=str,
+                ).encode("utf-8"),
+            )
+
+            iterador = con_progreso(bloque.filas, progreso)
+            while True:
+                grupo = list(islice(iterador, FILAS_POR_GRUPO))
+                if not grupo:
+                    break
+                filas += len(grupo)
+                columnas = list(zip(*grupo))
+                _escribir_registro(
+                    archivo, b"G", struct.pack("<II", len(grupo), len(columnas))
+                )
+                for columna in columnas:
+                    tipo, datos = _codificar_columna(columna)
+                    _escribir_registro(archivo, tipo, datos)
+    return filas
+
+
+def leer_columnar(file_path):
+    """Leer un archivo de escribir_columnar: genera (titulo, cabeceras, fila)"""
+    with open(file_path, "rb") as archivo:
+        if archivo.read(len(FIRMA_COLUMNAR)) != FIRMA_COLUMNAR:
+            raise ValueError(f"{file_path} no es un archivo columnar de asistencias")
+
+        bloque = None
+        while True:
+            encabezado = archivo.read(5)
+            if not encabezado:
+                return
+            tipo = encabezado[:1]
+            datos = archivo.read(struct.unpack("<I", encabezado[1:])[0])
+
+            if tipo == b"B":
+                bloque = json.loads(datos)
+            elif tipo == b"G":
+                cantidad, total_columnas = struct.unpack("<II", datos)
+                columnas = []
+                for _ in range(total_columnas):
+                    encabezado = archivo.read(5)
+                    datos = archivo.read(struct.unpack("<I", encabezado[1:])[0])
+                    columnas.append(
+                        _decodificar_columna(encabezado[:1], datos, cantidad)
+                    )
+                for fila in zip(*columnas):
+                    yield bloque["titulo"], bloque["cabeceras"], fila
+
+
+ESCRITORES = {
+    "xlsx": escribir_excel,
+    "csv": escribir_csv,
+    "col": escribir_columnar,
+}
+
+
+def escribir(file_path, reporte, formato=None, progreso=None):
+    """Escribir el reporte en el formato indicado o según la extensión del archivo"""
+    if formato is None:
+        formato = os.path.splitext(file_path)[1].lstrip(".").lower()
+    if formato not in ESCRITORES:
+        raise FormatoNoSoportado(f"Formato no soportado: {formato}")
+    with metricas.cronometro(f"exportacion.{formato}"):
+        return ESCRITORES[formato](file_path, reporte, progreso)
+
+
+def escribir_atomico(
+    file_path, reporte, formato=None, progreso=None, permitir_vacio=True
+):
+    """Escribir en un archivo temporal de la misma carpeta y renombrarlo al
+    terminar, para no dejar nunca un archivo a medio escribir.
+
+    El temporal se crea como lo haría open() (no con los 0600 de mkstemp),
+    así que el archivo queda con los permisos que da la umask. Con
+    permitir_vacio=False, un reporte sin filas de datos lanza ReporteVacio
+    y no se crea ni reemplaza ningún archivo.
+    """
+    if formato is None:
+        formato = os.path.splitext(file_path)[1].lstrip(".").lower()
+
+    datos = [0]
+    if not permitir_vacio:
+        reporte = _contando_filas(reporte, datos)
+
+    temporal = _crear_temporal(os.path.dirname(os.path.abspath(file_path)), formato)
+    try:
+        filas = escribir(temporal, reporte, formato, progreso)
+        if not permitir_vacio and datos[0] == 0:
+            raise ReporteVacio(f"{reporte.nombre} no tiene datos")
+        os.replace(temporal, file_path)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return filas
+
+
+def _contando_filas(reporte, contador):
+    """El mismo reporte, sumando en contador[0] las filas de datos a medida
+    que se escriben"""
+
+    def contar(filas):
+        for fila in filas:
+            contador[0] += 1
+            yield fila
+
+    return reporte._replace(
+        bloques=(
+            bloque._replace(filas=contar(bloque.filas)) for bloque in reporte.bloques
+        )
+    )
+
+
+def _crear_temporal(directorio, formato):
+    """Crear un archivo vacío con nombre único en el directorio (O_EXCL)"""
+    while True:
+        temporal = os.path.join(
+            directorio, f".exportando-{uuid.uuid4().hex[:12]}.{formato}"
+        )
+        try:
+            os.close(os.open(temporal, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+        except FileExistsError:
+            continue
+        return temporal
+
+
+class TareaExportacion:
+    """Escribe un reporte (escribir_atomico) en un hilo aparte.
+
+    La interfaz consulta `filas` y `terminado` cuando quiera y puede pedir
+    `cancelar`; al terminar, `error` tiene la excepción que hubo (o None).
+    `reporte` puede ser una función que lo arma: se llama ya en el hilo.
+    `al_terminar()` se llama en el hilo al acabar, con o sin error (por
+    ejemplo, para cerrar la Instantanea de la que se leen las filas). Un
+    reporte sin filas de datos termina con ReporteVacio, sin escribir nada.
+    """
+
+    def __init__(self, file_path, reporte, formato=None, al_terminar=None):
+        self.file_path = file_path
+        self.reporte = reporte
+        self.formato = formato
+        self.al_terminar = al_terminar
+        self.filas = 0
+        self.terminado = False
+        self.error = None
+        self._cancelar = threading.Event()
+        self._hilo = None
+
+    @property
+    def cancelando(self):
+        """Indica si se pidió cancelar"""
+        return self._cancelar.is_set()
+
+    def cancelar(self):
+        """Detener la exportación en el próximo aviso de progreso"""
+        self._cancelar.set()
+
+    def iniciar(self):
+        """Empezar a escribir en segundo plano"""
+        self._hilo = threading.Thread(target=self._ejecutar, daemon=True)
+        self._hilo.start()
+        return self
+
+    def esperar(self, timeout=None):
+        """Esperar a que termine; devuelve `terminado`"""
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+        return self.terminado
+
+    def _progreso(self, filas):
+        self.filas += filas
+        if self._cancelar.is_set():
+            raise ExportacionCancelada()
+
+    def _ejecutar(self):
+        try:
+            try:
+                reporte = self.reporte() if callable(self.reporte) else self.reporte
+                escribir_atomico(
+                    self.file_path,
+                    reporte,
+                    self.formato,
+                    self._progreso,
+                    permitir_vacio=False,
+                )
+            finally:
+                if self.al_terminar is not None:
+                    self.al_terminar()
+        except Exception as error:
+            self.error = error
+        self.terminado = True
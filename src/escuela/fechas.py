@@ -0,0 +1,56 @@
+"""Fechas y horas de las asistencias guardadas como números.
+
+asistencias.fecha es el número de día desde 1970-01-01 y hora_entrada /
+hora_salida son segundos desde medianoche. Aquí están las conversiones, en
+Python y en SQL, para que los reportes no lean ni escriban texto fila por fila.
+"""
+
+from datetime import date
+from functools import lru_cache
+
+# Número de día de 1970-01-01 en el calendario de Python (date.toordinal)
+EPOCA = date(1970, 1, 1).toordinal()
+
+
+def numero_dia(fecha):
+    """date -> número de día que se guarda en asistencias.fecha"""
+    return fecha.toordinal() - EPOCA
+
+
+@lru_cache(maxsize=4096)
+def fecha_dia(numero):
+    """Número de día de asistencias.fecha -> date"""
+    return date.fromordinal(numero + EPOCA)
+
+
+def segundos(momento):
+    """datetime o time -> segundos desde medianoche"""
+    return momento.hour * 3600 + momento.minute * 60 + momento.second
+
+
+def hora_texto(segundos):
+    """Segundos desde medianoche -> 'HH:MM:SS' (vacío si no hay dato)"""
+    if segundos is None:
+        return ""
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+
+def hora_12(segundos, con_segundos=False):
+    """Segundos desde medianoche -> '07:05 AM' o '07:05:09 AM' (vacío si no hay dato)"""
+    if segundos is None:
+        return ""
+    horas = segundos // 3600
+    texto = f"{horas % 12 or 12:02d}:{segundos % 3600 // 60:02d}"
+    if con_segundos:
+        texto += f":{segundos % 60:02d}"
+    return f"{texto} {'AM' if horas < 12 else 'PM'}"
+
+
+def fecha_sql(columna):
+    """Expresión SQL: número de día -> 'AAAA-MM-DD'"""
+    return f"date({columna} * 86400, 'unixepoch')"
+
+
+def hora_sql(columna):
+    """Expresión SQL: segundos desde medianoche -> 'HH:MM:SS'"""
+    return f"time({columna}, 'unixepoch')"
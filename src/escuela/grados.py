@@ -0,0 +1,98 @@
+"""Grados y secciones: datos de referencia cargados una vez en memoria"""
+
+from escuela.metricas import metricas
+
+# Los grados de primaria (1 a 6) no se muestran en la interfaz
+GRADO_MINIMO = 7
+
+
+class CatalogoGrados:
+    """grados y detalle_grados en diccionarios, leídos con dos consultas.
+
+    Se cargan la primera vez que se usan y se vuelven a leer después de
+    `invalidar` (llamarlo al modificar grados o secciones).
+    """
+
+    def __init__(self, consultar):
+        self.consultar = consultar
+        # Aumenta cada vez que se vuelven a leer los datos
+        self.version = 0
+        self._cargado = False
+        self._grados = {}  # grado_id -> grado
+        self._ids = {}  # grado -> grado_id
+        self._secciones = {}  # grado_id -> tuple de secciones ordenadas
+        self._detalles = {}  # (grado_id, seccion) -> detalle_grado_id
+
+    def invalidar(self):
+        """Volver a leer los grados y secciones la próxima vez que se usen"""
+        self._cargado = False
+
+    def _cargar(self):
+        """Leer las dos tablas si aún no están en memoria"""
+        metricas.cache("grados", self._cargado)
+        if self._cargado:
+            return
+
+        self._grados = dict(
+            self.consultar(
+                "SELECT grado_id, grado FROM grados ORDER BY grado_id"
+            ).fetchall()
+        )
+        self._ids = {grado: grado_id for grado_id, grado in self._grados.items()}
+
+        self._detalles = {}
+        secciones = {}
+        for detalle_grado_id, grado_id, seccion in self.consultar(
+            "SELECT detalle_grado_id, grado_id, seccion FROM detalle_grados"
+        ):
+            self._detalles[(grado_id, seccion)] = detalle_grado_id
+            secciones.setdefault(grado_id, set()).add(seccion)
+        self._secciones = {
+            grado_id: tuple(sorted(valores)) for grado_id, valores in secciones.items()
+        }
+
+        self._cargado = True
+        self.version += 1
+
+    def grados(self):
+        """(grado_id, grado) de los grados que se muestran, en orden"""
+        self._cargar()
+        return [
+            (grado_id, grado)
+            for grado_id, grado in self._grados.items()
+            if grado_id >= GRADO_MINIMO
+        ]
+
+    def nombres(self):
+        """Nombres de los grados que se muestran, en orden"""
+        return [grado for _, grado in self.grados()]
+
+    def grado_id(self, grado):
+        """ID de un grado por su nombre, o None"""
+        self._cargar()
+        return self._ids.get(grado)
+
+    def nombre(self, grado_id):
+        """Nombre de un grado por su ID, o None"""
+        self._cargar()
+        return self._grados.get(grado_id)
+
+    def secciones(self, grado_id=None):
+        """Secciones que existen en el grado (o en cualquier grado que se muestra)"""
+        self._cargar()
+        if grado_id is not None:
+            return list(self._secciones.get(grado_id, ()))
+        return sorted(
+            {
+                seccion
+                for grado_id, secciones in self._secciones.items()
+                if grado_id >= GRADO_MINIMO
+                for seccion in secciones
+            }
+        )
+
+    def detalle_grado_id(self, grado_id, seccion):
+        """ID de detalle_grados de un grado y sección, o None si no existe"""
+        self._cargar()
+        return self._detalles.get((grado_id, seccion))
+
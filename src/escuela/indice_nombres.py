@@ -0,0 +1,151 @@
+"""Índice en memoria para buscar alumnos por nombre"""
+
+import unicodedata
+from bisect import bisect_left, insort
+
+# Peso de cada campo al ordenar los resultados (se busca más por apellido)
+PESO_PATERNO = 3
+PESO_MATERNO = 2
+PESO_NOMBRES = 1
+
+CONSULTA_ALUMNOS = """
+    SELECT
+        a.alumno_id,
+        a.codigo,
+        a.nombres,
+        a.apellido_paterno,
+        a.apellido_materno,
+        g.grado,
+        dg.seccion
+    FROM
+        alumnos a
+    LEFT JOIN detalle_grados dg
+        ON
+        dg.detalle_grado_id = a.detalle_grado_id
+    LEFT JOIN grados g
+        ON
+        g.grado_id = dg.grado_id
+"""
+
+
+def normalizar(texto):
+    """Mayúsculas y sin tildes: 'Núñez' -> 'NUNEZ'"""
+    descompuesto = unicodedata.normalize("NFD", (texto or "").upper())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    """Palabras normalizadas de un texto"""
+    return normalizar(texto).split()
+
+
+class IndiceNombres:
+    """Arreglo ordenado de palabras de nombres y apellidos con búsqueda por prefijo"""
+
+    def __init__(self):
+        # alumno_id -> (alumno_id, codigo, nombres, paterno, materno, grado, seccion)
+        self.alumnos = {}
+        # Tuplas (palabra, alumno_id, peso) ordenadas
+        self._tokens = []
+
+    def __len__(self):
+        return len(self.alumnos)
+
+    def cargar(self, consultar):
+        """Construir el índice con todos los alumnos de la base de datos"""
+        filas = consultar(f"{CONSULTA_ALUMNOS} WHERE a.estado = 'activo'").fetchall()
+        self.alumnos = {fila[0]: fila for fila in filas}
+        self._tokens = sorted(
+            token for fila in filas for token in self._tokens_de(fila)
+        )
+
+    def refrescar_alumno(self, consultar, alumno_id):
+        """Volver a leer un alumno después de crearlo o editarlo"""
+        fila = consultar(
+            f"{CONSULTA_ALUMNOS} WHERE a.alumno_id = ? AND a.estado = 'activo'",
+            [alumno_id],
+        ).fetchone()
+        self.eliminar(alumno_id)
+        if fila is not None:
+            self.agregar(fila)
+
+    def agregar(self, fila):
+        """Agregar un alumno al índice"""
+        self.alumnos[fila[0]] = fila
+        for token in self._tokens_de(fila):
+            insort(self._tokens, token)
+
+    def eliminar(self, alumno_id):
+        """Quitar un alumno del índice"""
+        fila = self.alumnos.pop(alumno_id, None)
+        if fila is None:
+            return
+
+        for token in self._tokens_de(fila):
+            posicion = bisect_left(self._tokens, token)
+            if posicion < len(self._tokens) and self._tokens[posicion] == token:
+                del self._tokens[posicion]
+
+    def buscar(self, texto, limite=None, candidatos=None):
+        """Alumnos en los que cada palabra buscada es prefijo de alguna palabra
+        de sus nombres o apellidos, del más al menos relevante"""
+        palabras = tokenizar(texto)
+        if not palabras:
+            return []
+
+        puntajes = None
+        for palabra in palabras:
+            coincidencias = self._coincidencias(palabra)
+            if puntajes is None:
+                puntajes = coincidencias
+            else:
+                puntajes = {
+                    alumno_id: puntajes[alumno_id] + puntaje
+                    for alumno_id, puntaje in coincidencias.items()
+                    if alumno_id in puntajes
+                }
+            if candidatos is not None:
+                puntajes = {
+                    alumno_id: puntaje
+                    for alumno_id, puntaje in puntajes.items()
+                    if alumno_id in candidatos
+                }
+            if not puntajes:
+                return []
+
+        ordenados = sorted(
+            puntajes,
+            key=lambda alumno_id: (
+                -puntajes[alumno_id],
+                self.alumnos[alumno_id][3] or "",
+                self.alumnos[alumno_id][4] or "",
+                self.alumnos[alumno_id][2] or "",
+            ),
+        )
+        if limite is not None:
+            ordenados = ordenados[:limite]
+        return [self.alumnos[alumno_id] for alumno_id in ordenados]
+
+    def _coincidencias(self, palabra):
+        """Mejor puntaje de cada alumno con alguna palabra que empieza con 'palabra'"""
+        puntajes = {}
+        posicion = bisect_left(self._tokens, (palabra,))
+        while posicion < len(self._tokens):
+            token, alumno_id, peso = self._tokens[posicion]
+            if not token.startswith(palabra):
+                break
+            # Una palabra completa vale más que un prefijo
+            puntaje = peso * 2 if token == palabra else peso
+            if puntaje > puntajes.get(alumno_id, 0):
+                puntajes[alumno_id] = puntaje
+            posicion += 1
+        return puntajes
+
+    @staticmethod
+    def _tokens_de(fila):
+        """Palabras indexadas de un alumno con el peso de su campo"""
+        alumno_id = fila[0]
+        tokens = [(token, alumno_id, PESO_NOMBRES) for token in tokenizar(fila[2])]
+        tokens += [(token, alumno_id, PESO_PATERNO) for token in tokenizar(fila[3])]
+        tokens += [(token, alumno_id, PESO_MATERNO) for token in tokenizar(fila[4])]
+        return tokens
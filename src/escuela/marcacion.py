@@ -0,0 +1,101 @@
+"""Marcación de entrada y salida con el código de barras del alumno"""
+
+import time
+from collections import namedtuple
+from datetime import datetime
+from functools import wraps
+
+from escuela.fechas import numero_dia, segundos
+from escuela.metricas import metricas
+from escuela.repositorios import RepositorioAlumnos, RepositorioAsistencias
+
+# Resultados de una marcación
+REGISTRADA = "registrada"
+NO_ENCONTRADO = "no_encontrado"
+ENTRADA_DUPLICADA = "entrada_duplicada"
+SIN_ENTRADA = "sin_entrada"
+SALIDA_DUPLICADA = "salida_duplicada"
+ERROR = "error"
+
+# - resultado: una de las constantes de arriba
+# - alumno: (alumno_id, nombres, apellido) o None si no se encontró
+Marcacion = namedtuple("Marcacion", ["resultado", "alumno"])
+
+
+def _medir(tipo):
+    """Registrar en las métricas el tiempo y el resultado de cada marcación"""
+
+    def decorador(marcar):
+        @wraps(marcar)
+        def medida(self, codigo, ahora=None):
+            inicio = time.perf_counter()
+            marcacion = marcar(self, codigo, ahora)
+            metricas.tiempo(f"escaneo.{tipo}", (time.perf_counter() - inicio) * 1000)
+            metricas.contar(f"escaneo.{tipo}.{marcacion.resultado}")
+            return marcacion
+
+        return medida
+
+    return decorador
+
+
+class ServicioMarcacion:
+    """Reglas de la marcación: una entrada por día y la salida después de la entrada"""
+
+    def __init__(self, consultar):
+        self.alumnos = RepositorioAlumnos(consultar)
+        self.asistencias = RepositorioAsistencias(consultar)
+
+    @_medir("entrada")
+    def entrada(self, codigo, ahora=None):
+        """Registrar la entrada del alumno si hoy aún no la tiene"""
+        if ahora is None:
+            ahora = datetime.now()
+
+        alumno = self.alumnos.por_codigo(codigo)
+        if alumno is None:
+            return Marcacion(NO_ENCONTRADO, None)
+        alumno = alumno[:3]
+
+        fecha = numero_dia(ahora)
+        if self.asistencias.del_dia(alumno[0], fecha) is not None:
+            return Marcacion(ENTRADA_DUPLICADA, alumno)
+
+        registrada = self.asistencias.registrar_entrada(
+            alumno[0], fecha, segundos(ahora)
+        )
+        return Marcacion(REGISTRADA if registrada else ERROR, alumno)
+
+    @_medir("salida")
+    def salida(self, codigo, ahora=None):
+        """Registrar la salida del alumno si hoy ya marcó su entrada"""
+        if ahora is None:
+            ahora = datetime.now()
+
+        alumno = self.alumnos.por_codigo(codigo)
+        if alumno is None:
+            return Marcacion(NO_ENCONTRADO, None)
+        # El aviso de salida muestra el apellido materno
+        alumno = (alumno[0], alumno[1], alumno[3])
+
+        fecha = numero_dia(ahora)
+        asistencia = self.asistencias.del_dia(alumno[0], fecha)
+        if asistencia is None:
+            return Marcacion(SIN_ENTRADA, alumno)
+        if asistencia[2] is not None:
+            return Marcacion(SALIDA_DUPLICADA, alumno)
+
+        registrada = self.asistencias.registrar_salida(
+            alumno[0], fecha, segundos(ahora)
+        )
+        return Marcacion(REGISTRADA if registrada else ERROR, alumno)
+
+
+def marcar_entrada(consultar, codigo, ahora=None):
+    """Registrar la entrada sin crear antes un ServicioMarcacion"""
+    return ServicioMarcacion(consultar).entrada(codigo, ahora)
+
+
+def marcar_salida(consultar, codigo, ahora=None):
+    """Registrar la salida sin crear antes un ServicioMarcacion"""
+    return ServicioMarcacion(consultar).salida(codigo, ahora)
@@ -0,0 +1,187 @@
+"""Métricas de rendimiento en memoria: contadores, tiempos recientes y aciertos de caché.
+
+`metricas` es el registro de la aplicación; escaneos, reportes, exportaciones
+y cachés lo actualizan con operaciones baratas (sumar un número o agregar un
+par a un deque de tamaño fijo) y el panel de diagnóstico lo lee.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Tiempos recientes que se guardan por métrica
+MUESTRAS = 1000
+
+
+class Metricas:
+    """Registro de contadores y tiempos con nombre"""
+
+    def __init__(self, muestras=MUESTRAS):
+        self.muestras = muestras
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Empezar desde cero"""
+        with self._lock:
+            self._contadores = {}
+            # nombre -> deque de (momento, ms)
+            self._tiempos = {}
+            self.desde = time.time()
+
+    def contar(self, nombre, cantidad=1):
+        """Sumar al contador `nombre`"""
+        with self._lock:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + cantidad
+
+    def tiempo(self, nombre, ms):
+        """Registrar una duración en milisegundos"""
+        tiempos = self._tiempos.get(nombre)
+        if tiempos is None:
+            with self._lock:
+                tiempos = self._tiempos.setdefault(nombre, deque(maxlen=self.muestras))
+        # deque.append es atómico: no hace falta el lock
+        tiempos.append((time.time(), ms))
+
+    @contextmanager
+    def cronometro(self, nombre):
+        """Registrar cuánto tarda el bloque `with`"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempo(nombre, (time.perf_counter() - inicio) * 1000)
+
+    def cache(self, nombre, acierto):
+        """Contar un acierto o un fallo de la caché `nombre`"""
+        self.contar(f"cache.{nombre}.{'aciertos' if acierto else 'fallos'}")
+
+    def valor(self, nombre):
+        """Valor actual de un contador"""
+        return self._contadores.get(nombre, 0)
+
+    def contadores(self, prefijo=""):
+        """Contadores que empiezan con `prefijo`"""
+        with self._lock:
+            return {
+                nombre: valor
+                for nombre, valor in self._contadores.items()
+                if nombre.startswith(prefijo)
+            }
+
+    def _recientes(self, nombre):
+        """Copia de los tiempos guardados de una métrica"""
+        with self._lock:
+            tiempos = self._tiempos.get(nombre)
+            return list(tiempos) if tiempos else []
+
+    def por_minuto(self, *nombres, segundos=60):
+        """Eventos de las métricas indicadas en el último minuto"""
+        limite = time.time() - segundos
+        return sum(
+            1
+            for nombre in nombres
+            for momento, _ in self._recientes(nombre)
+            if momento >= limite
+        )
+
+    def percentiles(self, *nombres, percentiles=(50, 95, 99)):
+        """{percentil: ms} de los tiempos recientes de las métricas indicadas"""
+        ordenados = sorted(ms for nombre in nombres for _, ms in self._recientes(nombre))
+        if not ordenados:
+            return {}
+        return {
+            p: ordenados[min(len(ordenados) - 1, len(ordenados) * p // 100)]
+            for p in percentiles
+        }
+
+    def tiempos(self):
+        """(nombre, muestras, promedio_ms, máximo_ms) de cada métrica de tiempo"""
+        # Copia con el lock: otros hilos agregan métricas mientras tanto (y
+        # tiempo() agrega muestras sin lock; list(deque) las copia de una vez)
+        with self._lock:
+            recientes = sorted(
+                (nombre, list(tiempos)) for nombre, tiempos in self._tiempos.items()
+            )
+        filas = []
+        for nombre, muestras in recientes:
+            valores = [ms for _, ms in muestras]
+            if valores:
+                filas.append((nombre, len(valores), sum(valores) / len(valores), max(valores)))
+        return filas
+
+    def caches(self):
+        """(caché, aciertos, fallos, % de aciertos) de cada caché"""
+        nombres = {
+            nombre.split(".")[1] for nombre in self.contadores("cache.")
+        }
+        filas = []
+        for nombre in sorted(nombres):
+            aciertos = self.valor(f"cache.{nombre}.aciertos")
+            fallos = self.valor(f"cache.{nombre}.fallos")
+            filas.append((nombre, aciertos, fallos, 100 * aciertos / max(aciertos + fallos, 1)))
+        return filas
+
+
+def tamano_db(db_name):
+    """(bytes de la base de datos, bytes del archivo WAL)"""
+    tamanos = []
+    for ruta in (db_name, f"{db_name}-wal"):
+        try:
+            tamanos.append(os.path.getsize(ruta))
+        except OSError:
+            tamanos.append(0)
+    return tuple(tamanos)
+
+
+def memoria_bytes():
+    """Memoria residente del proceso, o None si no se puede obtener"""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ContadoresMemoria(ctypes.Structure):
+            """PROCESS_MEMORY_COUNTERS"""
+
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        contadores = ContadoresMemoria()
+        contadores.cb = ctypes.sizeof(contadores)
+        proceso = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(
+            proceso, ctypes.byref(contadores), contadores.cb
+        ):
+            return contadores.WorkingSetSize
+        return None
+
+    try:
+        with open("/proc/self/statm", encoding="ascii") as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        # Máximo alcanzado; en macOS viene en bytes y en Linux en KB
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maximo if sys.platform == "darwin" else maximo * 1024
+    except ImportError:
+        return None
+
+
+# Registro de la aplicación
+metricas = Metricas()
@@ -0,0 +1,189 @@
+"""Paginación por claves (keyset) de la lista de alumnos"""
+
+# Columna visible -> expresión SQL usada para ordenar (debe coincidir con los índices)
+ORDENES = {
+    "alumno_id": "al.alumno_id",
+    "codigo": "IFNULL(al.codigo, '')",
+    "nombres": "IFNULL(al.nombres, '')",
+    "apellido_paterno": "IFNULL(al.apellido_paterno, '')",
+    "apellido_materno": "IFNULL(al.apellido_materno, '')",
+    "fecha_ingreso": "IFNULL(al.fecha_ingreso, '')",
+    "grado": "IFNULL(al.detalle_grado_id, 0)",
+}
+
+# Letras que se buscan sin tilde ni diéresis ("nunez" encuentra "Núñez"). Van
+# en minúscula y mayúscula porque upper() de SQLite solo cambia letras ASCII.
+SIN_ACENTOS = {
+    "á": "A", "é": "E", "í": "I", "ó": "O", "ú": "U", "ü": "U", "ñ": "N",
+    "Á": "A", "É": "E", "Í": "I", "Ó": "O", "Ú": "U", "Ü": "U", "Ñ": "N",
+}
+_TABLA_SIN_ACENTOS = str.maketrans(SIN_ACENTOS)
+
+
+def normalizar(texto):
+    """Texto en mayúsculas y sin tildes, como lo compara la búsqueda"""
+    return texto.upper().translate(_TABLA_SIN_ACENTOS)
+
+
+def normalizar_sql(columna):
+    """Expresión SQL equivalente a normalizar() sobre una columna"""
+    expresion = f"upper(IFNULL({columna}, ''))"
+    for letra, base in SIN_ACENTOS.items():
+        expresion = f"replace({expresion}, '{letra}', '{base}')"
+    return expresion
+
+
+# Columnas en las que se busca el texto (en cualquier parte, sin distinguir
+# mayúsculas ni tildes, igual que el buscador de la tabla anterior)
+COLUMNAS_BUSQUEDA = [
+    normalizar_sql("al.codigo"),
+    normalizar_sql("al.nombres"),
+    normalizar_sql("al.apellido_paterno"),
+    normalizar_sql("al.apellido_materno"),
+]
+
+
+class PaginadorAlumnos:
+    """Trae una página de alumnos a la vez desde SQLite"""
+
+    def __init__(self, consultar, tamano_pagina=30):
+        self.consultar = consultar
+        self.tamano_pagina = tamano_pagina
+        self.busqueda = ""
+        self.orden = "alumno_id"
+        self.descendente = False
+        # Clave (valor de orden, alumno_id) después de la cual empieza cada página
+        self._claves = [None]
+        self._indice = 0
+        self._ultima_clave = None
+        self.hay_siguiente = False
+        # Se cuenta una vez por búsqueda, no en cada página
+        self._total = None
+
+    @property
+    def numero_pagina(self):
+        """Número de la página actual, empezando en 1"""
+        return self._indice + 1
+
+    @property
+    def hay_anterior(self):
+        """Indica si existe una página anterior"""
+        return self._indice > 0
+
+    def configurar(self, busqueda=None, orden=None, descendente=None):
+        """Cambiar búsqueda u orden y volver a la primera página"""
+        if busqueda is not None:
+            busqueda = normalizar(busqueda.strip())
+            if busqueda != self.busqueda:
+                self._total = None
+            self.busqueda = busqueda
+        if orden is not None:
+            self.orden = orden
+        if descendente is not None:
+            self.descendente = descendente
+        self._claves = [None]
+        self._indice = 0
+        return self.pagina_actual()
+
+    def alternar_orden(self, orden):
+        """Ordenar por otra columna, o invertir el orden si es la misma"""
+        if orden == self.orden:
+            return self.configurar(descendente=not self.descendente)
+        return self.configurar(orden=orden, descendente=False)
+
+    def pagina_actual(self, recontar=False):
+        """Volver a leer la página actual; recontar=True si pudieron cambiar
+        los alumnos (por ejemplo, después de eliminar o editar)"""
+        if recontar:
+            self._total = None
+        filas = self._leer(self._claves[self._indice])
+        if not filas and self._indice > 0:
+            return self.pagina_anterior()
+        return filas
+
+    def pagina_siguiente(self):
+        """Avanzar a la siguiente página"""
+        if not self.hay_siguiente:
+            return self.pagina_actual()
+
+        ultima = self._ultima_clave
+        del self._claves[self._indice + 1 :]
+        self._claves.append(ultima)
+        self._indice += 1
+        return self.pagina_actual()
+
+    def pagina_anterior(self):
+        """Retroceder a la página anterior"""
+        if self._indice > 0:
+            self._indice -= 1
+        return self.pagina_actual()
+
+    def total(self):
+        """Cantidad de alumnos que coinciden con la búsqueda"""
+        if self._total is None:
+            condiciones, parametros = self._filtro()
+            where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+            self._total = self.consultar(
+                f"SELECT COUNT(*) FROM alumnos al {where}", parametros
+            ).fetchone()[0]
+        return self._total
+
+    def _filtro(self):
+        """Solo alumnos activos y que contengan la búsqueda en el código, los
+        nombres o los apellidos"""
+        if not self.busqueda:
+            return ["al.estado = 'activo'"], []
+
+        condiciones = " OR ".join(
+            f"instr({columna}, ?) > 0" for columna in COLUMNAS_BUSQUEDA
+        )
+        return (
+            ["al.estado = 'activo'", f"({condiciones})"],
+            [self.busqueda] * len(COLUMNAS_BUSQUEDA),
+        )
+
+    def _leer(self, despues_de):
+        """Leer una página que empieza después de la clave indicada"""
+        expresion = ORDENES[self.orden]
+        direccion = "DESC" if self.descendente else "ASC"
+        comparador = "<" if self.descendente else ">"
+
+        condiciones, parametros = self._filtro()
+        if despues_de is not None:
+            # Forma expandida para que SQLite busque en el índice en vez de recorrerlo
+            condiciones.append(
+                f"{expresion} {comparador}= ? "
+                f"AND ({expresion} {comparador} ? OR al.alumno_id {comparador} ?)"
+            )
+            parametros.extend([despues_de[0], despues_de[0], despues_de[1]])
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        filas = self.consultar(
+            f"""
+            SELECT
+                al.alumno_id,
+                al.codigo,
+                al.nombres,
+                al.apellido_paterno,
+                al.apellido_materno,
+                al.fecha_ingreso,
+                g.grado,
+                dg.seccion,
+                {expresion}
+            FROM
+                alumnos al
+            LEFT JOIN detalle_grados dg ON
+                al.detalle_grado_id = dg.detalle_grado_id
+            LEFT JOIN grados g ON
+                dg.grado_id = g.grado_id
+            {where}
+            ORDER BY {expresion} {direccion}, al.alumno_id {direccion}
+            LIMIT ?
+            """,
+            [*parametros, self.tamano_pagina + 1],
+        ).fetchall()
+
+        self.hay_siguiente = len(filas) > self.tamano_pagina
+        filas = filas[: self.tamano_pagina]
+        self._ultima_clave = (filas[-1][8], filas[-1][0]) if filas else None
+        return [fila[:8] for fila in filas]
@@ -0,0 +1,364 @@
+"""Generación automática de los reportes diarios y mensuales de todas las secciones.
+
+Cada reporte generado guarda una huella de los datos que usó (asistencias,
+alumnos de la sección, horario y calendario). En cada ejecución solo se
+vuelven a escribir los reportes cuya huella cambió o cuyo archivo ya no existe.
+"""
+
+import os
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+
+from escuela.basedatos import guardar_configuracion, leer_configuracion
+from escuela.calendario import MESES_ES
+from escuela.exportacion import escribir_atomico
+from escuela.fechas import numero_dia
+from escuela.puntualidad import formatear_hora
+from escuela.reportes import reporte_diario, reporte_mensual, secciones_con_alumnos
+
+# Horas por defecto, en segundos desde medianoche (después de la salida)
+HORA_DIARIA_DEFECTO = 17 * 3600
+HORA_MENSUAL_DEFECTO = 18 * 3600
+
+# Días hacia atrás en los que se buscan asistencias corregidas
+DIAS_REVISION = 14
+
+# Claves de la tabla configuracion
+CLAVE_DIRECTORIO = "reportes_directorio"
+CLAVE_HORA_DIARIA = "reportes_hora_diaria"
+CLAVE_HORA_MENSUAL = "reportes_hora_mensual"
+CLAVE_FORMATO = "reportes_formato"
+CLAVE_ULTIMA = "reportes_ultima_ejecucion"
+
+
+def huellas_asistencias(consultar, desde, hasta, por_dia):
+    """Resumen de las asistencias de cada sección en el rango.
+
+    Devuelve {(número de día, grado_id, seccion): huella} si por_dia, o
+    {(grado_id, seccion): huella} para el rango completo.
+    """
+    dia = "an.fecha" if por_dia else "NULL"
+    filas = consultar(
+        f"""
+        SELECT
+            {dia},
+            dg.grado_id,
+            dg.seccion,
+            COUNT(*) || '-' || MAX(an.asistencia_id) || '-'
+                || SUM(an.asistencia_id) || '-' || COUNT(an.hora_salida)
+        FROM
+            asistencias an
+        INNER JOIN alumnos al ON
+            an.alumno_id = al.alumno_id
+        INNER JOIN detalle_grados dg ON
+            al.detalle_grado_id = dg.detalle_grado_id
+        WHERE
+            an.fecha BETWEEN ? AND ?
+        GROUP BY 1, 2, 3
+        """,
+        [numero_dia(desde), numero_dia(hasta)],
+    )
+    if por_dia:
+        return {(fecha, grado_id, seccion): huella for fecha, grado_id, seccion, huella in filas}
+    return {(grado_id, seccion): huella for _, grado_id, seccion, huella in filas}
+
+
+def huellas_secciones(consultar):
+    """Resumen de los alumnos y el horario de cada sección: {(grado_id, seccion): huella}"""
+    return {
+        (grado_id, seccion): huella
+        for grado_id, seccion, huella in consultar(
+            """
+            SELECT
+                dg.grado_id,
+                dg.seccion,
+                COUNT(*) || '-' || MAX(al.alumno_id) || '-'
+                    || TOTAL(length(al.nombres || al.apellido_paterno || al.apellido_materno))
+                    || '-' || IFNULL(h.hora_inicio, '') || '-' || IFNULL(h.tolerancia, '')
+            FROM
+                alumnos al
+            INNER JOIN detalle_grados dg ON
+                al.detalle_grado_id = dg.detalle_grado_id
+            LEFT JOIN horarios h ON
+                h.grado_id = dg.grado_id
+            WHERE al.estado = 'activo'
+            GROUP BY dg.grado_id, dg.seccion
+            """
+        )
+    }
+
+
+def huella_calendario(consultar, year):
+    """Resumen de los feriados y vacaciones que tocan el año"""
+    return consultar(
+        """
+        SELECT COUNT(*) || '-' || IFNULL(MAX(calendario_id), 0) || '-' || TOTAL(calendario_id)
+        FROM calendario
+        WHERE fecha_inicio <= ? AND fecha_fin >= ?
+        """,
+        [f"{year}-12-31", f"{year}-01-01"],
+    ).fetchone()[0]
+
+
+def reportes_generados(consultar, limite=200):
+    """(tipo, periodo, grado, seccion, generado, archivo) de los últimos reportes"""
+    return consultar(
+        """
+        SELECT rg.tipo, rg.periodo, g.grado, rg.seccion, rg.generado, rg.archivo
+        FROM reportes_generados rg
+        LEFT JOIN grados g ON
+            rg.grado_id = g.grado_id
+        ORDER BY rg.generado DESC, rg.periodo DESC
+        LIMIT ?
+        """,
+        [limite],
+    ).fetchall()
+
+
+class ProgramadorReportes:
+    """Genera los reportes diarios después de la salida y los mensuales al cerrar el mes"""
+
+    def __init__(
+        self,
+        consultar,
+        calendario,
+        directorio,
+        hora_diaria=HORA_DIARIA_DEFECTO,
+        hora_mensual=HORA_MENSUAL_DEFECTO,
+        formato="xlsx",
+        lector=None,
+    ):
+        self.consultar = consultar
+        self.calendario = calendario
+        self.directorio = directorio
+        self.hora_diaria = hora_diaria
+        self.hora_mensual = hora_mensual
+        self.formato = formato
+        # lector() abre la basedatos.Instantanea de la que se leen los reportes
+        self.lector = lector
+
+    @classmethod
+    def desde_configuracion(cls, consultar, calendario, lector=None):
+        """Programador con las preferencias guardadas, o None si no está configurado"""
+        directorio = leer_configuracion(consultar, CLAVE_DIRECTORIO)
+        if not directorio:
+            return None
+        return cls(
+            consultar,
+            calendario,
+            directorio,
+            int(leer_configuracion(consultar, CLAVE_HORA_DIARIA, HORA_DIARIA_DEFECTO)),
+            int(leer_configuracion(consultar, CLAVE_HORA_MENSUAL, HORA_MENSUAL_DEFECTO)),
+            leer_configuracion(consultar, CLAVE_FORMATO, "xlsx"),
+            lector,
+        )
+
+    def guardar_configuracion(self):
+        """Guardar el directorio, las horas y el formato como preferencias"""
+        guardar_configuracion(self.consultar, CLAVE_DIRECTORIO, self.directorio)
+        guardar_configuracion(self.consultar, CLAVE_HORA_DIARIA, self.hora_diaria)
+        guardar_configuracion(self.consultar, CLAVE_HORA_MENSUAL, self.hora_mensual)
+        guardar_configuracion(self.consultar, CLAVE_FORMATO, self.formato)
+
+    @property
+    def ultima_ejecucion(self):
+        """Fecha y hora de la última ejecución, o None"""
+        valor = leer_configuracion(self.consultar, CLAVE_ULTIMA)
+        return datetime.fromisoformat(valor) if valor else None
+
+    def cierre_mes(self, year, mes):
+        """Último día con clases del mes (o el último día del mes si no hay clases)"""
+        dias = self.calendario.dias_lectivos_mes(year, mes)
+        return dias[-1] if dias else date(year, mes, monthrange(year, mes)[1])
+
+    def pendiente(self, ahora=None):
+        """Indica si desde la última ejecución pasó una hora programada"""
+        if ahora is None:
+            ahora = datetime.now()
+        ultima = self.ultima_ejecucion or datetime.min
+
+        hoy = ahora.date()
+        programadas = [self._momento(hoy, self.hora_diaria)]
+        cierre = self.cierre_mes(hoy.year, hoy.month)
+        if cierre == hoy:
+            programadas.append(self._momento(hoy, self.hora_mensual))
+        return any(ultima < momento <= ahora for momento in programadas)
+
+    def ejecutar(self, ahora=None):
+        """Generar los reportes que faltan o cuyos datos cambiaron.
+
+        Las huellas y los reportes se leen de una misma instantánea (si hay
+        lector), así que cada archivo corresponde exactamente a su huella.
+        Devuelve la lista de archivos escritos.
+        """
+        if ahora is None:
+            ahora = datetime.now()
+        if self.lector is None:
+            return self._ejecutar(self.consultar, ahora)
+        with self.lector() as leer:
+            return self._ejecutar(leer, ahora)
+
+    def _ejecutar(self, leer, ahora):
+        """ejecutar() leyendo los datos de los reportes con `leer`"""
+        hoy = ahora.date()
+        secciones = secciones_con_alumnos(leer)
+        alumnos = huellas_secciones(leer)
+
+        # Reportes diarios: días con clases recientes cuya hora ya pasó
+        hasta = hoy
+        if ahora < self._momento(hoy, self.hora_diaria):
+            hasta = hoy - timedelta(days=1)
+        desde = hoy - timedelta(days=DIAS_REVISION)
+        dias = [
+            dia
+            for year in range(desde.year, hasta.year + 1)
+            for dia in self.calendario.dias_lectivos(year)
+            if desde <= dia <= hasta
+        ]
+        archivos = []
+        if dias:
+            asistencias = huellas_asistencias(leer, dias[0], dias[-1], True)
+            for dia in dias:
+                archivos.extend(
+                    self.generar_diarios(
+                        leer,
+                        dia,
+                        secciones,
+                        {
+                            (grado_id, seccion): asistencias.get(
+                                (numero_dia(dia), grado_id, seccion), "0"
+                            )
+                            + "|"
+                            + alumnos.get((grado_id, seccion), "")
+                            for grado_id, _, seccion in secciones
+                        },
+                    )
+                )
+
+        # Reportes mensuales: el mes anterior y el actual, si ya cerraron
+        anterior = date(hoy.year, hoy.month, 1) - timedelta(days=1)
+        for year, mes in ((anterior.year, anterior.month), (hoy.year, hoy.month)):
+            cierre = self.cierre_mes(year, mes)
+            if cierre > hoy or (
+                cierre == hoy and ahora < self._momento(hoy, self.hora_mensual)
+            ):
+                continue
+            if not self.calendario.dias_lectivos_mes(year, mes):
+                continue
+
+            asistencias = huellas_asistencias(
+                leer,
+                date(year, mes, 1),
+                date(year, mes, monthrange(year, mes)[1]),
+                False,
+            )
+            calendario = huella_calendario(leer, year)
+            archivos.extend(
+                self.generar_mensuales(
+                    leer,
+                    year,
+                    mes,
+                    secciones,
+                    {
+                        (grado_id, seccion): asistencias.get((grado_id, seccion), "0")
+                        + "|"
+                        + alumnos.get((grado_id, seccion), "")
+                        + "|"
+                        + calendario
+                        for grado_id, _, seccion in secciones
+                    },
+                )
+            )
+
+        guardar_configuracion(self.consultar, CLAVE_ULTIMA, ahora.isoformat(" ", "seconds"))
+        return archivos
+
+    def generar_diarios(self, leer, fecha, secciones, huellas):
+        """Reportes de un día de las secciones cuya huella cambió"""
+        carpeta = os.path.join(
+            self.directorio, str(fecha.year), f"{fecha.month:02d}", "diarios"
+        )
+        return self._generar(
+            "diario",
+            fecha.isoformat(),
+            secciones,
+            huellas,
+            carpeta,
+            lambda grado_id, grado, seccion: reporte_diario(
+                leer, grado_id, grado, seccion, fecha
+            ),
+        )
+
+    def generar_mensuales(self, leer, year, mes, secciones, huellas):
+        """Reportes de un mes de las secciones cuya huella cambió"""
+        carpeta = os.path.join(self.directorio, str(year), f"{mes:02d}")
+        return self._generar(
+            "mensual",
+            f"{year}-{mes:02d}",
+            secciones,
+            huellas,
+            carpeta,
+            lambda grado_id, grado, seccion: reporte_mensual(
+                leer, self.calendario, grado_id, grado, seccion, year, [mes]
+            )._replace(nombre=f"{grado} {seccion} {MESES_ES[mes - 1]} {year}"),
+        )
+
+    def _generar(self, tipo, periodo, secciones, huellas, carpeta, crear_reporte):
+        """Escribir los reportes de un periodo que faltan o cambiaron"""
+        anteriores = {
+            (grado_id, seccion): (huella, archivo)
+            for grado_id, seccion, huella, archivo in self.consultar(
+                """
+                SELECT grado_id, seccion, huella, archivo
+                FROM reportes_generados
+                WHERE tipo = ? AND periodo = ?
+                """,
+                [tipo, periodo],
+            )
+        }
+
+        archivos = []
+        for grado_id, grado, seccion in secciones:
+            huella = huellas[(grado_id, seccion)]
+            anterior = anteriores.get((grado_id, seccion))
+            if anterior is not None and anterior[0] == huella and os.path.exists(anterior[1]):
+                continue
+
+            reporte = crear_reporte(grado_id, grado, seccion)
+            os.makedirs(carpeta, exist_ok=True)
+            file_path = os.path.join(carpeta, f"{reporte.nombre}.{self.formato}")
+            escribir_atomico(file_path, reporte, self.formato)
+            self.consultar(
+                """
+                INSERT INTO reportes_generados(tipo, periodo, grado_id, seccion, huella, archivo, generado)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(tipo, periodo, grado_id, seccion) DO UPDATE SET
+                    huella = excluded.huella,
+                    archivo = excluded.archivo,
+                    generado = excluded.generado
+                """,
+                [
+                    tipo,
+                    periodo,
+                    grado_id,
+                    seccion,
+                    huella,
+                    file_path,
+                    datetime.now().isoformat(" ", "seconds"),
+                ],
+            )
+            archivos.append(file_path)
+        return archivos
+
+    @staticmethod
+    def _momento(dia, segundos):
+        """Fecha y hora a partir de un día y segundos desde medianoche"""
+        return datetime.combine(dia, datetime.min.time()) + timedelta(seconds=segundos)
+
+    def describir(self):
+        """Texto corto con la programación actual"""
+        return (
+            f"Diarios a las {formatear_hora(self.hora_diaria)}, "
+            f"mensuales a las {formatear_hora(self.hora_mensual)} del último día de clases"
+        )
+
@@ -0,0 +1,174 @@
+"""Promoción de fin de año: todos los alumnos pasan al grado siguiente a la vez"""
+
+import json
+import time
+from collections import namedtuple
+from datetime import date
+
+from escuela.basedatos import guardar_configuracion, leer_configuracion
+from escuela.metricas import metricas
+
+# Año de la última promoción aplicada (tabla configuracion)
+CLAVE_ULTIMA = "promocion.ultima"
+
+# Una fila de la vista previa:
+# - origen / destino: (grado, seccion); destino None si los alumnos egresan
+# - alumnos: alumnos activos que se mueven
+Cambio = namedtuple("Cambio", ["origen", "destino", "alumnos"])
+
+
+# Origen de los alumnos activos sin un grado y sección válidos
+SIN_GRADO = ("Sin grado", "")
+
+
+class PromocionInvalida(Exception):
+    """Hay secciones con alumnos que no tienen a dónde pasar"""
+
+
+def mapa_promocion(consultar):
+    """Sección de destino de cada sección: la misma letra en el grado siguiente.
+
+    Devuelve (mapa, sin_destino): mapa es {detalle_grado_id: detalle_grado_id
+    o None si egresan (último grado)}; sin_destino son los detalle_grado_id
+    cuyo grado siguiente no tiene esa sección.
+    """
+    grados = [fila[0] for fila in consultar("SELECT grado_id FROM grados ORDER BY grado_id")]
+    siguiente = dict(zip(grados, grados[1:]))
+
+    detalles = {}
+    for detalle_grado_id, grado_id, seccion in consultar(
+        "SELECT detalle_grado_id, grado_id, seccion FROM detalle_grados"
+    ):
+        detalles[(grado_id, seccion)] = detalle_grado_id
+
+    mapa = {}
+    sin_destino = []
+    for (grado_id, seccion), detalle_grado_id in detalles.items():
+        if grado_id not in siguiente:
+            mapa[detalle_grado_id] = None
+            continue
+        destino = detalles.get((siguiente[grado_id], seccion))
+        if destino is None:
+            sin_destino.append(detalle_grado_id)
+        else:
+            mapa[detalle_grado_id] = destino
+    return mapa, sin_destino
+
+
+def vista_previa(consultar, mapa, sin_destino=()):
+    """Lo que haría promover: (cambios, bloqueados).
+
+    cambios: Cambio por cada sección con alumnos activos que tiene destino.
+    bloqueados: Cambio (destino None) de las secciones sin destino que sí
+    tienen alumnos activos, y de los alumnos activos sin un grado y sección
+    válidos (origen SIN_GRADO); mientras haya alguno no se puede promover.
+    """
+    filas = consultar(
+        """
+        SELECT g.grado_id, dg.detalle_grado_id, g.grado, dg.seccion, COUNT(*)
+        FROM alumnos al
+        LEFT JOIN detalle_grados dg ON
+            dg.detalle_grado_id = al.detalle_grado_id
+        LEFT JOIN grados g ON
+            g.grado_id = dg.grado_id
+        WHERE al.estado = 'activo'
+        GROUP BY g.grado_id IS NULL, dg.detalle_grado_id
+        ORDER BY g.grado_id IS NULL, g.grado_id, dg.seccion
+        """
+    ).fetchall()
+    # Alumnos sin sección o con una sección (o grado) que ya no existe
+    sin_grado = sum(fila[4] for fila in filas if fila[0] is None)
+    filas = [fila[1:] for fila in filas if fila[0] is not None]
+    nombres = {detalle_grado_id: (grado, seccion) for detalle_grado_id, grado, seccion, _ in filas}
+    if mapa:
+        # Nombres de los destinos que aún no tienen alumnos
+        faltan = {destino for destino in mapa.values() if destino not in nombres} - {None}
+        if faltan:
+            marcas = ", ".join("?" * len(faltan))
+            for detalle_grado_id, grado, seccion in consultar(
+                f"""
+                SELECT dg.detalle_grado_id, g.grado, dg.seccion
+                FROM detalle_grados dg
+                INNER JOIN grados g ON g.grado_id = dg.grado_id
+                WHERE dg.detalle_grado_id IN ({marcas})
+                """,
+                list(faltan),
+            ):
+                nombres[detalle_grado_id] = (grado, seccion)
+
+    sin_destino = set(sin_destino)
+    cambios = []
+    bloqueados = [Cambio(SIN_GRADO, None, sin_grado)] if sin_grado else []
+    for detalle_grado_id, grado, seccion, alumnos in filas:
+        if detalle_grado_id in sin_destino:
+            bloqueados.append(Cambio((grado, seccion), None, alumnos))
+        elif detalle_grado_id in mapa:
+            destino = mapa[detalle_grado_id]
+            cambios.append(
+                Cambio((grado, seccion), None if destino is None else nombres[destino], alumnos)
+            )
+    return cambios, bloqueados
+
+
+def ultima_promocion(consultar):
+    """Año escolar de la última promoción aplicada, o None"""
+    valor = leer_configuracion(consultar, CLAVE_ULTIMA)
+    return None if valor is None else int(valor)
+
+
+def promover(consultar, mapa, sin_destino=(), year=None, forzar=False):
+    """Mover a todos los alumnos activos según el mapa en un solo UPDATE.
+
+    `consultar` debe ser el de una basedatos.transaccion: la revisión del
+    año, el UPDATE y el registro de la promoción se aplican juntos, y dos
+    promociones a la vez no pueden pasar ambas la revisión. Los del último
+    grado (destino None) quedan como egresados y conservan su sección.
+    PromocionInvalida si algún alumno activo no tiene destino o si ya se
+    promovió ese año (salvo `forzar`).
+    Devuelve (promovidos, egresados).
+    """
+    if year is None:
+        year = date.today().year
+
+    if not forzar and ultima_promocion(consultar) == year:
+        raise PromocionInvalida(f"Ya se aplicó la promoción del año {year}")
+
+    _, bloqueados = vista_previa(consultar, {}, sin_destino)
+    if bloqueados:
+        secciones = ", ".join(
+            f"{grado} {seccion}".strip() for (grado, seccion), _, _ in bloqueados
+        )
+        raise PromocionInvalida(f"No hay sección de destino para: {secciones}")
+
+    egresan = sorted(origen for origen, destino in mapa.items() if destino is None)
+    marcas = ", ".join("?" * len(egresan)) or "NULL"
+    egresados = consultar(
+        f"""
+        SELECT COUNT(*) FROM alumnos
+        WHERE estado = 'activo' AND detalle_grado_id IN ({marcas})
+        """,
+        egresan,
+    ).fetchone()[0]
+
+    inicio = time.perf_counter()
+    cursor = consultar(
+        """
+        UPDATE alumnos SET
+            estado = CASE
+                WHEN json_extract(:mapa, '$."' || detalle_grado_id || '"') IS NULL
+                    THEN 'egresado'
+                ELSE estado
+            END,
+            detalle_grado_id = IFNULL(
+                json_extract(:mapa, '$."' || detalle_grado_id || '"'), detalle_grado_id
+            )
+        WHERE
+            estado = 'activo'
+            AND detalle_grado_id IN (SELECT CAST(key AS INTEGER) FROM json_each(:mapa))
+        """,
+        {"mapa": json.dumps(mapa)},
+    )
+    metricas.tiempo("promocion", (time.perf_counter() - inicio) * 1000)
+
+    guardar_configuracion(consultar, CLAVE_ULTIMA, year)
+    return cursor.rowcount - egresados, egresados
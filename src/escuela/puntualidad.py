@@ -0,0 +1,162 @@
+"""Puntualidad: tardanzas y permanencia calculadas en SQL"""
+
+from escuela.fechas import fecha_sql, numero_dia
+
+# Hora de ingreso si el grado no tiene un horario configurado (08:00:00)
+HORA_INICIO_DEFECTO = 8 * 3600
+TOLERANCIA_DEFECTO = 0
+
+# Agrupación -> (cabeceras, columnas del SELECT y GROUP BY)
+AGRUPACIONES = {
+    "alumno": (
+        ["Código", "Alumno", "Grado", "Sección"],
+        [
+            "al.codigo",
+            "TRIM(al.nombres) || ' ' || al.apellido_paterno || ' ' || al.apellido_materno",
+            "g.grado",
+            "dg.seccion",
+        ],
+    ),
+    "seccion": (["Grado", "Sección"], ["g.grado", "dg.seccion"]),
+    "mes": (["Mes"], [f"substr({fecha_sql('an.fecha')}, 1, 7)"]),
+}
+
+CABECERAS_METRICAS = [
+    "Asistencias",
+    "Tardanzas",
+    "% Tardanzas",
+    "Tardanza promedio",
+    "Permanencia promedio",
+]
+
+
+def formatear_duracion(segundos):
+    """Segundos -> 'H:MM:SS' (vacío si no hay dato)"""
+    if segundos is None:
+        return ""
+    segundos = int(round(segundos))
+    return f"{segundos // 3600}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+
+def formatear_hora(segundos):
+    """Segundos desde medianoche -> 'HH:MM'"""
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}"
+
+
+def leer_hora(texto):
+    """'HH:MM' o 'HH:MM:SS' -> segundos desde medianoche"""
+    partes = [int(parte) for parte in texto.strip().split(":")]
+    if len(partes) not in (2, 3) or not 0 <= partes[0] < 24 or not 0 <= partes[1] < 60:
+        raise ValueError(f"Hora inválida: {texto}")
+    return partes[0] * 3600 + partes[1] * 60 + (partes[2] if len(partes) == 3 else 0)
+
+
+def tardanza_sql(entrada):
+    """Expresión SQL de la tardanza en segundos de una hora de entrada.
+
+    Es la única definición que usan los reportes: se llega tarde si se pasa
+    la tolerancia, y entonces la tardanza se cuenta desde la hora de ingreso
+    (con 10 minutos de tolerancia, llegar 8:15 a un ingreso de 8:00 son 15
+    minutos; llegar 8:05 es 0). Necesita la tabla horarios unida como `h`.
+    """
+    inicio = f"IFNULL(h.hora_inicio, {HORA_INICIO_DEFECTO})"
+    tolerancia = f"IFNULL(h.tolerancia, {TOLERANCIA_DEFECTO})"
+    return (
+        f"CASE WHEN {entrada} > {inicio} + {tolerancia} "
+        f"THEN {entrada} - {inicio} ELSE 0 END"
+    )
+
+
+def horarios(consultar):
+    """Horario de ingreso configurado por grado: grado_id -> (inicio, tolerancia)"""
+    return {
+        grado_id: (hora_inicio, tolerancia)
+        for grado_id, hora_inicio, tolerancia in consultar(
+            "SELECT grado_id, hora_inicio, tolerancia FROM horarios"
+        )
+    }
+
+
+def guardar_horario(consultar, grado_id, hora_inicio, tolerancia=0):
+    """Configurar la hora de ingreso y la tolerancia (en segundos) de un grado"""
+    return consultar(
+        """
+        INSERT INTO horarios(grado_id, hora_inicio, tolerancia) VALUES (?, ?, ?)
+        ON CONFLICT(grado_id) DO UPDATE SET
+            hora_inicio = excluded.hora_inicio,
+            tolerancia = excluded.tolerancia
+        """,
+        [grado_id, hora_inicio, tolerancia],
+    )
+
+
+def resumen_puntualidad(
+    consultar, desde, hasta, agrupar="alumno", grado_id=None, seccion=None
+):
+    """Tardanzas, tardanza promedio y permanencia promedio por alumno, sección o mes.
+
+    Todo se agrega en SQL; devuelve (cabeceras, filas) listas para mostrar.
+    """
+    cabeceras, columnas = AGRUPACIONES[agrupar]
+
+    condiciones = ["an.fecha BETWEEN ? AND ?"]
+    parametros = [numero_dia(desde), numero_dia(hasta)]
+    if grado_id is not None:
+        condiciones.append("dg.grado_id = ?")
+        parametros.append(grado_id)
+    if seccion is not None:
+        condiciones.append("dg.seccion = ?")
+        parametros.append(seccion)
+
+    seleccion = ", ".join(f"{columna} AS c{i}" for i, columna in enumerate(columnas))
+    grupos = ", ".join(f"c{i}" for i in range(len(columnas)))
+
+    filas = consultar(
+        f"""
+        WITH marcas AS (
+            SELECT
+                {seleccion},
+                an.hora_entrada AS entrada,
+                an.hora_salida AS salida,
+                {tardanza_sql("an.hora_entrada")} AS tardanza
+            FROM
+                asistencias an
+            INNER JOIN alumnos al ON
+                an.alumno_id = al.alumno_id
+            INNER JOIN detalle_grados dg ON
+                al.detalle_grado_id = dg.detalle_grado_id
+            INNER JOIN grados g ON
+                dg.grado_id = g.grado_id
+            LEFT JOIN horarios h ON
+                h.grado_id = dg.grado_id
+            WHERE
+                {" AND ".join(condiciones)}
+        )
+        SELECT
+            {grupos},
+            COUNT(*),
+            SUM(tardanza > 0),
+            AVG(NULLIF(tardanza, 0)),
+            AVG(CASE WHEN salida IS NOT NULL THEN salida - entrada END)
+        FROM marcas
+        GROUP BY {grupos}
+        ORDER BY {grupos}
+        """,
+        parametros,
+    ).fetchall()
+
+    n = len(columnas)
+    resultado = []
+    for fila in filas:
+        asistencias, tardanzas, tardanza, permanencia = fila[n:]
+        resultado.append(
+            (
+                *fila[:n],
+                asistencias,
+                tardanzas,
+                f"{tardanzas / asistencias * 100:.1f}%",
+                formatear_duracion(tardanza),
+                formatear_duracion(permanencia),
+            )
+        )
+    return cabeceras + CABECERAS_METRICAS, resultado
@@ -0,0 +1,490 @@
+"""Cálculo de reportes de asistencia"""
+
+from datetime import date
+
+from escuela.alertas import MotorInasistencias
+from escuela.calendario import DIAS_ES, MESES_ES
+from escuela.exportacion import Bloque, Reporte
+from escuela.fechas import fecha_dia, fecha_sql, hora_12, hora_sql, numero_dia
+from escuela.metricas import metricas
+from escuela.puntualidad import (
+    formatear_duracion,
+    guardar_horario,
+    horarios,
+    resumen_puntualidad,
+    tardanza_sql,
+)
+
+CABECERAS_ALUMNO = ["Año", "Mes", "Día", "Entrada", "Salida"]
+
+CABECERAS_DIA = [
+    "Código",
+    "Nombre",
+    "Hora de entrada",
+    "Hora de salida",
+    "Tardanza",
+    "Fecha",
+]
+
+
+def alumnos_seccion(consultar, grado_id, seccion):
+    """Alumnos de un grado y sección"""
+    return consultar(
+        """
+        SELECT
+            al.alumno_id,
+            al.nombres,
+            al.apellido_paterno,
+            al.apellido_materno
+        FROM
+            alumnos al
+        INNER JOIN detalle_grados dg ON
+            al.detalle_grado_id = dg.detalle_grado_id
+        WHERE
+            dg.grado_id = ?
+            AND dg.seccion = ?
+            AND al.estado = 'activo';
+        """,
+        [grado_id, seccion],
+    ).fetchall()
+
+
+def secciones_con_alumnos(consultar, grado_id=None):
+    """(grado_id, grado, seccion) de todas las secciones que tienen alumnos activos"""
+    filtro = "AND g.grado_id = ?" if grado_id is not None else ""
+    return consultar(
+        f"""
+        SELECT DISTINCT
+            g.grado_id,
+            g.grado,
+            dg.seccion
+        FROM
+            detalle_grados dg
+        INNER JOIN grados g ON
+            dg.grado_id = g.grado_id
+        INNER JOIN alumnos al ON
+            al.detalle_grado_id = dg.detalle_grado_id
+        WHERE al.estado = 'activo' {filtro}
+        ORDER BY g.grado_id, dg.seccion
+        """,
+        [grado_id] if grado_id is not None else [],
+    ).fetchall()
+
+
+def asistencias_seccion(consultar, grado_id, seccion, desde, hasta):
+    """Pares (alumno_id, número de día) de las asistencias de una sección en un rango"""
+    filas = consultar(
+        """
+        SELECT
+            an.alumno_id,
+            an.fecha
+        FROM
+            asistencias an
+        INNER JOIN alumnos al ON
+            an.alumno_id = al.alumno_id
+        INNER JOIN detalle_grados dg ON
+            al.detalle_grado_id = dg.detalle_grado_id
+        WHERE
+            dg.grado_id = ?
+            AND dg.seccion = ?
+            AND an.fecha BETWEEN ? AND ?;
+        """,
+        [grado_id, seccion, numero_dia(desde), numero_dia(hasta)],
+    ).fetchall()
+    return set(filas)
+
+
+def meses_asistencia(consultar, calendario, grado_id, seccion, year, meses=None, hoy=None):
+    """Tablas mensuales de asistencia de una sección: una por mes con clases.
+
+    Genera (mes_nombre, cabeceras, filas), donde filas es a su vez un
+    generador. Los días que aún no pasaron se dejan en blanco y no cuentan
+    como inasistencias.
+    """
+    if hoy is None:
+        hoy = date.today()
+
+    alumnos = alumnos_seccion(consultar, grado_id, seccion)
+    asistencias = asistencias_seccion(
+        consultar, grado_id, seccion, date(year, 1, 1), date(year, 12, 31)
+    )
+
+    for mes_num, mes_nombre in enumerate(MESES_ES, start=1):
+        if meses is not None and mes_num not in meses:
+            continue
+
+        dias = calendario.dias_lectivos_mes(year, mes_num)
+        if not dias:
+            continue
+
+        cabeceras = ["N°", "Nombres y apellidos"]
+        cabeceras.extend(f"{DIAS_ES[dia.weekday()]}-{dia.day}" for dia in dias)
+        cabeceras.extend(["Asistencias", "% Asistencia", "Inasistencias"])
+
+        yield mes_nombre, cabeceras, _filas_mes(alumnos, asistencias, dias, hoy)
+
+
+def _filas_mes(alumnos, asistencias, dias, hoy):
+    """Fila de cada alumno con sus letras de asistencia del mes"""
+    numeros = [numero_dia(dia) for dia in dias]
+    dias_pasados = sum(1 for dia in dias if dia <= hoy)
+
+    for numero, alumno in enumerate(alumnos, start=1):
+        letras = []
+        cantidad = 0
+        for dia, numero_del_dia in zip(dias, numeros):
+            if (alumno[0], numero_del_dia) in asistencias:
+                letras.append("A")
+                cantidad += 1
+            elif dia <= hoy:
+                letras.append("I")
+            else:
+                letras.append("")
+
+        if dias_pasados:
+            porcentaje = f"{cantidad / dias_pasados * 100:.1f}%"
+        else:
+            porcentaje = "-"
+
+        yield (
+            numero,
+            f"{alumno[1]} {alumno[2]} {alumno[3]}",
+            *letras,
+            cantidad,
+            porcentaje,
+            dias_pasados - cantidad,
+        )
+
+
+def matriz_mensual(consultar, calendario, grado_id, seccion, year, hoy=None):
+    """Lista de (mes_nombre, cabeceras, filas) con las filas ya calculadas"""
+    return [
+        (mes_nombre, cabeceras, list(filas))
+        for mes_nombre, cabeceras, filas in meses_asistencia(
+            consultar, calendario, grado_id, seccion, year, hoy=hoy
+        )
+    ]
+
+
+def reporte_mensual(consultar, calendario, grado_id, grado, seccion, year, meses=None):
+    """Reporte mensual de una sección listo para exportar"""
+    return Reporte(
+        f"{grado} {seccion} {year}",
+        [("SECCIÓN:", seccion), ("GRADO:", grado)],
+        (
+            Bloque(("MES:", mes_nombre), cabeceras, filas, separar=True)
+            for mes_nombre, cabeceras, filas in meses_asistencia(
+                consultar, calendario, grado_id, seccion, year, meses
+            )
+        ),
+        combinar=False,
+    )
+
+
+def asistencias_dia(consultar, grado_id, seccion, fecha):
+    """Entradas y salidas de una sección en un día"""
+    asistencias = consultar(
+        f"""
+        SELECT
+            an.hora_entrada,
+            an.hora_salida,
+            al.codigo,
+            al.nombres,
+            al.apellido_paterno,
+            al.apellido_materno,
+            {tardanza_sql("an.hora_entrada")} AS tardanza
+        FROM
+            asistencias an
+        INNER JOIN alumnos al ON
+            an.alumno_id = al.alumno_id
+        INNER JOIN detalle_grados dg ON
+            al.detalle_grado_id = dg.detalle_grado_id
+        LEFT JOIN horarios h ON
+            h.grado_id = dg.grado_id
+        WHERE
+            dg.grado_id = ?
+            AND dg.seccion = ?
+            AND an.fecha = ?;
+        """,
+        [grado_id, seccion, numero_dia(fecha)],
+    )
+
+    fecha_texto = fecha.strftime("%d-%m-%Y")
+    for asistencia in asistencias:
+        yield (
+            asistencia[2],
+            f"{asistencia[3]} {asistencia[4]} {asistencia[5]}",
+            hora_12(asistencia[0]),
+            hora_12(asistencia[1]),
+            formatear_duracion(asistencia[6]) if asistencia[6] else "",
+            fecha_texto,
+        )
+
+
+def reporte_diario(consultar, grado_id, grado, seccion, fecha):
+    """Reporte de un día de una sección listo para exportar"""
+    fecha_texto = fecha.strftime("%d-%m-%Y")
+    return Reporte(
+        f"{grado} {seccion} {fecha_texto}",
+        [("FECHA:", fecha_texto), ("GRADO:", grado), ("SECCIÓN:", seccion)],
+        [Bloque(None, CABECERAS_DIA, asistencias_dia(consultar, grado_id, seccion, fecha))],
+    )
+
+
+def asistencias_alumno(consultar, alumno_id):
+    """Entradas y salidas de un alumno"""
+    asistencias = consultar(
+        "SELECT hora_entrada, hora_salida, fecha FROM asistencias WHERE alumno_id = ?",
+        [alumno_id],
+    )
+
+    for entrada, salida, dia in asistencias:
+        fecha = fecha_dia(dia)
+        yield (
+            fecha.year,
+            MESES_ES[fecha.month - 1],
+            fecha.day,
+            hora_12(entrada, con_segundos=True),
+            hora_12(salida, con_segundos=True),
+        )
+
+
+def reporte_alumno(consultar, alumno):
+    """Reporte de un alumno (fila del índice de nombres) listo para exportar"""
+    nombre = f"{alumno[2]} {alumno[3]} {alumno[4]}"
+    return Reporte(
+        nombre,
+        [("ALUMNO:", nombre), ("GRADO:", alumno[5]), ("SECCIÓN:", alumno[6])],
+        [Bloque(None, CABECERAS_ALUMNO, asistencias_alumno(consultar, alumno[0]))],
+    )
+
+
+def reporte_puntualidad(
+    consultar, desde, hasta, agrupar="alumno", grado_id=None, seccion=None, grado=None
+):
+    """Resumen de puntualidad listo para exportar"""
+    periodo = f"{desde.strftime('%d-%m-%Y')} al {hasta.strftime('%d-%m-%Y')}"
+    cabeceras, filas = resumen_puntualidad(
+        consultar, desde, hasta, agrupar, grado_id, seccion
+    )
+    return Reporte(
+        f"Puntualidad {desde.isoformat()} {hasta.isoformat()}",
+        [
+            ("PERIODO:", periodo),
+            ("GRADO:", grado or "Todos"),
+            ("SECCIÓN:", seccion or "Todas"),
+        ],
+        [Bloque(None, cabeceras, filas)],
+    )
+
+
+def _filas_consulta(consultar, query, parameters=()):
+    """Filas de una consulta que se ejecuta recién al empezar a leerlas (así
+    la conexión se abre en el mismo hilo que escribe el archivo)"""
+    yield from consultar(query, parameters)
+
+
+def reporte_asistencias(consultar, desde, hasta):
+    """Registros de asistencia sin procesar (fecha y horas como texto)"""
+    filas = _filas_consulta(
+        consultar,
+        f"""
+        SELECT
+            an.asistencia_id,
+            an.alumno_id,
+            al.codigo,
+            {fecha_sql("an.fecha")},
+            {hora_sql("an.hora_entrada")},
+            {hora_sql("an.hora_salida")}
+        FROM
+            asistencias an
+        LEFT JOIN alumnos al ON
+            an.alumno_id = al.alumno_id
+        WHERE
+            an.fecha BETWEEN ? AND ?
+        ORDER BY an.fecha, an.asistencia_id
+        """,
+        [numero_dia(desde), numero_dia(hasta)],
+    )
+    return Reporte(
+        f"Asistencias {desde.isoformat()} {hasta.isoformat()}",
+        [("DESDE:", desde.isoformat()), ("HASTA:", hasta.isoformat())],
+        [
+            Bloque(
+                None,
+                ["ID", "Alumno ID", "Código", "Fecha", "Hora de entrada", "Hora de salida"],
+                filas,
+            )
+        ],
+    )
+
+
+def reporte_padron(consultar):
+    """Todos los alumnos (también los egresados) con su grado, sección y estado"""
+    filas = _filas_consulta(
+        consultar,
+        """
+        SELECT
+            al.alumno_id,
+            al.codigo,
+            al.nombres,
+            al.apellido_paterno,
+            al.apellido_materno,
+            al.fecha_ingreso,
+            g.grado,
+            dg.seccion,
+            al.estado
+        FROM
+            alumnos al
+        LEFT JOIN detalle_grados dg ON
+            al.detalle_grado_id = dg.detalle_grado_id
+        LEFT JOIN grados g ON
+            dg.grado_id = g.grado_id
+        ORDER BY al.alumno_id ASC
+        """
+    )
+    return Reporte(
+        "Alumnos",
+        [("REPORTE:", "Alumnos")],
+        [
+            Bloque(
+                None,
+                [
+                    "ID",
+                    "Código",
+                    "Nombres",
+                    "Apellido paterno",
+                    "Apellido materno",
+                    "Fecha de ingreso",
+                    "Grado",
+                    "Sección",
+                    "Estado",
+                ],
+                filas,
+            )
+        ],
+    )
+
+
+class ServicioReportes:
+    """Reportes de la interfaz con la conexión, el calendario y los grados ya
+    resueltos; registra en las métricas cuánto tarda cada uno"""
+
+    def __init__(self, consultar, calendario, grados, lector=None):
+        self.consultar = consultar
+        self.calendario = calendario
+        self.grados = grados
+        # lector() abre una basedatos.Instantanea; lectura es la de este servicio
+        self.lector = lector
+        self.lectura = None
+        # Se crea al pedir alertas por primera vez
+        self.motor_inasistencias = None
+
+    def instantanea(self):
+        """Servicio que lee de una Instantanea propia (datos consistentes y sin
+        bloquear las marcaciones); se cierra con cerrar() o con with.
+
+        Sin lector, lee de la misma conexión que este.
+        """
+        reportes = ServicioReportes(self.consultar, self.calendario, self.grados)
+        if self.lector is not None:
+            reportes.consultar = reportes.lectura = self.lector()
+        return reportes
+
+    def cerrar(self):
+        """Cerrar la instantánea del servicio, si tiene una"""
+        if self.lectura is not None:
+            self.lectura.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def secciones(self, grado_id=None):
+        """(grado_id, grado, seccion) de las secciones con alumnos"""
+        return secciones_con_alumnos(self.consultar, grado_id)
+
+    def mensual(self, grado_id, seccion, year):
+        """Tablas mensuales de la sección ya calculadas"""
+        with metricas.cronometro("reporte.mensual"):
+            return matriz_mensual(self.consultar, self.calendario, grado_id, seccion, year)
+
+    def exportar_mensual(self, grado_id, seccion, year):
+        """Reporte mensual de la sección listo para exportar"""
+        return reporte_mensual(
+            self.consultar,
+            self.calendario,
+            grado_id,
+            self.grados.nombre(grado_id),
+            seccion,
+            year,
+        )
+
+    def diario(self, grado_id, seccion, fecha):
+        """Asistencias de la sección en la fecha"""
+        with metricas.cronometro("reporte.diario"):
+            return list(asistencias_dia(self.consultar, grado_id, seccion, fecha))
+
+    def exportar_diario(self, grado_id, seccion, fecha):
+        """Reporte diario de la sección listo para exportar"""
+        return reporte_diario(
+            self.consultar, grado_id, self.grados.nombre(grado_id), seccion, fecha
+        )
+
+    def alumno(self, alumno_id):
+        """Entradas y salidas de un alumno"""
+        with metricas.cronometro("reporte.alumno"):
+            return list(asistencias_alumno(self.consultar, alumno_id))
+
+    def exportar_alumno(self, alumno):
+        """Reporte de un alumno (fila del índice de nombres) listo para exportar"""
+        return reporte_alumno(self.consultar, alumno)
+
+    def puntualidad(self, desde, hasta, agrupar="alumno", grado_id=None, seccion=None):
+        """(cabeceras, filas) del resumen de puntualidad"""
+        with metricas.cronometro("reporte.puntualidad"):
+            return resumen_puntualidad(
+                self.consultar, desde, hasta, agrupar, grado_id, seccion
+            )
+
+    def exportar_puntualidad(
+        self, desde, hasta, agrupar="alumno", grado_id=None, seccion=None
+    ):
+        """Resumen de puntualidad listo para exportar"""
+        return reporte_puntualidad(
+            self.consultar,
+            desde,
+            hasta,
+            agrupar,
+            grado_id,
+            seccion,
+            self.grados.nombre(grado_id) if grado_id is not None else None,
+        )
+
+    def horarios(self):
+        """grado_id -> (hora_inicio, tolerancia) en segundos"""
+        return horarios(self.consultar)
+
+    def guardar_horario(self, grado_id, hora_inicio, tolerancia=0):
+        """Guardar la hora de ingreso y la tolerancia de un grado"""
+        return guardar_horario(self.consultar, grado_id, hora_inicio, tolerancia)
+
+    def alertas(self, racha_minima=3, porcentaje_minimo=85.0, hasta=None):
+        """Alumnos con rachas de inasistencia o porcentaje bajo (días hasta ayer)"""
+        with metricas.cronometro("reporte.alertas"):
+            if self.motor_inasistencias is None:
+                self.motor_inasistencias = MotorInasistencias(
+                    self.consultar, self.calendario
+                )
+            self.motor_inasistencias.actualizar(hasta)
+            return self.motor_inasistencias.alertas(racha_minima, porcentaje_minimo)
+
+    def asistencias(self, desde, hasta):
+        """Registros de asistencia del rango listos para exportar"""
+        return reporte_asistencias(self.consultar, desde, hasta)
+
+    def padron(self):
+        """Todos los alumnos listos para exportar"""
+        return reporte_padron(self.consultar)
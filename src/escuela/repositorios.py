@@ -0,0 +1,139 @@
+"""Acceso a las tablas alumnos y asistencias"""
+
+from escuela.paginacion import PaginadorAlumnos
+
+
+class RepositorioAlumnos:
+    """Consultas y cambios de la tabla alumnos"""
+
+    def __init__(self, consultar):
+        self.consultar = consultar
+
+    def por_codigo(self, codigo):
+        """(alumno_id, nombres, apellido_paterno, apellido_materno) o None"""
+        return self.consultar(
+            """
+            SELECT alumno_id, nombres, apellido_paterno, apellido_materno
+            FROM alumnos WHERE codigo = ? AND estado = 'activo'
+            """,
+            [codigo],
+        ).fetchone()
+
+    def obtener(self, alumno_id):
+        """Datos del alumno con el nombre del grado y la sección, o None.
+
+        Grado y sección son None si su detalle_grado_id no existe (hay que
+        poder abrirlo para asignarle uno, por ejemplo antes de la promoción).
+        """
+        return self.consultar(
+            """
+            SELECT
+                al.alumno_id,
+                al.codigo,
+                al.nombres,
+                al.apellido_paterno,
+                al.apellido_materno,
+                al.fecha_ingreso,
+                g.grado,
+                dg.seccion
+            FROM
+                alumnos al
+            LEFT JOIN detalle_grados dg ON
+                dg.detalle_grado_id = al.detalle_grado_id
+            LEFT JOIN grados g ON
+                dg.grado_id = g.grado_id
+            WHERE
+                alumno_id = ?
+            """,
+            [alumno_id],
+        ).fetchone()
+
+    def crear(self, codigo, nombres, paterno, materno, fecha_ingreso, detalle_grado_id):
+        """Registrar un alumno; devuelve su alumno_id o None si falló"""
+        cursor = self.consultar(
+            """
+            INSERT INTO alumnos(codigo, nombres, apellido_paterno, apellido_materno,
+                fecha_ingreso, detalle_grado_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [codigo, nombres, paterno, materno, fecha_ingreso, detalle_grado_id],
+        )
+        return cursor.lastrowid if cursor else None
+
+    def actualizar(
+        self, alumno_id, codigo, nombres, paterno, materno, fecha_ingreso, detalle_grado_id
+    ):
+        """Modificar los datos de un alumno; devuelve True si se guardó"""
+        cursor = self.consultar(
+            """
+            UPDATE alumnos SET codigo=?, nombres=?, apellido_paterno=?,
+                apellido_materno=?, fecha_ingreso=?, detalle_grado_id=?
+            WHERE alumno_id=?
+            """,
+            [
+                codigo,
+                nombres,
+                paterno,
+                materno,
+                fecha_ingreso,
+                detalle_grado_id,
+                alumno_id,
+            ],
+        )
+        return bool(cursor)
+
+    def retirar(self, alumno_id):
+        """Marcar al alumno como retirado (sale de las listas hasta que se
+        archive); devuelve True si se ejecutó"""
+        return bool(
+            self.consultar(
+                "UPDATE alumnos SET estado = 'retirado' WHERE alumno_id = ?", [alumno_id]
+            )
+        )
+
+    def eliminar(self, alumno_id):
+        """Eliminar un alumno y, en cascada, sus asistencias; True si se ejecutó"""
+        return bool(self.consultar("DELETE FROM alumnos WHERE alumno_id = ?", [alumno_id]))
+
+    def paginador(self, tamano_pagina=30):
+        """Lista paginada de alumnos con búsqueda y orden"""
+        return PaginadorAlumnos(self.consultar, tamano_pagina)
+
+
+class RepositorioAsistencias:
+    """Consultas y cambios de la tabla asistencias"""
+
+    def __init__(self, consultar):
+        self.consultar = consultar
+
+    def del_dia(self, alumno_id, fecha):
+        """(asistencia_id, hora_entrada, hora_salida) del alumno en la fecha, o None.
+
+        fecha es el número de día y las horas son segundos (escuela.fechas).
+        """
+        return self.consultar(
+            """
+            SELECT asistencia_id, hora_entrada, hora_salida
+            FROM asistencias
+            WHERE alumno_id = ? AND fecha = ?
+            """,
+            [alumno_id, fecha],
+        ).fetchone()
+
+    def registrar_entrada(self, alumno_id, fecha, hora):
+        """Insertar la asistencia del día; devuelve True si se guardó"""
+        return bool(
+            self.consultar(
+                "INSERT INTO asistencias(alumno_id, hora_entrada, fecha) VALUES (?, ?, ?)",
+                [alumno_id, hora, fecha],
+            )
+        )
+
+    def registrar_salida(self, alumno_id, fecha, hora):
+        """Guardar la hora de salida del día; devuelve True si se guardó"""
+        return bool(
+            self.consultar(
+                "UPDATE asistencias SET hora_salida=? WHERE alumno_id = ? AND fecha = ?",
+                [hora, alumno_id, fecha],
+            )
+        )
@@ -0,0 +1,304 @@
+"""Copias de seguridad de la base de datos sin cerrar el sistema.
+
+Se usa la API de respaldo en línea de SQLite: la copia avanza unas pocas
+páginas por paso y entre pasos suelta la base de datos, así que las
+marcaciones siguen guardándose mientras se respalda. Cada copia lleva al
+lado un archivo .sha256 (el mismo formato de sha256sum) que se comprueba
+antes de restaurar.
+"""
+
+import glob
+import hashlib
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from escuela.basedatos import (
+    asegurar_esquema,
+    conectar,
+    consultor,
+    guardar_configuracion,
+    leer_configuracion,
+)
+from escuela.metricas import metricas
+
+# Páginas copiadas por paso y pausa entre pasos (deja pasar a las escrituras)
+PAGINAS_POR_PASO = 256
+PAUSA_PASO_S = 0.005
+
+# Reintentos cuando la copia se reinicia y cuánto crece el paso en cada uno
+MAX_REINICIOS = 3
+REINICIOS_FACTOR = 8
+
+# Nombre de las copias: escuela-AAAAMMDD-HHMMSS.db; si ya hay una de ese
+# segundo, escuela-AAAAMMDD-HHMMSS-02.db, -03...
+PREFIJO = "escuela-"
+FORMATO_FECHA = "%Y%m%d-%H%M%S"
+
+# Copias programadas por defecto
+INTERVALO_HORAS_DEFECTO = 24
+CONSERVAR_DEFECTO = 14
+
+# Claves de la tabla configuracion
+CLAVE_DIRECTORIO = "respaldos_directorio"
+CLAVE_INTERVALO = "respaldos_intervalo_horas"
+CLAVE_CONSERVAR = "respaldos_conservar"
+CLAVE_ULTIMO = "respaldos_ultimo"
+
+
+class RespaldoInvalido(Exception):
+    """La copia no coincide con su suma de verificación o está dañada"""
+
+
+def suma_sha256(ruta):
+    """SHA-256 del archivo, leído por bloques"""
+    suma = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(1 << 20), b""):
+            suma.update(bloque)
+    return suma.hexdigest()
+
+
+def archivo_suma(ruta):
+    """Archivo .sha256 que acompaña a una copia"""
+    return f"{ruta}.sha256"
+
+
+def _revisar_integridad(ruta):
+    """RespaldoInvalido si SQLite encuentra daños en la base de datos"""
+    conn = sqlite3.connect(ruta)
+    try:
+        resultado = conn.execute("PRAGMA quick_check").fetchone()[0]
+    except sqlite3.DatabaseError as error:
+        raise RespaldoInvalido(f"{ruta}: {error}") from error
+    finally:
+        conn.close()
+    if resultado != "ok":
+        raise RespaldoInvalido(f"{ruta}: {resultado}")
+
+
+class _Reinicio(Exception):
+    """Otra conexión escribió durante la copia y SQLite la empezó de nuevo"""
+
+
+def copiar(origen, destino, paginas=PAGINAS_POR_PASO, pausa=PAUSA_PASO_S, progreso=None):
+    """Copiar una base de datos abierta con la API de respaldo, por pasos.
+
+    Si otra conexión escribe entre dos pasos, SQLite vuelve a empezar la
+    copia; con marcaciones continuas podría no terminar nunca. Por eso cada
+    reinicio repite la copia con pasos REINICIOS_FACTOR veces más grandes,
+    y el último intento la hace en un solo paso.
+    progreso(copiadas, total) se llama después de cada paso.
+    """
+    for intento in range(MAX_REINICIOS + 1):
+        tamano = -1 if intento == MAX_REINICIOS else paginas * REINICIOS_FACTOR**intento
+        try:
+            _copiar_por_pasos(origen, destino, tamano, pausa, progreso)
+            return
+        except _Reinicio:
+            metricas.contar("respaldo.reinicios")
+
+
+def _copiar_por_pasos(origen, destino, paginas, pausa, progreso):
+    """Un intento de copia; _Reinicio si SQLite la volvió a empezar"""
+    copiadas = [0]
+
+    def paso(estado, restantes, total):
+        # Un paso sin bloqueo (SQLITE_OK) que no avanzó empezó otra vez desde el inicio
+        if estado == sqlite3.SQLITE_OK and copiadas[0] and total - restantes <= copiadas[0]:
+            raise _Reinicio()
+        copiadas[0] = total - restantes
+        if progreso is not None:
+            progreso(total - restantes, total)
+        if restantes:
+            time.sleep(pausa)
+
+    fuente = conectar(origen)
+    copia = sqlite3.connect(destino)
+    try:
+        fuente.backup(copia, pages=paginas, progress=paso)
+    finally:
+        copia.close()
+        fuente.close()
+
+
+def respaldar(db_name, directorio, ahora=None, prefijo=PREFIJO, **opciones):
+    """Copia verificada de la base de datos en el directorio; devuelve su ruta.
+
+    La copia se escribe en un archivo temporal y se revisa con quick_check;
+    solo si está completa se escribe su .sha256 y después se renombra, así
+    que nunca queda una copia sin su suma. `opciones` se pasan a `copiar`
+    (paginas, pausa, progreso).
+    """
+    if ahora is None:
+        ahora = datetime.now()
+    os.makedirs(directorio, exist_ok=True)
+    ruta, temporal = _reservar_nombre(
+        directorio, f"{prefijo}{ahora.strftime(FORMATO_FECHA)}"
+    )
+    suma_temporal = f"{archivo_suma(ruta)}.parcial"
+
+    try:
+        with metricas.cronometro("respaldo"):
+            copiar(db_name, temporal, **opciones)
+            _revisar_integridad(temporal)
+            suma = suma_sha256(temporal)
+        with open(suma_temporal, "w", encoding="utf-8") as archivo:
+            archivo.write(f"{suma}  {os.path.basename(ruta)}\n")
+        os.replace(suma_temporal, archivo_suma(ruta))
+        os.replace(temporal, ruta)
+    except BaseException:
+        for sobrante in (temporal, suma_temporal, archivo_suma(ruta)):
+            if os.path.exists(sobrante):
+                os.remove(sobrante)
+        raise
+    return ruta
+
+
+def _reservar_nombre(directorio, nombre):
+    """(ruta, temporal) de una copia que aún no existe.
+
+    El temporal se crea vacío con O_EXCL: dos copias del mismo segundo
+    (o dos procesos a la vez) nunca escriben en el mismo archivo.
+    """
+    for numero in range(1, 100):
+        sufijo = "" if numero == 1 else f"-{numero:02d}"
+        ruta = os.path.join(directorio, f"{nombre}{sufijo}.db")
+        if os.path.exists(ruta):
+            continue
+        try:
+            os.close(os.open(f"{ruta}.parcial", os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            continue
+        return ruta, f"{ruta}.parcial"
+    raise FileExistsError(f"Demasiadas copias con el nombre {nombre}")
+
+
+def respaldos(directorio, prefijo=PREFIJO):
+    """Copias del directorio, de la más reciente a la más antigua"""
+    # Sin la extensión, escuela-...-HHMMSS va antes que escuela-...-HHMMSS-02
+    return sorted(
+        glob.glob(os.path.join(directorio, f"{prefijo}*.db")),
+        key=lambda ruta: os.path.splitext(ruta)[0],
+        reverse=True,
+    )
+
+
+def rotar(directorio, conservar, prefijo=PREFIJO):
+    """Borrar las copias más antiguas y dejar solo `conservar`; devuelve las borradas"""
+    borradas = respaldos(directorio, prefijo)[conservar:]
+    for ruta in borradas:
+        os.remove(ruta)
+        if os.path.exists(archivo_suma(ruta)):
+            os.remove(archivo_suma(ruta))
+    return borradas
+
+
+def verificar(ruta):
+    """Comprobar la suma SHA-256 de una copia; RespaldoInvalido si no coincide"""
+    try:
+        with open(archivo_suma(ruta), encoding="utf-8") as archivo:
+            esperada = archivo.read().split()[0]
+    except (OSError, IndexError) as error:
+        raise RespaldoInvalido(f"{ruta}: no tiene suma de verificación") from error
+
+    if suma_sha256(ruta) != esperada:
+        raise RespaldoInvalido(f"{ruta}: la suma de verificación no coincide")
+    return True
+
+
+def restaurar(ruta, db_name, directorio_seguridad=None):
+    """Reemplazar el contenido de la base de datos con una copia verificada.
+
+    Antes se guarda una copia del estado actual (antes-de-restaurar-*.db)
+    en `directorio_seguridad` (por defecto, el de la copia). La restauración
+    usa la API de respaldo en sentido inverso, así que no hace falta cerrar
+    el sistema. Una copia de una versión anterior recibe después las
+    columnas, índices y migraciones que le falten (asegurar_esquema); las
+    cachés en memoria se deben volver a leer después.
+    Devuelve la ruta de la copia de seguridad del estado anterior.
+    """
+    verificar(ruta)
+    _revisar_integridad(ruta)
+
+    if directorio_seguridad is None:
+        directorio_seguridad = os.path.dirname(os.path.abspath(ruta))
+    anterior = respaldar(db_name, directorio_seguridad, prefijo="antes-de-restaurar-")
+
+    fuente = sqlite3.connect(ruta)
+    destino = conectar(db_name)
+    try:
+        fuente.backup(destino)
+    finally:
+        destino.close()
+        fuente.close()
+    asegurar_esquema(consultor(db_name))
+    return anterior
+
+
+class ProgramadorRespaldos:
+    """Copias periódicas en un directorio, conservando las últimas `conservar`"""
+
+    def __init__(
+        self,
+        consultar,
+        db_name,
+        directorio,
+        intervalo_horas=INTERVALO_HORAS_DEFECTO,
+        conservar=CONSERVAR_DEFECTO,
+    ):
+        self.consultar = consultar
+        self.db_name = db_name
+        self.directorio = directorio
+        self.intervalo_horas = intervalo_horas
+        self.conservar = conservar
+
+    @classmethod
+    def desde_configuracion(cls, consultar, db_name):
+        """Programador con las preferencias guardadas, o None si no está configurado"""
+        directorio = leer_configuracion(consultar, CLAVE_DIRECTORIO)
+        if not directorio:
+            return None
+        return cls(
+            consultar,
+            db_name,
+            directorio,
+            int(leer_configuracion(consultar, CLAVE_INTERVALO, INTERVALO_HORAS_DEFECTO)),
+            int(leer_configuracion(consultar, CLAVE_CONSERVAR, CONSERVAR_DEFECTO)),
+        )
+
+    def guardar_configuracion(self):
+        """Guardar el directorio, el intervalo y la cantidad de copias"""
+        guardar_configuracion(self.consultar, CLAVE_DIRECTORIO, self.directorio)
+        guardar_configuracion(self.consultar, CLAVE_INTERVALO, self.intervalo_horas)
+        guardar_configuracion(self.consultar, CLAVE_CONSERVAR, self.conservar)
+
+    @property
+    def ultimo(self):
+        """Fecha y hora del último respaldo, o None"""
+        valor = leer_configuracion(self.consultar, CLAVE_ULTIMO)
+        return datetime.fromisoformat(valor) if valor else None
+
+    def pendiente(self, ahora=None):
+        """Indica si ya pasó el intervalo desde el último respaldo"""
+        if ahora is None:
+            ahora = datetime.now()
+        ultimo = self.ultimo
+        return ultimo is None or ahora - ultimo >= timedelta(hours=self.intervalo_horas)
+
+    def ejecutar(self, ahora=None, **opciones):
+        """Respaldar y rotar; devuelve (copia, copias borradas)"""
+        if ahora is None:
+            ahora = datetime.now()
+        ruta = respaldar(self.db_name, self.directorio, ahora, **opciones)
+        borradas = rotar(self.directorio, self.conservar)
+        guardar_configuracion(self.consultar, CLAVE_ULTIMO, ahora.isoformat(" ", "seconds"))
+        return ruta, borradas
+
+    def describir(self):
+        """Texto corto con la programación actual"""
+        return (
+            f"Cada {self.intervalo_horas} horas, "
+            f"se conservan las últimas {self.conservar} copias"
+        )
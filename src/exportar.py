@@ -0,0 +1,346 @@
+"""Exportar reportes desde la línea de comandos, sin abrir la interfaz.
+
+Ejemplos:
+    python exportar.py mensual --grado-id 7 --seccion A --salida 1roA.xlsx
+    python exportar.py diario --grado-id 7 --seccion A --fecha 2024-04-15 --salida dia.xlsx
+    python exportar.py alumno --codigo JCM76598214 --salida alumno.xlsx
+    python exportar.py puntualidad --desde 2024-03-01 --hasta 2024-03-31 --salida p.xlsx
+    python exportar.py lote --year 2024 --mes 3 --directorio reportes/
+    python exportar.py lote --year 2024 --un-libro --directorio reportes/
+    python exportar.py asistencias --desde 2022-01-01 --hasta 2024-12-31 --salida historico.col
+    python exportar.py padron --salida alumnos.csv
+    python exportar.py programado --directorio reportes/ --hora-diaria 16:30 --guardar
+    python exportar.py programado --esperar
+
+El formato de salida (xlsx, csv o col) se toma de la extensión del archivo
+o de --formato.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from escuela.basedatos import Instantanea, asegurar_esquema, consultor
+from escuela.calendario import CalendarioEscolar
+from escuela.exportacion import ESCRITORES, escribir, escribir_excel_hojas, materializar
+from escuela.indice_nombres import CONSULTA_ALUMNOS
+from escuela.programador import ProgramadorReportes
+from escuela.puntualidad import AGRUPACIONES, leer_hora
+from escuela.reportes import (
+    reporte_alumno,
+    reporte_asistencias,
+    reporte_diario,
+    reporte_mensual,
+    reporte_padron,
+    reporte_puntualidad,
+    secciones_con_alumnos,
+)
+
+
+def nombre_grado(consultar, grado_id):
+    """Nombre de un grado por su ID"""
+    fila = consultar("SELECT grado FROM grados WHERE grado_id = ?", [grado_id]).fetchone()
+    if fila is None:
+        raise SystemExit(f"No existe el grado {grado_id}")
+    return fila[0]
+
+
+def _exportar_seccion(db, grado_id, grado, seccion, year, meses, file_path, formato):
+    """Trabajo de un proceso: escribir el archivo de una sección"""
+    inicio = time.perf_counter()
+    with Instantanea(db) as consultar:
+        calendario = CalendarioEscolar(consultar)
+        reporte = reporte_mensual(
+            consultar, calendario, grado_id, grado, seccion, year, meses
+        )
+        filas = escribir(file_path, reporte, formato)
+    return file_path, filas, time.perf_counter() - inicio
+
+
+def _calcular_seccion(db, grado_id, grado, seccion, year, meses):
+    """Trabajo de un proceso: calcular el reporte de una sección para una hoja"""
+    inicio = time.perf_counter()
+    with Instantanea(db) as consultar:
+        calendario = CalendarioEscolar(consultar)
+        reporte = materializar(
+            reporte_mensual(consultar, calendario, grado_id, grado, seccion, year, meses)
+        )
+    return f"{grado} {seccion}", reporte, time.perf_counter() - inicio
+
+
+def exportar_lote(args):
+    """Reportes mensuales de todas las secciones, calculados en paralelo"""
+    inicio = time.perf_counter()
+    consultar = consultor(args.db)
+    secciones = secciones_con_alumnos(consultar, args.grado_id)
+    if not secciones:
+        raise SystemExit("No hay secciones con alumnos")
+
+    os.makedirs(args.directorio, exist_ok=True)
+    resumen = []
+
+    with ProcessPoolExecutor(max_workers=args.procesos) as executor:
+        if args.un_libro:
+            # Las secciones se calculan en paralelo y se escriben en orden, una por hoja
+            file_path = os.path.join(args.directorio, f"Asistencias {args.year}.xlsx")
+            tiempos = []
+            futuros = [
+                executor.submit(
+                    _calcular_seccion,
+                    args.db,
+                    grado_id,
+                    grado,
+                    seccion,
+                    args.year,
+                    args.mes,
+                )
+                for grado_id, grado, seccion in secciones
+            ]
+
+            def hojas():
+                for futuro in futuros:
+                    titulo, reporte, segundos = futuro.result()
+                    tiempos.append((titulo, segundos))
+                    yield titulo, reporte
+
+            filas = escribir_excel_hojas(file_path, hojas())
+            resumen.append((file_path, filas, time.perf_counter() - inicio))
+            for titulo, segundos in tiempos:
+                print(f"  {titulo}: calculado en {segundos:.2f} s")
+        else:
+            futuros = [
+                executor.submit(
+                    _exportar_seccion,
+                    args.db,
+                    grado_id,
+                    grado,
+                    seccion,
+                    args.year,
+                    args.mes,
+                    os.path.join(
+                        args.directorio,
+                        f"{grado} {seccion} {args.year}.{args.formato}",
+                    ),
+                    args.formato,
+                )
+                for grado_id, grado, seccion in secciones
+            ]
+            for futuro in as_completed(futuros):
+                resumen.append(futuro.result())
+
+    total = time.perf_counter() - inicio
+    for file_path, filas, segundos in sorted(resumen):
+        print(f"{file_path}: {filas} filas en {segundos:.2f} s")
+    print(
+        f"{len(secciones)} secciones, {len(resumen)} archivos, "
+        f"{sum(filas for _, filas, _ in resumen)} filas en {total:.2f} s"
+    )
+
+
+def exportar_programado(consultar, args):
+    """Reportes diarios y mensuales automáticos de todas las secciones"""
+    calendario = CalendarioEscolar(consultar)
+
+    def lector():
+        return Instantanea(args.db)
+
+    programador = ProgramadorReportes.desde_configuracion(consultar, calendario, lector)
+    if programador is None:
+        if not args.directorio:
+            raise SystemExit("Indique --directorio (no hay uno configurado)")
+        programador = ProgramadorReportes(
+            consultar, calendario, args.directorio, lector=lector
+        )
+
+    if args.directorio:
+        programador.directorio = args.directorio
+    if args.hora_diaria is not None:
+        programador.hora_diaria = args.hora_diaria
+    if args.hora_mensual is not None:
+        programador.hora_mensual = args.hora_mensual
+    if args.formato:
+        programador.formato = args.formato
+    if args.guardar:
+        programador.guardar_configuracion()
+
+    print(f"{programador.directorio}: {programador.describir()}")
+    while True:
+        if not args.esperar or programador.pendiente():
+            inicio = time.perf_counter()
+            archivos = programador.ejecutar()
+            for file_path in archivos:
+                print(file_path)
+            print(
+                f"{len(archivos)} reportes actualizados en "
+                f"{time.perf_counter() - inicio:.2f} s"
+            )
+        if not args.esperar:
+            return
+        time.sleep(60)
+
+
+def crear_reporte(consultar, args):
+    """Construir el reporte pedido con los parámetros de la línea de comandos"""
+    if args.reporte == "mensual":
+        return reporte_mensual(
+            consultar,
+            CalendarioEscolar(consultar),
+            args.grado_id,
+            nombre_grado(consultar, args.grado_id),
+            args.seccion,
+            args.year,
+            args.mes,
+        )
+
+    if args.reporte == "diario":
+        return reporte_diario(
+            consultar,
+            args.grado_id,
+            nombre_grado(consultar, args.grado_id),
+            args.seccion,
+            args.fecha,
+        )
+
+    if args.reporte == "alumno":
+        alumno = consultar(f"{CONSULTA_ALUMNOS} WHERE a.codigo = ?", [args.codigo]).fetchone()
+        if alumno is None:
+            raise SystemExit(f"No se encontró el alumno {args.codigo}")
+        return reporte_alumno(consultar, alumno)
+
+    if args.reporte == "asistencias":
+        return reporte_asistencias(consultar, args.desde, args.hasta)
+
+    if args.reporte == "padron":
+        return reporte_padron(consultar)
+
+    return reporte_puntualidad(
+        consultar,
+        args.desde,
+        args.hasta,
+        args.agrupar,
+        args.grado_id,
+        args.seccion,
+        nombre_grado(consultar, args.grado_id) if args.grado_id else None,
+    )
+
+
+def crear_parser():
+    """Argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Exportar reportes de asistencia")
+    parser.add_argument("--db", default="escuela.db", help="Base de datos")
+
+    reportes = parser.add_subparsers(dest="reporte", required=True)
+
+    mensual = reportes.add_parser("mensual", help="Asistencia mensual de una sección")
+    mensual.add_argument("--grado-id", type=int, required=True)
+    mensual.add_argument("--seccion", required=True)
+    mensual.add_argument("--year", type=int, default=date.today().year)
+    mensual.add_argument(
+        "--mes", type=int, action="append", help="Mes (1-12), se puede repetir"
+    )
+
+    diario = reportes.add_parser("diario", help="Entradas y salidas de una sección en un día")
+    diario.add_argument("--grado-id", type=int, required=True)
+    diario.add_argument("--seccion", required=True)
+    diario.add_argument("--fecha", type=date.fromisoformat, default=date.today())
+
+    alumno = reportes.add_parser("alumno", help="Asistencias de un alumno")
+    alumno.add_argument("--codigo", required=True)
+
+    puntualidad = reportes.add_parser("puntualidad", help="Tardanzas y permanencia")
+    puntualidad.add_argument("--desde", type=date.fromisoformat, required=True)
+    puntualidad.add_argument("--hasta", type=date.fromisoformat, required=True)
+    puntualidad.add_argument("--agrupar", choices=list(AGRUPACIONES), default="alumno")
+    puntualidad.add_argument("--grado-id", type=int)
+    puntualidad.add_argument("--seccion")
+
+    asistencias = reportes.add_parser(
+        "asistencias", help="Registros de asistencia sin procesar"
+    )
+    asistencias.add_argument("--desde", type=date.fromisoformat, required=True)
+    asistencias.add_argument("--hasta", type=date.fromisoformat, required=True)
+
+    padron = reportes.add_parser("padron", help="Todos los alumnos")
+
+    for subparser in (mensual, diario, alumno, puntualidad, asistencias, padron):
+        subparser.add_argument(
+            "--salida", required=True, help="Archivo .xlsx, .csv o .col"
+        )
+        subparser.add_argument("--formato", choices=list(ESCRITORES))
+
+    lote = reportes.add_parser("lote", help="Reporte mensual de todas las secciones")
+    lote.add_argument("--year", type=int, default=date.today().year)
+    lote.add_argument(
+        "--mes", type=int, action="append", help="Mes (1-12), se puede repetir"
+    )
+    lote.add_argument("--grado-id", type=int, help="Solo las secciones de este grado")
+    lote.add_argument("--directorio", required=True, help="Carpeta de salida")
+    lote.add_argument(
+        "--formato", choices=list(ESCRITORES), default="xlsx", help="Formato de cada archivo"
+    )
+    lote.add_argument(
+        "--un-libro",
+        action="store_true",
+        help="Un solo libro con una hoja por sección en vez de un libro por sección",
+    )
+    lote.add_argument(
+        "--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, uno por núcleo)"
+    )
+
+    programado = reportes.add_parser(
+        "programado",
+        help="Reportes diarios y mensuales de todas las secciones que cambiaron",
+    )
+    programado.add_argument("--directorio", help="Carpeta de salida (por defecto, la guardada)")
+    programado.add_argument("--hora-diaria", type=leer_hora, help="Hora de los reportes diarios (HH:MM)")
+    programado.add_argument(
+        "--hora-mensual", type=leer_hora, help="Hora de los reportes mensuales (HH:MM)"
+    )
+    programado.add_argument("--formato", choices=list(ESCRITORES))
+    programado.add_argument(
+        "--guardar", action="store_true", help="Guardar estos valores como preferencias"
+    )
+    programado.add_argument(
+        "--esperar",
+        action="store_true",
+        help="Seguir ejecutándose y generar los reportes a las horas programadas",
+    )
+
+    return parser
+
+
+def main(argv=None):
+    """Punto de entrada"""
+    args = crear_parser().parse_args(argv)
+    if getattr(args, "salida", None) is not None and args.formato is None:
+        formato = os.path.splitext(args.salida)[1].lstrip(".").lower()
+        if formato not in ESCRITORES:
+            raise SystemExit(
+                f"Formato no soportado: {formato or 'sin extensión'} "
+                f"(use {', '.join(ESCRITORES)} o --formato)"
+            )
+    consultar = consultor(args.db)
+    asegurar_esquema(consultar)
+
+    if args.reporte == "lote":
+        if args.un_libro and args.formato != "xlsx":
+            raise SystemExit("--un-libro solo está disponible en formato xlsx")
+        exportar_lote(args)
+        return
+
+    if args.reporte == "programado":
+        exportar_programado(consultar, args)
+        return
+
+    # Las filas se leen de una instantánea: no bloquean las marcaciones
+    with Instantanea(args.db) as lectura:
+        reporte = crear_reporte(lectura, args)
+        filas = escribir(args.salida, reporte, args.formato)
+    print(f"{args.salida}: {filas} filas")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,65 @@
 """Main controller"""
 
-import sqlite3
+import os
 import subprocess
-from copy import deepcopy
-from datetime import datetime, timedelta
+import threading
+import time
+from calendar import monthrange
+from datetime import date, datetime
 from tkinter import Frame, Entry, Tk, filedialog, Menu
-from ttkbootstrap.toast import ToastNotification
 from ttkbootstrap.constants import END, PRIMARY, INFO, YES, BOTH, SUCCESS, DANGER
-from ttkbootstrap.dialogs.dialogs import Messagebox
-from ttkbootstrap.tableview import Tableview
-from ttkbootstrap.scrolled import ScrolledFrame
-from openpyxl import Workbook
 import ttkbootstrap as ttk
 
+# Tableview, ScrolledFrame, Messagebox y ToastNotification se importan en los
+# métodos que los usan: la vista de escaneo no los necesita y así abre antes
+from escuela import Escuela
+from escuela.alertas import VENTANA_DIAS
+from escuela.archivo import archivar, archivo_historico, pendientes
+from escuela.basedatos import Instantanea, conectar, punto_de_control, transaccion
+from escuela.calendario import MESES_ES, TIPOS
+from escuela.consultas import RegistroConsultas, archivo_lentas
+from escuela.exportacion import (
+    ExportacionCancelada,
+    FormatoNoSoportado,
+    ReporteVacio,
+    TareaExportacion,
+)
+from escuela.marcacion import (
+    ENTRADA_DUPLICADA,
+    NO_ENCONTRADO,
+    REGISTRADA,
+    SALIDA_DUPLICADA,
+    SIN_ENTRADA,
+)
+from escuela.metricas import memoria_bytes, metricas, tamano_db
+from escuela.programador import ProgramadorReportes, reportes_generados
+from escuela.promocion import PromocionInvalida, ultima_promocion
+from escuela.respaldo import (
+    ProgramadorRespaldos,
+    RespaldoInvalido,
+    respaldos,
+    restaurar,
+    verificar,
+)
+from escuela.puntualidad import (
+    HORA_INICIO_DEFECTO,
+    TOLERANCIA_DEFECTO,
+    formatear_hora,
+    leer_hora,
+)
+from escuela.reportes import CABECERAS_ALUMNO, CABECERAS_DIA
+
+# Búsqueda de alumnos por nombre
+RETARDO_BUSQUEDA_MS = 250
+MAX_RESULTADOS = 20
+LIMITE_BUSQUEDA = 200
+
+# Cada cuánto se revisa si toca generar los reportes automáticos
+INTERVALO_PROGRAMADOR_MS = 60 * 1000
+
+# Cada cuánto se actualiza el resumen del panel de diagnóstico
+INTERVALO_DIAGNOSTICO_MS = 2000
+
 
 class Main:
     """Main program"""
@@ -22,6 +69,34 @@ class Main:
         self.db_name = db_app
         self.input_codigo = None
         self.main_frame = None
+        # Vistas construidas una sola vez: clave -> (contenedor, main_frame, al_mostrar)
+        self.vistas = {}
+        self.vista = None
+        self.clave_vista = None
+        self.busqueda_pendiente = None
+        self.busqueda_anterior = None
+        self.botones_resultado = []
+
+        # Tiempo de cada consulta por vista; las lentas van a consultas_lentas.log
+        self.consultas = RegistroConsultas(archivo=archivo_lentas(db_app))
+
+        # Datos, marcación y reportes (crea índices y tablas auxiliares)
+        self.escuela = Escuela(
+            self.run_query,
+            self.abrir_instantanea,
+            lambda: transaccion(self.db_name),
+        )
+
+        # Días lectivos por año y grados y secciones (se leen al usarse)
+        self.calendario = self.escuela.calendario
+        self.grados = self.escuela.grados
+
+        # Se completan después de mostrar la vista de escaneo (completar_arranque)
+        self.indice_nombres = self.escuela.indice_nombres
+        self.programador = None
+        self.programador_ocupado = False
+        self.respaldos = None
+        self.respaldo_ocupado = False
 
         # Ventana minizada: Ancho y alto de la pantalla a la mitad
         width = self.wind.winfo_screenwidth() / 2
@@ -32,6 +107,39 @@ class Main:
         self.wind.state("zoomed")
 
         self.wind.title("Sistema de asistencias")
+        self.wind.protocol("WM_DELETE_WINDOW", self.cerrar)
+
+        # Lo primero que se muestra es la vista de escaneo; el resto se prepara
+        # cuando la ventana ya está lista para recibir códigos
+        self.set_principal_view()
+        self.wind.after_idle(self.completar_arranque)
+
+    def completar_arranque(self):
+        """Menús, índices y tareas que no hacen falta para escanear"""
+        self.create_menus()
+
+        # Índice en memoria para buscar alumnos por nombre
+        self.escuela.cargar_indice()
+
+        # Reportes diarios y mensuales automáticos (si hay un directorio configurado)
+        self.programador = ProgramadorReportes.desde_configuracion(
+            self.run_query, self.calendario, self.abrir_instantanea
+        )
+        # Copias de seguridad periódicas (si hay un directorio configurado)
+        self.respaldos = ProgramadorRespaldos.desde_configuracion(
+            self.run_query, self.db_name
+        )
+        self.wind.after(INTERVALO_PROGRAMADOR_MS, self.revisar_programador)
+
+    def cerrar(self):
+        """Guardar el resumen de consultas de la sesión, vaciar el -wal y cerrar
+        la ventana"""
+        self.consultas.guardar_informe()
+        punto_de_control(self.run_query, "TRUNCATE")
+        self.wind.destroy()
+
+    def create_menus(self):
+        """Crear la barra de menús"""
         menubar = Menu(self.wind)
 
         # Crear menús si aún no existen
@@ -44,6 +152,9 @@ class Main:
             asistencias_menu.add_command(
                 label="Marcar salida", command=self.set_salida_view
             )
+            asistencias_menu.add_command(
+                label="Calendario escolar", command=self.set_calendario_view
+            )
             menubar.add_cascade(label="Asistencias", menu=asistencias_menu)
 
             # Reportes
@@ -57,6 +168,16 @@ class Main:
             reportes_menu.add_command(
                 label="Por grado y sección", command=self.set_reporte_grado_view
             )
+            reportes_menu.add_command(
+                label="Alertas de inasistencia", command=self.set_alertas_view
+            )
+            reportes_menu.add_command(
+                label="Puntualidad", command=self.set_puntualidad_view
+            )
+            reportes_menu.add_command(
+                label="Reportes automáticos",
+                command=self.set_reportes_automaticos_view,
+            )
             menubar.add_cascade(label="Reportes", menu=reportes_menu)
 
             self.wind.config(menu=menubar)
@@ -69,23 +190,68 @@ class Main:
             reportes_menu.add_command(label="Ver todos", command=self.set_alumnos_view)
             menubar.add_cascade(label="Alumnos", menu=reportes_menu)
 
+            # Administración
+            admin_menu = Menu(menubar, tearoff=0)
+            admin_menu.add_command(
+                label="Diagnóstico", command=self.set_diagnostico_view
+            )
+            admin_menu.add_command(
+                label="Promoción de fin de año", command=self.set_promocion_view
+            )
+            admin_menu.add_command(
+                label="Archivo histórico", command=self.set_archivo_view
+            )
+            admin_menu.add_command(
+                label="Copias de seguridad", command=self.set_respaldos_view
+            )
+            menubar.add_cascade(label="Administración", menu=admin_menu)
+
             self.wind.config(menu=menubar)
 
-        self.set_principal_view()
+    def reset_view(self, main_title, is_expand=True, padding=20, clave=None):
+        """Ocultar la vista actual y preparar la siguiente.
 
-    def reset_view(self, main_title, is_expand=True, padding=20):
-        """Eliminar todos los widgets de la vista actual"""
-        # Eliminar widgets de la vista principal
+        Las vistas con clave se construyen una sola vez y se guardan ocultas;
+        si ya existe, se vuelve a mostrar, se llama a su función al_mostrar
+        para refrescar los datos y se devuelve True (no hay que construirla).
+        """
+        # Ocultar las vistas guardadas y eliminar las demás
+        guardadas = {vista for vista, _, _ in self.vistas.values()}
         for widget in self.wind.winfo_children():
-            if widget.winfo_class() != "Menu":
+            # Las ventanas de exportación en curso no son parte de la vista
+            if widget.winfo_class() in ("Menu", "Toplevel"):
+                continue
+            if widget in guardadas:
+                widget.pack_forget()
+            else:
                 widget.destroy()
 
         # Quitar el escuchador de eventos "Enter" de la ventana principal
         self.wind.unbind("<Return>")
 
+        # Cancelar una búsqueda de alumnos que aún no se ejecutó
+        if self.busqueda_pendiente is not None:
+            self.wind.after_cancel(self.busqueda_pendiente)
+            self.busqueda_pendiente = None
+
+        self.clave_vista = clave
+        self.consultas.abrir_vista(main_title)
+        if clave is not None:
+            metricas.cache("vistas", clave in self.vistas)
+        if clave in self.vistas:
+            self.vista, self.main_frame, al_mostrar = self.vistas[clave]
+            self.vista.pack(expand=True, fill="both")
+            if al_mostrar is not None:
+                al_mostrar()
+            return True
+
+        # Contenedor de toda la vista (lo que se oculta o elimina al cambiar)
+        self.vista = ttk.Frame(self.wind)
+        self.vista.pack(expand=True, fill="both")
+
         # Frame Container
         self.main_frame = ttk.Frame(
-            self.wind, borderwidth=0, relief="flat", padding=padding
+            self.vista, borderwidth=0, relief="flat", padding=padding
         )
         self.main_frame.pack(expand=is_expand)
 
@@ -97,6 +263,24 @@ class Main:
         )
         main_titulo.pack(expand=True)
 
+        if clave is not None:
+            self.vistas[clave] = (self.vista, self.main_frame, None)
+        return False
+
+    def descartar_vistas(self):
+        """Volver a construir las vistas guardadas (menos la actual) la próxima
+        vez que se abran, después de cambios masivos en los datos"""
+        self.vistas = {
+            clave: vista
+            for clave, vista in self.vistas.items()
+            if clave == self.clave_vista
+        }
+
+    def al_mostrar(self, funcion):
+        """Función a llamar cada vez que se vuelva a mostrar la vista actual"""
+        if self.clave_vista is not None:
+            self.vistas[self.clave_vista] = (self.vista, self.main_frame, funcion)
+
     def reset_input_codigo(self, event):
         """Ctrl + BackSpace -> Borrar todo el contenido del input"""
         print(event)
@@ -104,13 +288,23 @@ class Main:
 
     def run_query(self, query, parameters=()):
         """Ejecutar cualquier query y obtener el resultado"""
-        with sqlite3.connect(self.db_name) as conn:
+        inicio = time.perf_counter()
+        with conectar(self.db_name) as conn:
             cursor = conn.cursor()
             result = cursor.execute(query, parameters)
+            self.consultas.registrar(
+                conn, query, parameters, (time.perf_counter() - inicio) * 1000
+            )
         return result
 
+    def abrir_instantanea(self):
+        """Lectura consistente en una conexión propia para reportes y exportaciones"""
+        return Instantanea(self.db_name, registro=self.consultas)
+
     def display_success_toast(self, message):
         """Notificación para cuando una operación se realice con éxito"""
+        from ttkbootstrap.toast import ToastNotification
+
         toast = ToastNotification(
             title="Operación exitosa", message=message, duration=2000, icon=None
         )
@@ -118,6 +312,8 @@ class Main:
 
     def display_error_box(self, message, parent=None):
         """Mostrar un Messagebox centrado"""
+        from ttkbootstrap.dialogs.dialogs import Messagebox
+
         if parent is None:
             parent = self.main_frame
 
@@ -128,133 +324,102 @@ class Main:
         """Colocar link button en la esquina superior derecha"""
         # Botón "Ver reporte" posicionado en la esquina superior derecha
         boton_reporte = ttk.Button(
-            self.wind, text=content, bootstyle=INFO, command=on_click
+            self.vista, text=content, bootstyle=INFO, command=on_click
         )
         boton_reporte.place(relx=0.0, y=25, x=30, anchor="nw")
 
+    def enlazar_grado_seccion(
+        self, combobox_grados, combobox_secciones, todos=None, todas=None
+    ):
+        """Llenar los combobox de grado y sección con el catálogo de grados.
+
+        La lista de secciones muestra solo las que existen en el grado elegido.
+        `todos` y `todas` son opciones opcionales al inicio de cada lista.
+        Devuelve la función que actualiza las secciones, para llamarla al
+        cambiar el grado por código.
+        """
+
+        def actualizar_grados():
+            grados = self.grados.nombres()
+            if todos is not None:
+                grados = [todos, *grados]
+            combobox_grados.configure(values=grados)
+
+        def actualizar_secciones(event=None):
+            grado_id = self.grados.grado_id(combobox_grados.get())
+            secciones = self.grados.secciones(grado_id)
+            if todas is not None:
+                secciones = [todas, *secciones]
+            combobox_secciones.configure(values=secciones)
+            if event is not None and combobox_secciones.get() not in secciones:
+                combobox_secciones.set(todas if todas is not None else "Sección")
+
+        # Los valores se toman del catálogo al abrir la lista, por si cambió
+        combobox_grados.configure(postcommand=actualizar_grados)
+        combobox_secciones.configure(postcommand=actualizar_secciones)
+        combobox_grados.bind("<<ComboboxSelected>>", actualizar_secciones, add="+")
+        actualizar_grados()
+        actualizar_secciones()
+        return actualizar_secciones
+
     def register_asistencia(self, codigo_alumno):
         """Función para registrar asistencia cuando se presione 'Enter' en la vista principal"""
-        # self.input_codigo.delete(0, END)
         if codigo_alumno in (None, ""):
-            # self.input_codigo.delete(0, END)
-            # return self.display_error_box("Código inválido")
             return
 
-        alumno = self.run_query(
-            "SELECT alumno_id, nombres, apellido_paterno FROM alumnos WHERE codigo = ?",
-            [codigo_alumno],
-        ).fetchone()
-
-        if alumno in (None, "") or len(alumno) == 0:
-            self.input_codigo.delete(0, END)
-            return self.display_error_box("No se encontró el alumno")
-
-        now = datetime.now()
-        fecha = now.strftime("%Y-%m-%d")
-
-        existentes = self.run_query(
-            """
-            SELECT
-                an.asistencia_id 
-            FROM
-                asistencias an
-            INNER JOIN alumnos al ON
-                an.alumno_id = al.alumno_id
-            WHERE al.codigo = ? AND an.fecha=?
-            """,
-            [codigo_alumno, fecha],
-        ).fetchall()
-
-        if len(existentes) > 0:
-            self.input_codigo.delete(0, END)
-            return self.display_error_box(
-                "Hoy ya se marcó la entrada de este alumno. Puedes marcar su salida."
-            )
-
-        hora_entrada = now.strftime("%H:%M:%S")
-        asistencia = self.run_query(
-            "INSERT INTO asistencias(alumno_id, hora_entrada, fecha) VALUES (?, ?, ?)",
-            [alumno[0], hora_entrada, fecha],
-        )
+        marcacion = self.escuela.marcacion.entrada(codigo_alumno)
+        self.input_codigo.delete(0, END)
 
-        if asistencia:
-            self.input_codigo.delete(0, END)
+        if marcacion.resultado == REGISTRADA:
+            alumno = marcacion.alumno
             return self.display_success_toast(
                 f"Asistencia marcada para el alumno: {alumno[1]} {alumno[2]}"
             )
 
-        self.input_codigo.delete(0, END)
-        return self.display_error_box("Error interno al registrar la entrada")
+        return self.display_error_box(
+            {
+                NO_ENCONTRADO: "No se encontró el alumno",
+                ENTRADA_DUPLICADA: "Hoy ya se marcó la entrada de este alumno. "
+                "Puedes marcar su salida.",
+            }.get(marcacion.resultado, "Error interno al registrar la entrada")
+        )
 
     def register_salida(self, codigo_alumno):
         """Marcar salida de un alumno"""
         self.input_codigo.delete(0, END)
 
         if codigo_alumno in (None, ""):
-            # return self.display_error_box("Código inválido")
             return
 
-        alumno = self.run_query(
-            "SELECT alumno_id, nombres, apellido_materno FROM alumnos WHERE codigo = ?",
-            [codigo_alumno],
-        ).fetchone()
-
-        if alumno in (None, "") or len(alumno) == 0:
-            return self.display_error_box("No se encontró el alumno")
-
-        now = datetime.now()
-        fecha = now.strftime("%Y-%m-%d")
-
-        existentes = self.run_query(
-            """
-            SELECT
-                an.hora_salida 
-            FROM
-                asistencias an
-            INNER JOIN alumnos al ON
-                an.alumno_id = al.alumno_id
-            WHERE al.codigo = ? AND an.fecha=?
-            """,
-            [codigo_alumno, fecha],
-        ).fetchall()
-
-        if existentes in (None, "") or len(existentes) == 0:
-            return self.display_error_box(
-                "Primero debes marcar entrada para este alumno"
-            )
-
-        if existentes[0][0] not in (None, ""):
-            return self.display_error_box("Ya se marcó la salida de este alumno")
-
-        hora_salida = now.strftime("%H:%M:%S")
-        salida = self.run_query(
-            "UPDATE asistencias SET hora_salida=? WHERE alumno_id = ? AND fecha = ?",
-            [hora_salida, alumno[0], fecha],
-        )
+        marcacion = self.escuela.marcacion.salida(codigo_alumno)
 
-        if salida:
+        if marcacion.resultado == REGISTRADA:
+            alumno = marcacion.alumno
             return self.display_success_toast(
                 f"Salida marcada para el alumno: {alumno[1]} {alumno[2]}"
             )
 
-        return self.display_error_box("Error interno al registrar la salida")
+        return self.display_error_box(
+            {
+                NO_ENCONTRADO: "No se encontró el alumno",
+                SIN_ENTRADA: "Primero debes marcar entrada para este alumno",
+                SALIDA_DUPLICADA: "Ya se marcó la salida de este alumno",
+            }.get(marcacion.resultado, "Error interno al registrar la salida")
+        )
 
     def create_alumno(
         self, codigo, nombres, paterno, materno, fecha, grado_id, seccion
     ):
         """Crear alumno"""
-        detalle_grado = self.run_query(
-            "SELECT detalle_grado_id FROM detalle_grados WHERE grado_id=? AND seccion=?",
-            [grado_id, seccion],
-        ).fetchone()
-
         fecha_formatted = datetime.strptime(fecha, "%d-%m-%Y").strftime("%Y-%m-%d")
-        alumno = self.run_query(
-            "INSERT INTO alumnos(codigo, nombres, apellido_paterno, apellido_materno, fecha_ingreso, detalle_grado_id) VALUES (?, ?, ?, ?, ?, ?)",
-            [codigo, nombres, paterno, materno, fecha_formatted, detalle_grado[0]],
-        )
+        try:
+            alumno_id = self.escuela.crear_alumno(
+                codigo, nombres, paterno, materno, fecha_formatted, grado_id, seccion
+            )
+        except ValueError as error:
+            return self.display_error_box(str(error))
 
-        if alumno:
+        if alumno_id is not None:
             self.set_alumno_add_view()
             return self.display_success_toast("Alumno creado con éxito")
 
@@ -264,236 +429,119 @@ class Main:
         self, alumno_id, codigo, nombres, paterno, materno, fecha, grado_id, seccion
     ):
         """Editar alumno"""
-        detalle_grado = self.run_query(
-            "SELECT detalle_grado_id FROM detalle_grados WHERE grado_id=? AND seccion=?",
-            [grado_id, seccion],
-        ).fetchone()
-
         fecha_formatted = datetime.strptime(fecha, "%d-%m-%Y").strftime("%Y-%m-%d")
-        alumno = self.run_query(
-            "UPDATE alumnos SET codigo=?, nombres=?, apellido_paterno=?, apellido_materno=?, fecha_ingreso=?, detalle_grado_id=? WHERE alumno_id=?",
-            [
+        try:
+            guardado = self.escuela.actualizar_alumno(
+                alumno_id,
                 codigo,
                 nombres,
                 paterno,
                 materno,
                 fecha_formatted,
-                detalle_grado[0],
-                alumno_id,
-            ],
-        )
+                grado_id,
+                seccion,
+            )
+        except ValueError as error:
+            return self.display_error_box(str(error))
 
-        if alumno:
+        if guardado:
             self.set_alumnos_view()
             return self.display_success_toast("Alumno actualizado con éxito")
 
         return self.display_error_box("Error interno al actualizar el alumno")
 
-    def export_to_excel(
-        self, table, default_name, alumno_grado=None, alumno_seccion=None
-    ):
-        """Exportar datos de una tabla TableView en formato Excel"""
-        # Traer datos de las cabeceras y registros de la tabla
-        headers = [col.headertext for col in table.tablecolumns]
-        records = [row.values for row in table.tablerows]
-
-        if len(headers) == 0 or len(records) == 0:
-            self.display_error_box("No hay datos para exportar en esta tabla")
-            return
+    def export_to_excel(self, nombre, crear_reporte):
+        """Exportar un reporte en segundo plano, con progreso y opción de cancelar.
 
+        crear_reporte(reportes) arma el reporte en el hilo de la exportación,
+        con un ServicioReportes que lee de una instantánea propia abierta
+        después de elegir el archivo: las filas son las de ese momento y
+        escribirlas no bloquea las marcaciones. `nombre` es el del archivo.
+        """
         # Obtener la ubicación y el nombre del archivo del usuario
         file_path = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
-            filetypes=[("Archivos de Excel", "*.xlsx")],
-            initialfile=f"{default_name}.xlsx",
+            filetypes=[("Archivos de Excel", "*.xlsx"), ("Archivos CSV", "*.csv")],
+            initialfile=f"{nombre}.xlsx",
         )
         if not file_path:
             self.display_error_box("Ruta inválida para guardar un archivo")
             return
 
-        wb = Workbook()
-        ws = wb.active
-
-        # Celda A1
-        ws.cell(row=1, column=1, value="ALUMNO:")
-        # Combinar las celdas B1, C1 y D1
-        ws.merge_cells(start_row=1, start_column=2, end_row=1, end_column=4)
-        ws.cell(row=1, column=2, value=default_name)
-
-        # Celda B1 y B2
-        ws.cell(row=2, column=1, value="GRADO:")
-        ws.merge_cells(start_row=2, start_column=2, end_row=2, end_column=4)
-        ws.cell(row=2, column=2, value=alumno_grado)
-
-        # Celda C1 y C2
-        ws.cell(row=3, column=1, value="SECCIÓN:")
-        ws.merge_cells(start_row=3, start_column=2, end_row=3, end_column=4)
-        ws.cell(row=3, column=2, value=alumno_seccion)
-
-        # Escribir los encabezados de las columnas
-        for col, column_name in enumerate(headers, start=1):
-            ws.cell(row=4, column=col, value=column_name)
-
-        # Escribir los datos de las filas
-        for row, row_data in enumerate(records, start=5):
-            for col, data in enumerate(row_data, start=1):
-                ws.cell(row=row, column=col, value=data)
-
-        # Guardar el archivo Excel en la ubicación especificada
-        try:
-            wb.save(file_path)
-        except PermissionError:
-            self.display_error_box(
-                "No se pudo guardar el archivo. Permiso denegado. Cierre el archivo."
-            )
-            return
-
-        # Abrir el archivo después de guardarlo
-        answer = Messagebox.show_question(
-            message="Archivo guardado con éxito. ¿Desea abrirlo?",
-            title="Operación exitosa",
-            alert=True,
-            parent=self.main_frame,
-            buttons=["No:secondary", "Sí:primary"],
+        # Ventana de progreso: no bloquea la ventana principal
+        ventana = ttk.Toplevel(self.wind)
+        ventana.title("Exportando")
+        ventana.resizable(False, False)
+        ventana.transient(self.wind)
+
+        frame = ttk.Frame(ventana, padding=20)
+        frame.pack(fill=BOTH, expand=YES)
+        ttk.Label(frame, text=f"Exportando {nombre}...").pack(anchor="w")
+        barra = ttk.Progressbar(frame, mode="indeterminate", length=300, bootstyle=INFO)
+        barra.pack(fill="x", pady=10)
+        etiqueta_filas = ttk.Label(frame, text="0 filas escritas")
+        etiqueta_filas.pack(anchor="w")
+
+        def crear():
+            # Ya en el hilo: la instantánea se cierra cuando termina la tarea
+            reportes = self.escuela.reportes.instantanea()
+            tarea.al_terminar = reportes.cerrar
+            return crear_reporte(reportes)
+
+        # Arma y escribe el reporte en un hilo aparte
+        tarea = TareaExportacion(file_path, crear)
+        boton_cancelar = ttk.Button(
+            frame, text="Cancelar", bootstyle=DANGER, command=tarea.cancelar
         )
+        boton_cancelar.pack(pady=(10, 0))
+        ventana.protocol("WM_DELETE_WINDOW", tarea.cancelar)
+        barra.start(10)
+
+        def revisar():
+            if not tarea.terminado:
+                etiqueta_filas.config(text=f"{tarea.filas} filas escritas")
+                if tarea.cancelando:
+                    boton_cancelar.config(text="Cancelando...", state="disabled")
+                ventana.after(100, revisar)
+                return
 
-        if answer.lower() == "sí":
-            subprocess.Popen([file_path], shell=True)
-        else:
-            Messagebox.show_info(
-                message=f"Archivo guardado en la ruta {file_path}",
-                title="Archivo guardado",
-                alert=True,
-                parent=self.main_frame,
-            )
-
-    def export_to_excel_2(self, table, fecha, alumno_grado=None, alumno_seccion=None):
-        """Exportar datos de una tabla TableView en formato Excel"""
-        # Traer datos de las cabeceras y registros de la tabla
-        headers = [col.headertext for col in table.tablecolumns]
-        records = [row.values for row in table.tablerows]
-
-        if len(headers) == 0 or len(records) == 0:
-            self.display_error_box("No hay datos para exportar en esta tabla")
-            return
-
-        # Obtener la ubicación y el nombre del archivo del usuario
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".xlsx",
-            filetypes=[("Archivos de Excel", "*.xlsx")],
-            initialfile=f"{fecha}.xlsx",
-        )
-        if not file_path:
-            self.display_error_box("Ruta inválida para guardar un archivo")
+            barra.stop()
+            ventana.destroy()
+            self.mostrar_resultado_exportacion(file_path, tarea.error)
+
+        tarea.iniciar()
+        ventana.after(100, revisar)
+
+    def mostrar_resultado_exportacion(self, file_path, error):
+        """Avisar cómo terminó una exportación y ofrecer abrir el archivo"""
+        from ttkbootstrap.dialogs.dialogs import Messagebox
+        from ttkbootstrap.toast import ToastNotification
+
+        if isinstance(error, ExportacionCancelada):
+            ToastNotification(
+                title="Exportación cancelada",
+                message="No se guardó ningún archivo",
+                duration=3000,
+                bootstyle=INFO,
+            ).show_toast()
             return
-
-        wb = Workbook()
-        ws = wb.active
-
-        # Celda A1
-        ws.cell(row=1, column=1, value="FECHA:")
-        # Combinar las celdas B1, C1 y D1
-        ws.merge_cells(start_row=1, start_column=2, end_row=1, end_column=4)
-        ws.cell(row=1, column=2, value=fecha)
-
-        # Celda B1 y B2
-        ws.cell(row=2, column=1, value="GRADO:")
-        ws.merge_cells(start_row=2, start_column=2, end_row=2, end_column=4)
-        ws.cell(row=2, column=2, value=alumno_grado)
-
-        # Celda C1 y C2
-        ws.cell(row=3, column=1, value="SECCIÓN:")
-        ws.merge_cells(start_row=3, start_column=2, end_row=3, end_column=4)
-        ws.cell(row=3, column=2, value=alumno_seccion)
-
-        # Escribir los encabezados de las columnas
-        for col, column_name in enumerate(headers, start=1):
-            ws.cell(row=4, column=col, value=column_name)
-
-        # Escribir los datos de las filas
-        for row, row_data in enumerate(records, start=5):
-            for col, data in enumerate(row_data, start=1):
-                ws.cell(row=row, column=col, value=data)
-
-        # Guardar el archivo Excel en la ubicación especificada
-        try:
-            wb.save(file_path)
-        except PermissionError:
+        if isinstance(error, ReporteVacio):
             self.display_error_box(
-                "No se pudo guardar el archivo. Permiso denegado. Cierre el archivo."
+                "No hay datos para exportar en este reporte", parent=self.wind
             )
             return
-
-        # Abrir el archivo después de guardarlo
-        answer = Messagebox.show_question(
-            message="Archivo guardado con éxito. ¿Desea abrirlo?",
-            title="Operación exitosa",
-            alert=True,
-            parent=self.main_frame,
-            buttons=["No:secondary", "Sí:primary"],
-        )
-
-        if answer.lower() == "sí":
-            subprocess.Popen([file_path], shell=True)
-        else:
-            Messagebox.show_info(
-                message=f"Archivo guardado en la ruta {file_path}",
-                title="Archivo guardado",
-                alert=True,
-                parent=self.main_frame,
+        if isinstance(error, PermissionError):
+            self.display_error_box(
+                "No se pudo guardar el archivo. Permiso denegado. Cierre el archivo.",
+                parent=self.wind,
             )
-
-    def export_to_excel_3(self, tables, grado=None, seccion=None):
-        """Exportar datos de una tabla TablheView en formato Excel"""
-        # Obtener la ubicación y el nombre del archivo del usuario
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".xlsx",
-            filetypes=[("Archivos de Excel", "*.xlsx")],
-            initialfile=f"{grado}.xlsx",
-        )
-        if not file_path:
-            self.display_error_box("Ruta inválida para guardar un archivo")
             return
-
-        wb = Workbook()
-        ws = wb.active
-
-        # Celda A1
-        ws.cell(row=1, column=1, value="SECCIÓN:")
-        # Combinar las celdas B1, C1 y D1
-        ws.cell(row=1, column=2, value=seccion)
-
-        # Celda B1 y B2
-        ws.cell(row=2, column=1, value="GRADO:")
-        ws.cell(row=2, column=2, value=grado)
-
-        # Escribir los datos de las filas
-        first_row = 3
-        for mes, table in tables:
-            # Traer datos de las cabeceras y registros de la tabla
-            records = [row.values for row in table.tablerows]
-            headers = [col.headertext for col in table.tablecolumns]
-            first_row += 1
-            ws.cell(row=first_row, column=1, value="MES:")
-            ws.cell(row=first_row, column=2, value=mes)
-            first_row += 1
-
-            # Escribir los encabezados de las columnas
-            for col, column_name in enumerate(headers, start=1):
-                ws.cell(row=first_row, column=col, value=column_name)
-            first_row += 1
-
-            for row, row_data in enumerate(records, start=first_row):
-                for col, data in enumerate(row_data, start=1):
-                    ws.cell(row=row, column=col, value=data)
-                first_row += 1
-
-        # Guardar el archivo Excel en la ubicación especificada
-        try:
-            wb.save(file_path)
-        except PermissionError:
+        if isinstance(error, FormatoNoSoportado):
+            self.display_error_box("Formato de archivo no soportado", parent=self.wind)
+            return
+        if error is not None:
             self.display_error_box(
-                "No se pudo guardar el archivo. Permiso denegado. Cierre el archivo."
+                f"No se pudo exportar el reporte: {error}", parent=self.wind
             )
             return
 
@@ -502,36 +550,35 @@ class Main:
             message="Archivo guardado con éxito. ¿Desea abrirlo?",
             title="Operación exitosa",
             alert=True,
-            parent=self.main_frame,
+            parent=self.wind,
             buttons=["No:secondary", "Sí:primary"],
         )
 
-        if answer.lower() == "sí":
+        if answer and answer.lower() == "sí":
             subprocess.Popen([file_path], shell=True)
         else:
             Messagebox.show_info(
                 message=f"Archivo guardado en la ruta {file_path}",
                 title="Archivo guardado",
                 alert=True,
-                parent=self.main_frame,
+                parent=self.wind,
             )
 
     def set_principal_view(self):
         """Mostrar vista principal"""
-        self.reset_view("Esperando código de barras...")
+        if self.reset_view("Esperando código de barras...", clave="entrada"):
+            return
+
         # Frame para el input y el botón
         frame_input_boton = Frame(self.main_frame)
         frame_input_boton.pack(expand=True)
 
         # Input código de barras
-        self.input_codigo = Entry(
-            frame_input_boton, font=("Helvetica", 18), justify="center"
-        )
-        self.input_codigo.pack(side="left")
-        self.input_codigo.focus()
+        input_codigo = Entry(frame_input_boton, font=("Helvetica", 18), justify="center")
+        input_codigo.pack(side="left")
 
         # Evento Ctrl + Delete
-        self.input_codigo.bind("<Control-BackSpace>", self.reset_input_codigo)
+        input_codigo.bind("<Control-BackSpace>", self.reset_input_codigo)
 
         # Botón "agregar manualmente"
         boton_agregar = ttk.Button(
@@ -542,28 +589,36 @@ class Main:
         )
         boton_agregar.pack(side="left", padx=10, pady=20)
 
-        # Escuchador de evento "Enter" a la ventana principal
-        self.wind.bind(
-            "<Return>",
-            lambda event: self.register_asistencia(self.input_codigo.get().upper()),
-        )
+        def activar():
+            """Dejar el input listo para escanear"""
+            self.input_codigo = input_codigo
+            input_codigo.delete(0, END)
+            input_codigo.focus()
+
+            # Escuchador de evento "Enter" a la ventana principal
+            self.wind.bind(
+                "<Return>",
+                lambda event: self.register_asistencia(self.input_codigo.get().upper()),
+            )
+
+        activar()
+        self.al_mostrar(activar)
 
     def set_salida_view(self):
         """Vista para marcar salida"""
-        self.reset_view("Marcar salida")
+        if self.reset_view("Marcar salida", clave="salida"):
+            return
+
         # Frame para el input y el botón
         frame_input_boton = Frame(self.main_frame)
         frame_input_boton.pack(expand=True)
 
         # Input código de barras
-        self.input_codigo = Entry(
-            frame_input_boton, font=("Helvetica", 18), justify="center"
-        )
-        self.input_codigo.pack(side="left")
-        self.input_codigo.focus()
+        input_codigo = Entry(frame_input_boton, font=("Helvetica", 18), justify="center")
+        input_codigo.pack(side="left")
 
         # Evento Ctrl + Delete
-        self.input_codigo.bind("<Control-BackSpace>", self.reset_input_codigo)
+        input_codigo.bind("<Control-BackSpace>", self.reset_input_codigo)
 
         # Botón "agregar manualmente"
         boton_agregar = ttk.Button(
@@ -574,15 +629,438 @@ class Main:
         )
         boton_agregar.pack(side="left", padx=10, pady=20)
 
-        # Escuchador de evento "Enter" a la ventana principal
-        self.wind.bind(
-            "<Return>",
-            lambda event: self.register_salida(self.input_codigo.get().upper()),
+        def activar():
+            """Dejar el input listo para escanear"""
+            self.input_codigo = input_codigo
+            input_codigo.delete(0, END)
+            input_codigo.focus()
+
+            # Escuchador de evento "Enter" a la ventana principal
+            self.wind.bind(
+                "<Return>",
+                lambda event: self.register_salida(self.input_codigo.get().upper()),
+            )
+
+        activar()
+        self.al_mostrar(activar)
+
+    def set_calendario_view(self):
+        """Feriados, vacaciones y días especiales del año"""
+        from ttkbootstrap.tableview import Tableview
+
+        if self.reset_view(
+            "Calendario escolar", is_expand=False, padding=15, clave="calendario"
+        ):
+            return
+
+        tipos_dict = {descripcion: tipo for tipo, (descripcion, _) in TIPOS.items()}
+
+        form_frame = ttk.Frame(self.main_frame)
+        form_frame.pack(expand=True, fill="x", pady=(30, 20))
+
+        # Rango de fechas
+        ttk.Label(form_frame, text="Desde:", font=("Sans-Serif", 11)).pack(
+            side="left", padx=(0, 10)
         )
+        desde = ttk.DateEntry(form_frame, bootstyle="primary", dateformat="%d-%m-%Y")
+        desde.pack(side="left", padx=(0, 20))
+
+        ttk.Label(form_frame, text="Hasta:", font=("Sans-Serif", 11)).pack(
+            side="left", padx=(0, 10)
+        )
+        hasta = ttk.DateEntry(form_frame, bootstyle="primary", dateformat="%d-%m-%Y")
+        hasta.pack(side="left", padx=(0, 20))
+
+        # Tipo de día
+        combobox_tipos = ttk.Combobox(
+            form_frame,
+            bootstyle="primary",
+            values=list(tipos_dict.keys()),
+            state="readonly",
+        )
+        combobox_tipos.set("Tipo")
+        combobox_tipos.pack(side="left", padx=(0, 20))
+
+        descripcion = ttk.Entry(form_frame, font=("Sans-Serif", 11), width=30)
+        descripcion.pack(side="left", padx=(0, 20))
+
+        coldata = [
+            {"text": "ID", "stretch": True},
+            {"text": "Desde", "stretch": True},
+            {"text": "Hasta", "stretch": True},
+            {"text": "Tipo", "stretch": True},
+            {"text": "Descripción", "stretch": True},
+        ]
+
+        def filas_calendario():
+            """Registros del calendario del año en curso para la tabla"""
+            return [
+                (
+                    calendario_id,
+                    inicio,
+                    fin,
+                    TIPOS.get(tipo, (tipo,))[0],
+                    texto or "",
+                )
+                for calendario_id, inicio, fin, tipo, texto in self.calendario.listar(
+                    datetime.now().year
+                )
+            ]
+
+        def texto_year():
+            """Aviso de la tabla con el año en curso"""
+            return (
+                f"Días sin clases y días especiales de {datetime.now().year}. "
+                "Los sábados y domingos no tienen clases salvo que sean días especiales."
+            )
+
+        def actualizar():
+            """Volver a leer el año en curso y sus registros"""
+            etiqueta_year.config(text=texto_year())
+            dt.build_table_data(coldata, filas_calendario())
+
+        def agregar_dia():
+            """Validar y guardar el registro"""
+            tipo = combobox_tipos.get()
+            if tipo not in tipos_dict:
+                self.display_error_box("Selecciona el tipo de día")
+                return
+
+            try:
+                fecha_inicio = datetime.strptime(desde.entry.get(), "%d-%m-%Y").date()
+                fecha_fin = datetime.strptime(hasta.entry.get(), "%d-%m-%Y").date()
+            except ValueError:
+                self.display_error_box("Ingresa las fechas en formato DD-MM-AAAA")
+                return
+            if fecha_fin < fecha_inicio:
+                self.display_error_box("La fecha final es anterior a la inicial")
+                return
+
+            self.calendario.agregar(
+                fecha_inicio, fecha_fin, tipos_dict[tipo], descripcion.get()
+            )
+            self.display_success_toast("Calendario actualizado")
+            actualizar()
+
+        def eliminar_dia():
+            """Eliminar el registro seleccionado"""
+            selection = dt.view.selection()
+            if len(selection) == 0:
+                self.display_error_box("Selecciona un registro de la tabla")
+                return
+
+            calendario_id = dt.get_row(iid=selection[0]).values[0]
+            self.calendario.eliminar(calendario_id)
+            self.display_success_toast("Registro eliminado")
+            actualizar()
+
+        ttk.Button(
+            form_frame, text="Agregar", bootstyle=PRIMARY, command=agregar_dia
+        ).pack(side="left")
+
+        etiqueta_year = ttk.Label(
+            self.main_frame,
+            text=texto_year(),
+            font=("Sans-serif", 10),
+            justify="left",
+            anchor="nw",
+        )
+        etiqueta_year.pack(expand=True, fill="x")
+
+        dt = Tableview(
+            master=self.main_frame,
+            coldata=coldata,
+            rowdata=filas_calendario(),
+            paginated=True,
+            searchable=False,
+            bootstyle=PRIMARY,
+            autofit=True,
+            autoalign=True,
+        )
+        dt.pack(fill=BOTH, expand=YES, padx=10, pady=10)
+
+        ttk.Button(
+            self.main_frame,
+            text="Eliminar seleccionado",
+            bootstyle=DANGER,
+            command=eliminar_dia,
+        ).pack(pady=10)
+
+        self.al_mostrar(actualizar)
+
+    def revisar_programador(self):
+        """Generar los reportes automáticos y las copias de seguridad en
+        segundo plano si ya es la hora"""
+        self.wind.after(INTERVALO_PROGRAMADOR_MS, self.revisar_programador)
+        if (
+            self.programador is not None
+            and not self.programador_ocupado
+            and self.programador.pendiente()
+        ):
+            self.ejecutar_programador()
+        if (
+            self.respaldos is not None
+            and not self.respaldo_ocupado
+            and self.respaldos.pendiente()
+        ):
+            self.ejecutar_respaldo()
+
+    def ejecutar_programador(self, on_finish=None):
+        """Ejecutar el programador en un hilo sin bloquear el escaneo"""
+        self.programador_ocupado = True
+        estado = {"archivos": None, "error": None}
+
+        def generar():
+            try:
+                estado["archivos"] = self.programador.ejecutar()
+            except Exception as error:
+                estado["error"] = error
+
+        hilo = threading.Thread(target=generar, daemon=True)
+
+        def revisar():
+            if hilo.is_alive():
+                self.wind.after(500, revisar)
+                return
+
+            self.programador_ocupado = False
+            if estado["error"] is not None:
+                self.display_error_box(
+                    f"No se pudieron generar los reportes automáticos: {estado['error']}",
+                    parent=self.wind,
+                )
+            elif estado["archivos"]:
+                self.display_success_toast(
+                    f"{len(estado['archivos'])} reportes automáticos generados"
+                )
+            if on_finish is not None:
+                on_finish()
+
+        hilo.start()
+        self.wind.after(500, revisar)
+
+    def ejecutar_respaldo(self, on_finish=None):
+        """Copiar la base de datos en un hilo; la copia avanza por pasos y no
+        bloquea el escaneo"""
+        self.respaldo_ocupado = True
+        estado = {"archivo": None, "error": None}
+
+        def respaldar():
+            try:
+                estado["archivo"], _ = self.respaldos.ejecutar()
+            except Exception as error:
+                estado["error"] = error
+
+        hilo = threading.Thread(target=respaldar, daemon=True)
+
+        def revisar():
+            if hilo.is_alive():
+                self.wind.after(500, revisar)
+                return
+
+            self.respaldo_ocupado = False
+            if estado["error"] is not None:
+                self.display_error_box(
+                    f"No se pudo crear la copia de seguridad: {estado['error']}",
+                    parent=self.wind,
+                )
+            if on_finish is not None:
+                on_finish()
+
+        hilo.start()
+        self.wind.after(500, revisar)
+
+    def en_segundo_plano(self, titulo, texto, trabajo, al_terminar):
+        """Ejecutar trabajo() en un hilo con una ventana de progreso que no deja
+        usar el resto del sistema mientras tanto; después se llama
+        al_terminar(resultado, error) en el hilo de la ventana"""
+        ventana = ttk.Toplevel(self.wind)
+        ventana.title(titulo)
+        ventana.resizable(False, False)
+        ventana.transient(self.wind)
+        # No se puede cerrar hasta que termine
+        ventana.protocol("WM_DELETE_WINDOW", lambda: None)
+
+        frame = ttk.Frame(ventana, padding=20)
+        frame.pack(fill=BOTH, expand=YES)
+        ttk.Label(frame, text=texto).pack(anchor="w")
+        barra = ttk.Progressbar(frame, mode="indeterminate", length=300, bootstyle=INFO)
+        barra.pack(fill="x", pady=10)
+        barra.start(10)
+        ventana.grab_set()
+
+        estado = {"resultado": None, "error": None}
+
+        def ejecutar():
+            try:
+                estado["resultado"] = trabajo()
+            except Exception as error:
+                estado["error"] = error
+
+        hilo = threading.Thread(target=ejecutar, daemon=True)
+
+        def revisar():
+            if hilo.is_alive():
+                ventana.after(100, revisar)
+                return
+
+            barra.stop()
+            ventana.grab_release()
+            ventana.destroy()
+            al_terminar(estado["resultado"], estado["error"])
+
+        hilo.start()
+        ventana.after(100, revisar)
+
+    def set_reportes_automaticos_view(self):
+        """Configurar la generación automática de reportes"""
+        from ttkbootstrap.tableview import Tableview
+
+        if self.reset_view(
+            "Reportes automáticos",
+            is_expand=False,
+            padding=15,
+            clave="reportes_automaticos",
+        ):
+            return
+
+        programador = self.programador or ProgramadorReportes(
+            self.run_query, self.calendario, "", lector=self.abrir_instantanea
+        )
+
+        form_frame = ttk.Frame(self.main_frame)
+        form_frame.pack(expand=True, fill="x", pady=(30, 20))
+
+        ttk.Label(form_frame, text="Carpeta:", font=("Sans-Serif", 11)).pack(
+            side="left", padx=(0, 10)
+        )
+        directorio = ttk.Entry(form_frame, font=("Sans-Serif", 11), width=40)
+        directorio.insert(0, programador.directorio)
+        directorio.pack(side="left", padx=(0, 10))
+
+        def elegir_directorio():
+            """Seleccionar la carpeta de salida"""
+            ruta = filedialog.askdirectory()
+            if ruta:
+                directorio.delete(0, END)
+                directorio.insert(0, ruta)
+
+        ttk.Button(
+            form_frame, text="Elegir", bootstyle=INFO, command=elegir_directorio
+        ).pack(side="left", padx=(0, 20))
+
+        ttk.Label(form_frame, text="Diarios:", font=("Sans-Serif", 11)).pack(
+            side="left", padx=(0, 10)
+        )
+        hora_diaria = ttk.Entry(form_frame, font=("Sans-Serif", 11), width=6)
+        hora_diaria.insert(0, formatear_hora(programador.hora_diaria))
+        hora_diaria.pack(side="left", padx=(0, 20))
+
+        ttk.Label(form_frame, text="Mensuales:", font=("Sans-Serif", 11)).pack(
+            side="left", padx=(0, 10)
+        )
+        hora_mensual = ttk.Entry(form_frame, font=("Sans-Serif", 11), width=6)
+        hora_mensual.insert(0, formatear_hora(programador.hora_mensual))
+        hora_mensual.pack(side="left", padx=(0, 20))
+
+        combobox_formato = ttk.Combobox(
+            form_frame,
+            bootstyle="primary",
+            values=["xlsx", "csv"],
+            state="readonly",
+            width=6,
+        )
+        combobox_formato.set(programador.formato)
+        combobox_formato.pack(side="left", padx=(0, 20))
+
+        estado = ttk.Label(self.main_frame, font=("Sans-serif", 10), anchor="nw")
+        estado.pack(expand=True, fill="x")
+
+        coldata = [
+            {"text": "Tipo", "stretch": True},
+            {"text": "Periodo", "stretch": True},
+            {"text": "Grado", "stretch": True},
+            {"text": "Sección", "stretch": True},
+            {"text": "Generado", "stretch": True},
+            {"text": "Archivo", "stretch": True},
+        ]
+
+        dt = Tableview(
+            master=self.main_frame,
+            coldata=coldata,
+            rowdata=reportes_generados(self.run_query),
+            paginated=True,
+            searchable=False,
+            bootstyle=PRIMARY,
+            autofit=True,
+            autoalign=True,
+        )
+        dt.pack(fill=BOTH, expand=YES, padx=10, pady=10)
+
+        def actualizar_estado():
+            """Mostrar la programación y la última ejecución"""
+            if self.programador is None:
+                estado.config(text="Los reportes automáticos están desactivados.")
+                return
+            ultima = self.programador.ultima_ejecucion
+            ultima = ultima.strftime("%d-%m-%Y %H:%M") if ultima else "nunca"
+            estado.config(
+                text=f"{self.programador.describir()}. Última ejecución: {ultima}."
+            )
+            if dt.winfo_exists():
+                dt.build_table_data(coldata, reportes_generados(self.run_query))
+
+        def guardar():
+            """Validar y guardar la configuración"""
+            try:
+                diaria = leer_hora(hora_diaria.get())
+                mensual = leer_hora(hora_mensual.get())
+            except ValueError:
+                self.display_error_box("Ingresa las horas en formato HH:MM")
+                return
+            if not directorio.get().strip():
+                self.display_error_box("Selecciona una carpeta")
+                return
+
+            self.programador = ProgramadorReportes(
+                self.run_query,
+                self.calendario,
+                directorio.get().strip(),
+                diaria,
+                mensual,
+                combobox_formato.get(),
+                self.abrir_instantanea,
+            )
+            self.programador.guardar_configuracion()
+            self.display_success_toast("Configuración guardada")
+            actualizar_estado()
+
+        def generar_ahora():
+            """Generar los reportes que faltan o cambiaron sin esperar la hora"""
+            if self.programador is None:
+                self.display_error_box("Guarda la configuración primero")
+                return
+            if self.programador_ocupado:
+                self.display_error_box("Los reportes ya se están generando")
+                return
+            self.ejecutar_programador(
+                on_finish=lambda: estado.winfo_exists() and actualizar_estado()
+            )
+
+        ttk.Button(
+            form_frame, text="Guardar", bootstyle=PRIMARY, command=guardar
+        ).pack(side="left", padx=(0, 10))
+        ttk.Button(
+            form_frame, text="Generar ahora", bootstyle=SUCCESS, command=generar_ahora
+        ).pack(side="left")
+
+        actualizar_estado()
+        self.al_mostrar(actualizar_estado)
 
     def set_reporte_general_view(self):
         """Mostrar segunda vista con todos los grados disponibles"""
-        self.reset_view("Reporte general mensual")
+        if self.reset_view("Reporte general mensual", clave="reporte_general"):
+            return
 
         # Debajo del título
         ttk.Label(
@@ -592,26 +1070,21 @@ class Main:
         ).pack(fill="x", pady=(30, 20))
 
         # Grados
-        grados = self.run_query(
-            "SELECT grado_id, grado FROM grados WHERE grado_id >= 7"
-        ).fetchall()
-        grados_dict = {grado: grado_id for grado_id, grado in grados}
         combobox_grados = ttk.Combobox(
             self.main_frame,
             bootstyle="primary",
-            values=list(grados_dict.keys()),
             state="readonly",
         )
         combobox_grados.set("Grado")
         combobox_grados.pack(pady=20, padx=20, side="left")
 
         # Secciones
-        secciones = ["A", "B", "C", "D", "E", "F", "G", "H", "I"]
         combobox_secciones = ttk.Combobox(
-            self.main_frame, bootstyle="primary", values=secciones, state="readonly"
+            self.main_frame, bootstyle="primary", state="readonly"
         )
         combobox_secciones.set("Sección")
         combobox_secciones.pack(pady=20, padx=20, side="left")
+        self.enlazar_grado_seccion(combobox_grados, combobox_secciones)
 
         def set_validate_report():
             """Validar los datos y mostrar el reporte"""
@@ -622,11 +1095,26 @@ class Main:
                 return
 
             self.set_reporte_general_table(
-                grados_dict[grado],
+                self.grados.grado_id(grado),
                 grado,
                 seccion,
             )
 
+        def exportar_sin_tabla():
+            """Exportar el reporte del año directamente desde la base de datos"""
+            grado = combobox_grados.get()
+            seccion = combobox_secciones.get()
+            if grado == "Grado" or seccion == "Sección":
+                self.display_error_box("Selecciona un grado y sección")
+                return
+
+            grado_id = self.grados.grado_id(grado)
+            year = datetime.now().year
+            self.export_to_excel(
+                f"{grado} {seccion} {year}",
+                lambda reportes: reportes.exportar_mensual(grado_id, seccion, year),
+            )
+
         ttk.Button(
             self.main_frame,
             text="Buscar",
@@ -635,15 +1123,26 @@ class Main:
             command=set_validate_report,
         ).pack(expand=True, fill="x")
 
+        ttk.Button(
+            self.main_frame,
+            text="Exportar a Excel",
+            bootstyle=SUCCESS,
+            padding=(20, 10),
+            command=exportar_sin_tabla,
+        ).pack(expand=True, fill="x", pady=(10, 0))
+
     def set_reporte_general_table(self, grado_id, grado, seccion):
         """Mostrar tabla con datos de la búsqueda por grado y seccion de manera mensual"""
+        from ttkbootstrap.scrolled import ScrolledFrame
+        from ttkbootstrap.tableview import Tableview
+
         self.reset_view(grado, is_expand=False)
         self.set_change_view_link_corner(
             "Volver al buscador", self.set_reporte_general_view
         )
 
         # Datos del grado
-        sf_tablas = ScrolledFrame(self.wind, autohide=True)
+        sf_tablas = ScrolledFrame(self.vista, autohide=True)
         sf_tablas.pack(fill=BOTH, expand=YES, padx=0, pady=0)
 
         ttk.Label(
@@ -654,45 +1153,13 @@ class Main:
             anchor="nw",
         ).pack(expand=True, fill="x")
 
-        meses = [
-            "Enero",
-            "Febrero",
-            "Marzo",
-            "Abril",
-            "Mayo",
-            "Junio",
-            "Julio",
-            "Agosto",
-            "Septiembre",
-            "Octubre",
-            "Noviembre",
-            "Diciembre",
-        ]
         year = datetime.now().year
-        dias_es = ["L", "M", "M", "J", "V"]
-
-        # Datos de los alumnos
-        alumnos = self.run_query(
-            """
-            SELECT
-                al.alumno_id,
-                al.nombres,
-                al.apellido_paterno,
-                al.apellido_materno
-            FROM
-                alumnos al
-            INNER JOIN detalle_grados dg ON
-                al.detalle_grado_id = dg.detalle_grado_id
-            WHERE
-                dg.grado_id = ?
-                AND dg.seccion = ?;
-            """,
-            [grado_id, seccion],
-        ).fetchall()
-
-        # Tabla por mes
-        tables = []
-        for mes_num, mes_nombre in enumerate(meses, start=1):
+        # Alumnos y asistencias leídos en la misma instantánea
+        with self.escuela.reportes.instantanea() as reportes:
+            meses = reportes.mensual(grado_id, seccion, year)
+
+        # Tabla por mes con clases
+        for mes_nombre, cabeceras, rowsdata in meses:
             ttk.Label(
                 sf_tablas,
                 text=f"{mes_nombre} {year}",
@@ -701,85 +1168,7 @@ class Main:
                 anchor="center",
             ).pack(expand=True, fill="x")
 
-            coldata = [
-                {"text": "N°", "stretch": True},
-                {"text": "Nombres y apellidos", "stretch": True},
-            ]
-
-            primer_dia = datetime(year, mes_num, 1)
-            ultimo_dia = (
-                (datetime(year, mes_num + 1, 1) - timedelta(days=1))
-                if mes_num != 12
-                else datetime(year + 1, 1, 1) - timedelta(days=1)
-            )
-
-            # Dias del mes en iteracion
-            dias = {}
-            current_day = primer_dia
-            while current_day <= ultimo_dia:
-                if current_day.weekday() < 5:
-                    dia_fecha = current_day.day
-                    dia_letra = dias_es[current_day.weekday()]
-                    dias[dia_fecha] = {"letra": dia_letra, "asistencia": "I"}
-                    coldata.append(
-                        {"text": f"{dia_letra}-{dia_fecha}", "stretch": True}
-                    )
-                current_day += timedelta(days=1)
-            dias_cantidad = len(dias.keys())
-            coldata.append({"text": "Asistencias", "stretch": True})
-            coldata.append({"text": "% Asistencia", "stretch": True})
-            coldata.append({"text": "Inasistencias", "stretch": True})
-            alumnos_rows = list(alumnos)
-            mes_num_string = f"{mes_num:02d}"
-
-            rowsdata = []
-
-            # Generar datos de asistencia de cada alumno por mes
-            for numero, alumno in enumerate(alumnos_rows, start=1):
-                alumno_mes_asistencias = self.run_query(
-                    """
-                    SELECT
-                        an.hora_entrada,
-                        an.hora_salida,
-                        an.fecha,
-                        al.alumno_id,
-                        al.nombres,
-                        al.apellido_paterno,
-                        al.apellido_materno
-                    FROM
-                        alumnos al
-                    LEFT JOIN asistencias an ON
-                        an.alumno_id = al.alumno_id
-                    INNER JOIN detalle_grados dg ON
-                        al.detalle_grado_id = dg.detalle_grado_id
-                    WHERE
-                        dg.grado_id = ?
-                        AND dg.seccion = ?
-                        AND strftime('%m', an.fecha) = ?
-                        AND al.alumno_id = ?;
-                    """,
-                    [grado_id, seccion, mes_num_string, alumno[0]],
-                ).fetchall()
-
-                alumno_asistencias_cantidad = len(alumno_mes_asistencias)
-                alumno_dias = deepcopy(dias)
-
-                for asistencia in alumno_mes_asistencias:
-                    asistencia_fecha = datetime.strptime(asistencia[2], "%Y-%m-%d")
-                    dia = asistencia_fecha.day
-                    if dia in alumno_dias:
-                        alumno_dias[dia]["asistencia"] = "A"
-
-                letras = [valor["asistencia"] for valor in alumno_dias.values()]
-                data = [numero, f"{alumno[1]} {alumno[2]} {alumno[3]}"]
-                data.extend(letras)
-                data.append(alumno_asistencias_cantidad)
-                asistencia_porcentaje = (
-                    alumno_asistencias_cantidad / dias_cantidad * 100
-                )
-                data.append(f"{asistencia_porcentaje:.1f}%")
-                data.append(dias_cantidad - alumno_asistencias_cantidad)
-                rowsdata.append(tuple(data))
+            coldata = [{"text": cabecera, "stretch": True} for cabecera in cabeceras]
 
             # Crear tabla
             dt = Tableview(
@@ -795,7 +1184,6 @@ class Main:
                 height=40,
             )
             dt.pack(fill=BOTH, expand=True, padx=40, pady=(0, 50))
-            tables.append((mes_nombre, dt))
 
             # Centrar cabeceras y filas de la tabla
             for col_id in dt.view["columns"]:
@@ -804,16 +1192,299 @@ class Main:
                     dt.view.heading(col_id, anchor="center")
 
         export_button = ttk.Button(
-            self.wind,
+            self.vista,
+            text="Exportar a Excel",
+            bootstyle=SUCCESS,
+            command=lambda: self.export_to_excel(
+                f"{grado} {seccion} {year}",
+                lambda reportes: reportes.exportar_mensual(grado_id, seccion, year),
+            ),
+        )
+        export_button.place(relx=1.0, y=25, x=-30, anchor="ne")
+
+    def set_alertas_view(self):
+        """Alumnos con inasistencias consecutivas o baja asistencia"""
+        from ttkbootstrap.tableview import Tableview
+
+        if self.reset_view(
+            "Alertas de inasistencia", is_expand=False, padding=15, clave="alertas"
+        ):
+            return
+
+        form_frame = ttk.Frame(self.main_frame)
+        form_frame.pack(expand=True, fill="x", pady=(30, 20))
+
+        ttk.Label(
+            form_frame, text="Faltas seguidas desde:", font=("Sans-Serif", 11)
+        ).pack(side="left", padx=(0, 10))
+        racha_minima = ttk.Spinbox(form_frame, from_=1, to=60, width=5)
+        racha_minima.set(3)
+        racha_minima.pack(side="left", padx=(0, 20))
+
+        ttk.Label(
+            form_frame, text="% de asistencia menor a:", font=("Sans-Serif", 11)
+        ).pack(side="left", padx=(0, 10))
+        porcentaje_minimo = ttk.Spinbox(form_frame, from_=0, to=100, width=5)
+        porcentaje_minimo.set(85)
+        porcentaje_minimo.pack(side="left", padx=(0, 20))
+
+        coldata = [
+            {"text": "ID", "stretch": True},
+            {"text": "Código", "stretch": True},
+            {"text": "Alumno", "stretch": True},
+            {"text": "Grado", "stretch": True},
+            {"text": "Sección", "stretch": True},
+            {"text": "Faltas seguidas", "stretch": True},
+            {"text": "Racha máxima", "stretch": True},
+            {"text": "% Asistencia", "stretch": True},
+            {"text": f"% Últimos {VENTANA_DIAS} días", "stretch": True},
+        ]
+
+        def filas_alertas():
+            """Procesar los días pendientes y filtrar con los umbrales"""
+            try:
+                racha = int(racha_minima.get())
+                porcentaje = float(porcentaje_minimo.get())
+            except ValueError:
+                self.display_error_box("Los umbrales deben ser números")
+                return []
+
+            return self.escuela.reportes.alertas(racha, porcentaje)
+
+        def ver_reporte():
+            """Abrir el reporte del alumno seleccionado"""
+            selection = dt.view.selection()
+            if len(selection) == 0:
+                self.display_error_box("Selecciona un alumno de la tabla")
+                return
+
+            alumno_id = dt.get_row(iid=selection[0]).values[0]
+            alumno = self.indice_nombres.alumnos.get(int(alumno_id))
+            if alumno is not None:
+                self.set_reporte_alumno_table(alumno)
+
+        ttk.Button(
+            form_frame,
+            text="Actualizar",
+            bootstyle=PRIMARY,
+            command=lambda: dt.build_table_data(coldata, filas_alertas()),
+        ).pack(side="left")
+
+        ttk.Label(
+            self.main_frame,
+            text="Calculado con los días lectivos del calendario escolar hasta ayer. "
+            "Haz click derecho en una cabecera para ordenar.",
+            font=("Sans-serif", 10),
+            justify="left",
+            anchor="nw",
+        ).pack(expand=True, fill="x")
+
+        dt = Tableview(
+            master=self.main_frame,
+            coldata=coldata,
+            rowdata=filas_alertas(),
+            paginated=True,
+            searchable=True,
+            bootstyle=PRIMARY,
+            autofit=True,
+            autoalign=True,
+        )
+        dt.pack(fill=BOTH, expand=YES, padx=10, pady=10)
+
+        ttk.Button(
+            self.main_frame,
+            text="Ver reporte del alumno",
+            bootstyle=INFO,
+            command=ver_reporte,
+        ).pack(pady=10)
+
+        # Al volver, procesar los días nuevos con los mismos umbrales
+        self.al_mostrar(lambda: dt.build_table_data(coldata, filas_alertas()))
+
+    def set_puntualidad_view(self):
+        """Tardanzas y permanencia por alumno, sección o mes"""
+        from ttkbootstrap.tableview import Tableview
+
+        if self.reset_view(
+            "Puntualidad", is_expand=False, padding=15, clave="puntualidad"
+        ):
+            return
+
+        year = datetime.now().year
+        agrupaciones = {"Por alumno": "alumno", "Por sección": "seccion", "Por mes": "mes"}
+
+        # Grados
+        filtros_frame = ttk.Frame(self.main_frame)
+        filtros_frame.pack(expand=True, fill="x", pady=(30, 10))
+
+        combobox_grados = ttk.Combobox(
+            filtros_frame,
+            bootstyle="primary",
+            state="readonly",
+        )
+        combobox_grados.set("Todos los grados")
+        combobox_grados.pack(padx=(0, 20), side="left")
+
+        combobox_secciones = ttk.Combobox(
+            filtros_frame,
+            bootstyle="primary",
+            state="readonly",
+        )
+        combobox_secciones.set("Todas las secciones")
+        combobox_secciones.pack(padx=(0, 20), side="left")
+
+        combobox_meses = ttk.Combobox(
+            filtros_frame,
+            bootstyle="primary",
+            values=["Todo el año", *MESES_ES],
+            state="readonly",
+        )
+        combobox_meses.set(MESES_ES[datetime.now().month - 1])
+        combobox_meses.pack(padx=(0, 20), side="left")
+
+        combobox_agrupar = ttk.Combobox(
+            filtros_frame,
+            bootstyle="primary",
+            values=list(agrupaciones.keys()),
+            state="readonly",
+        )
+        combobox_agrupar.set("Por alumno")
+        combobox_agrupar.pack(padx=(0, 20), side="left")
+
+        # Horario de ingreso del grado
+        horario_frame = ttk.Frame(self.main_frame)
+        horario_frame.pack(expand=True, fill="x", pady=(0, 10))
+
+        ttk.Label(
+            horario_frame, text="Hora de ingreso (HH:MM):", font=("Sans-Serif", 11)
+        ).pack(side="left", padx=(0, 10))
+        hora_inicio = ttk.Entry(horario_frame, width=8)
+        hora_inicio.insert(0, formatear_hora(HORA_INICIO_DEFECTO))
+        hora_inicio.pack(side="left", padx=(0, 20))
+
+        ttk.Label(
+            horario_frame, text="Tolerancia (minutos):", font=("Sans-Serif", 11)
+        ).pack(side="left", padx=(0, 10))
+        tolerancia = ttk.Spinbox(horario_frame, from_=0, to=120, width=5)
+        tolerancia.set(TOLERANCIA_DEFECTO // 60)
+        tolerancia.pack(side="left", padx=(0, 20))
+
+        def mostrar_horario(event=None):
+            """Mostrar el horario configurado del grado seleccionado"""
+            grado_id = self.grados.grado_id(combobox_grados.get())
+            inicio, segundos = self.escuela.reportes.horarios().get(
+                grado_id, (HORA_INICIO_DEFECTO, TOLERANCIA_DEFECTO)
+            )
+            hora_inicio.delete(0, END)
+            hora_inicio.insert(0, formatear_hora(inicio))
+            tolerancia.set(segundos // 60)
+
+        def guardar():
+            """Guardar el horario del grado seleccionado"""
+            grado_id = self.grados.grado_id(combobox_grados.get())
+            if grado_id is None:
+                self.display_error_box("Selecciona un grado para configurar su horario")
+                return
+
+            try:
+                inicio = leer_hora(hora_inicio.get())
+                minutos = int(tolerancia.get())
+            except ValueError:
+                self.display_error_box("Hora o tolerancia inválida")
+                return
+
+            self.escuela.reportes.guardar_horario(grado_id, inicio, minutos * 60)
+            self.display_success_toast("Horario guardado")
+
+        combobox_grados.bind("<<ComboboxSelected>>", mostrar_horario)
+        self.enlazar_grado_seccion(
+            combobox_grados,
+            combobox_secciones,
+            todos="Todos los grados",
+            todas="Todas las secciones",
+        )
+
+        ttk.Button(
+            horario_frame,
+            text="Guardar horario del grado",
+            bootstyle=INFO,
+            command=guardar,
+        ).pack(side="left")
+
+        def filtros_reporte():
+            """Periodo, agrupación, grado y sección seleccionados"""
+            mes = combobox_meses.get()
+            if mes in MESES_ES:
+                mes_num = MESES_ES.index(mes) + 1
+                desde = date(year, mes_num, 1)
+                hasta = date(year, mes_num, monthrange(year, mes_num)[1])
+            else:
+                desde, hasta = date(year, 1, 1), date(year, 12, 31)
+
+            grado = combobox_grados.get()
+            seccion = combobox_secciones.get()
+            return (
+                desde,
+                hasta,
+                agrupaciones[combobox_agrupar.get()],
+                self.grados.grado_id(grado),
+                seccion if seccion != "Todas las secciones" else None,
+            )
+
+        def datos_reporte():
+            """Cabeceras y filas según los filtros seleccionados"""
+            return self.escuela.reportes.puntualidad(*filtros_reporte())
+
+        def exportar_reporte():
+            """Exportar el resumen con los filtros leídos ahora (no desde el hilo)"""
+            filtros = filtros_reporte()
+            self.export_to_excel(
+                f"Puntualidad {filtros[0].isoformat()} {filtros[1].isoformat()}",
+                lambda reportes: reportes.exportar_puntualidad(*filtros),
+            )
+
+        def mostrar_reporte():
+            """Volver a calcular la tabla"""
+            cabeceras, filas = datos_reporte()
+            dt.build_table_data(
+                [{"text": cabecera, "stretch": True} for cabecera in cabeceras], filas
+            )
+
+        ttk.Button(
+            filtros_frame,
+            text="Ver reporte",
+            bootstyle=PRIMARY,
+            command=mostrar_reporte,
+        ).pack(side="left")
+
+        cabeceras, filas = datos_reporte()
+        dt = Tableview(
+            master=self.main_frame,
+            coldata=[{"text": cabecera, "stretch": True} for cabecera in cabeceras],
+            rowdata=filas,
+            paginated=True,
+            searchable=True,
+            bootstyle=PRIMARY,
+            autofit=True,
+            autoalign=True,
+        )
+        dt.pack(fill=BOTH, expand=YES, padx=10, pady=10)
+
+        ttk.Button(
+            self.main_frame,
             text="Exportar a Excel",
+            command=exportar_reporte,
             bootstyle=SUCCESS,
-            command=lambda: self.export_to_excel_3(tables, grado, seccion),
-        )
-        export_button.place(relx=1.0, y=25, x=-30, anchor="ne")
+        ).pack(pady=10)
+
+        self.al_mostrar(mostrar_reporte)
 
     def set_reporte_alumno_view(self):
         """Buscar un alumno por nombre y mostrar su reporte de asistencias en otra vista"""
-        self.reset_view("Buscar por alumno")
+        from ttkbootstrap.scrolled import ScrolledFrame
+
+        if self.reset_view("Buscar por alumno", clave="reporte_alumno"):
+            return
 
         # Debajo del título
         ttk.Label(
@@ -846,64 +1517,89 @@ class Main:
         frame_resultados.hide_scrollbars()
         frame_resultados.disable_scrolling()
 
+        # Estilo de los resultados y estado de la búsqueda
+        stylebtn = ttk.Style()
+        stylebtn.configure("Custom.TButton", font=("Sans-Serif", 11))
+        self.busqueda_pendiente = None
+        self.busqueda_anterior = None
+        self.botones_resultado = []
+
+        def programar_busqueda():
+            """Esperar a que se deje de escribir antes de buscar"""
+            if self.busqueda_pendiente is not None:
+                self.wind.after_cancel(self.busqueda_pendiente)
+            self.busqueda_pendiente = self.wind.after(
+                RETARDO_BUSQUEDA_MS,
+                lambda: self.set_reporte_alumno_opciones(
+                    nombre_alumno.get(), frame_resultados
+                ),
+            )
+
         # Evento KeyPress
-        nombre_alumno.bind(
-            "<KeyRelease>",
-            lambda event: self.set_reporte_alumno_opciones(
-                nombre_alumno.get(), frame_resultados
-            ),
-        )
+        nombre_alumno.bind("<KeyRelease>", lambda event: programar_busqueda())
 
         # Evento Ctrl + Delete
         nombre_alumno.bind(
             "<Control-BackSpace>", lambda event: nombre_alumno.delete(0, END)
         )
 
+        def al_mostrar():
+            """Repetir la búsqueda escrita por si cambiaron los alumnos"""
+            nombre_alumno.focus()
+            self.busqueda_anterior = None
+            self.set_reporte_alumno_opciones(nombre_alumno.get(), frame_resultados)
+
+        self.al_mostrar(al_mostrar)
+
+    def buscar_alumnos_por_nombre(self, nombre):
+        """Alumnos cuyos nombres o apellidos empiezan con las palabras buscadas"""
+        # Si solo se agregaron letras, basta con buscar entre los resultados anteriores
+        anterior = self.busqueda_anterior
+        candidatos = None
+        if anterior is not None and nombre.startswith(anterior[0]) and anterior[2]:
+            candidatos = {alumno[0] for alumno in anterior[1]}
+
+        match = self.indice_nombres.buscar(
+            nombre, limite=LIMITE_BUSQUEDA + 1, candidatos=candidatos
+        )
+
+        completo = len(match) <= LIMITE_BUSQUEDA
+        self.busqueda_anterior = (nombre, match, completo)
+        return match
+
     def set_reporte_alumno_opciones(self, nombre, resultados_frame):
         """Mostrar opciones debajo del buscador"""
-        # Limpiar resultados anteriores
-        for widget in resultados_frame.winfo_children():
-            widget.destroy()
+        self.busqueda_pendiente = None
+        nombre = nombre.strip().upper()
 
         if nombre:
-            match = self.run_query(
-                """
-                SELECT
-                    a.alumno_id,
-                    a.codigo,
-                    a.nombres,
-                    a.apellido_paterno,
-                    a.apellido_materno,
-                    g.grado,
-                    dg.seccion
-                FROM
-                    alumnos a
-                INNER JOIN detalle_grados dg 
-                    ON
-                    dg.detalle_grado_id = a.detalle_grado_id
-                INNER JOIN grados g 
-                    ON
-                    g.grado_id = dg.grado_id
-                WHERE
-                    nombres LIKE ?
-                    OR apellido_paterno LIKE ?
-                    OR apellido_materno LIKE ?
-            """,
-                [f"%{nombre}%", f"%{nombre}%", f"%{nombre}%"],
-            ).fetchall()
-
-            stylebtn = ttk.Style()
-            stylebtn.configure("Custom.TButton", font=("Sans-Serif", 11))
-
-            for alumno in match:
+            match = self.buscar_alumnos_por_nombre(nombre)[:MAX_RESULTADOS]
+        else:
+            self.busqueda_anterior = None
+            match = []
+
+        # Reutilizar los botones ya creados y crear solo los que falten
+        while len(self.botones_resultado) < len(match):
+            self.botones_resultado.append(
                 ttk.Button(
                     resultados_frame,
-                    text=f'{alumno[2]} {alumno[3]} {alumno[4]} - {alumno[5]} "{alumno[6]}"',
                     bootstyle=INFO,
-                    command=lambda alumno=alumno: self.set_reporte_alumno_table(alumno),
                     style="Custom.TButton",
                     padding=10,
-                ).pack(fill="x", expand=True)
+                )
+            )
+
+        for boton, alumno in zip(self.botones_resultado, match):
+            boton.configure(
+                text=f'{alumno[2]} {alumno[3]} {alumno[4]} - {alumno[5]} "{alumno[6]}"',
+                command=lambda alumno=alumno: self.set_reporte_alumno_table(alumno),
+            )
+            boton.pack(fill="x", expand=True)
+
+        for boton in self.botones_resultado[len(match) :]:
+            boton.pack_forget()
+
+        if match:
             resultados_frame.show_scrollbars()
             resultados_frame.enable_scrolling()
         else:
@@ -913,6 +1609,8 @@ class Main:
 
     def set_reporte_alumno_table(self, alumno):
         """Mostrar vista con el reporte de asistencia del alumno especificado"""
+        from ttkbootstrap.tableview import Tableview
+
         self.reset_view("Reporte por alumno")
         self.set_change_view_link_corner(
             "Volver al buscador", self.set_reporte_alumno_view
@@ -948,12 +1646,9 @@ class Main:
         ).pack(expand=True, fill="x")
 
         # Asistencias del alumno seleccionado
-        asistencias = self.run_query(
-            "SELECT hora_entrada, hora_salida, fecha FROM asistencias WHERE alumno_id = ?",
-            [alumno[0]],
-        ).fetchall()
+        rowdata = self.escuela.reportes.alumno(alumno[0])
 
-        if len(asistencias) == 0:
+        if len(rowdata) == 0:
             ttk.Label(
                 self.main_frame,
                 text="No existen asistencias registradas para este alumno",
@@ -964,49 +1659,7 @@ class Main:
             ).pack(expand=True, fill="x")
             return
 
-        coldata = [
-            {"text": "Año", "stretch": True},
-            {"text": "Mes", "stretch": True},
-            {"text": "Día", "stretch": True},
-            {"text": "Entrada", "stretch": True},
-            {"text": "Salida", "stretch": True},
-        ]
-
-        months_in_spanish = {
-            1: "Enero",
-            2: "Febrero",
-            3: "Marzo",
-            4: "Abril",
-            5: "Mayo",
-            6: "Junio",
-            7: "Julio",
-            8: "Agosto",
-            9: "Septiembre",
-            10: "Octubre",
-            11: "Noviembre",
-            12: "Diciembre",
-        }
-        rowdata = []
-
-        for asistencia in asistencias:
-            entrada = datetime.strptime(asistencia[0], "%H:%M:%S")
-
-            if asistencia[1] not in (None, ""):
-                salida = datetime.strptime(asistencia[1], "%H:%M:%S").strftime(
-                    "%I:%M:%S %p"
-                )
-            else:
-                salida = ""
-
-            fecha = datetime.strptime(asistencia[2], "%Y-%m-%d")
-            row = (
-                fecha.year,
-                months_in_spanish[fecha.month],
-                fecha.day,
-                entrada.strftime("%I:%M:%S %p"),
-                salida,
-            )
-            rowdata.append(row)
+        coldata = [{"text": cabecera, "stretch": True} for cabecera in CABECERAS_ALUMNO]
 
         ttk.Label(
             self.main_frame,
@@ -1039,7 +1692,8 @@ class Main:
             self.main_frame,
             text="Exportar a Excel",
             command=lambda: self.export_to_excel(
-                dt, alumno_nombre, alumno[5], alumno[6]
+                f"{alumno[2]} {alumno[3]} {alumno[4]}",
+                lambda reportes: reportes.exportar_alumno(alumno),
             ),
             bootstyle=SUCCESS,
         )
@@ -1047,7 +1701,8 @@ class Main:
 
     def set_reporte_grado_view(self):
         """Vista del reporte por grado, seccion y fecha"""
-        self.reset_view("Reporte por grado y sección")
+        if self.reset_view("Reporte por grado y sección", clave="reporte_grado"):
+            return
 
         # Debajo del título
         ttk.Label(
@@ -1057,26 +1712,21 @@ class Main:
         ).pack(fill="x", pady=(30, 20))
 
         # Grados
-        grados = self.run_query(
-            "SELECT grado_id, grado FROM grados WHERE grado_id >= 7"
-        ).fetchall()
-        grados_dict = {grado: grado_id for grado_id, grado in grados}
         combobox_grados = ttk.Combobox(
             self.main_frame,
             bootstyle="primary",
-            values=list(grados_dict.keys()),
             state="readonly",
         )
         combobox_grados.set("Grado")
         combobox_grados.pack(pady=20, padx=20, side="left")
 
         # Secciones
-        secciones = ["A", "B", "C", "D", "E", "F", "G", "H", "I"]
         combobox_secciones = ttk.Combobox(
-            self.main_frame, bootstyle="primary", values=secciones, state="readonly"
+            self.main_frame, bootstyle="primary", state="readonly"
         )
         combobox_secciones.set("Sección")
         combobox_secciones.pack(pady=20, padx=20, side="left")
+        self.enlazar_grado_seccion(combobox_grados, combobox_secciones)
 
         # Fecha
         date_entry = ttk.DateEntry(
@@ -1094,7 +1744,7 @@ class Main:
                 return
 
             self.set_reporte_grado_table(
-                grados_dict[grado],
+                self.grados.grado_id(grado),
                 grado,
                 seccion,
                 fecha,
@@ -1110,6 +1760,8 @@ class Main:
 
     def set_reporte_grado_table(self, grado_id, grado, seccion, fecha):
         """Mostrar tabla con datos de la búsqueda por grado, seccion y fecha"""
+        from ttkbootstrap.tableview import Tableview
+
         self.reset_view(grado)
         self.set_change_view_link_corner(
             "Volver al buscador", self.set_reporte_grado_view
@@ -1138,30 +1790,9 @@ class Main:
         ).pack(expand=True, fill="x")
 
         # Asistencias del grado y seccion seleccionado
-        asistencias = self.run_query(
-            """
-            SELECT
-                an.hora_entrada,
-                an.hora_salida,
-                al.codigo,
-                al.nombres,
-                al.apellido_paterno,
-                al.apellido_materno
-            FROM
-                asistencias an
-            INNER JOIN alumnos al ON
-                an.alumno_id = al.alumno_id
-            INNER JOIN detalle_grados dg ON
-                al.detalle_grado_id = dg.detalle_grado_id
-            WHERE
-                dg.grado_id = ?
-                AND dg.seccion = ?
-                AND an.fecha = ?;
-            """,
-            [grado_id, seccion, fecha_datetime.strftime("%Y-%m-%d")],
-        ).fetchall()
-
-        if len(asistencias) == 0:
+        rowdata = self.escuela.reportes.diario(grado_id, seccion, fecha_datetime.date())
+
+        if len(rowdata) == 0:
             ttk.Label(
                 self.main_frame,
                 text="No existen asistencias registradas para esta fecha, sección y grado juntos.",
@@ -1172,33 +1803,7 @@ class Main:
             ).pack(expand=True, fill="x")
             return
 
-        coldata = [
-            {"text": "Código", "stretch": True},
-            {"text": "Nombre", "stretch": True},
-            {"text": "Hora de entrada", "stretch": True},
-            {"text": "Hora de salida", "stretch": True},
-            {"text": "Fecha", "stretch": True},
-        ]
-        rowdata = []
-
-        for asistencia in asistencias:
-            entrada = datetime.strptime(asistencia[0], "%H:%M:%S")
-
-            if asistencia[1] is None:
-                salida = ""
-            else:
-                salida = datetime.strptime(asistencia[1], "%H:%M:%S").strftime(
-                    "%I:%M %p"
-                )
-
-            row = (
-                asistencia[2],
-                f"{asistencia[3]} {asistencia[4]} {asistencia[5]}",
-                entrada.strftime("%I:%M %p"),
-                salida,
-                fecha,
-            )
-            rowdata.append(row)
+        coldata = [{"text": cabecera, "stretch": True} for cabecera in CABECERAS_DIA]
 
         ttk.Label(
             self.main_frame,
@@ -1230,16 +1835,26 @@ class Main:
         export_button = ttk.Button(
             self.main_frame,
             text="Exportar a Excel",
-            command=lambda: self.export_to_excel_2(dt, fecha, grado, seccion),
+            command=lambda: self.export_to_excel(
+                f"{grado} {seccion} {fecha}",
+                lambda reportes: reportes.exportar_diario(
+                    grado_id, seccion, fecha_datetime.date()
+                ),
+            ),
             bootstyle=SUCCESS,
         )
         export_button.pack(pady=10)
 
     def set_alumno_add_view(self):
         """Vista para agregar un alumno"""
-        self.reset_view("Crear alumno", is_expand=False, padding=15)
+        from ttkbootstrap.scrolled import ScrolledFrame
+
+        if self.reset_view(
+            "Crear alumno", is_expand=False, padding=15, clave="alumno_nuevo"
+        ):
+            return
 
-        form_frame = ScrolledFrame(self.wind, autohide=True)
+        form_frame = ScrolledFrame(self.vista, autohide=True)
         form_frame.pack(expand=True, fill="both")
 
         # codigo
@@ -1321,14 +1936,9 @@ class Main:
             font=("Sans-Serif", 12),
         ).pack(pady=(0, 15))
 
-        grados = self.run_query(
-            "SELECT grado_id, grado FROM grados WHERE grado_id >= 7"
-        ).fetchall()
-        grados_dict = {grado: grado_id for grado_id, grado in grados}
         combobox_grados = ttk.Combobox(
             grados_frame,
             bootstyle="primary",
-            values=list(grados_dict.keys()),
             state="readonly",
         )
         combobox_grados.set("Grado")
@@ -1344,12 +1954,14 @@ class Main:
             font=("Sans-Serif", 12),
         ).pack(pady=(0, 15))
 
-        secciones = ["A", "B", "C", "D", "E", "F", "G", "H", "I"]
         combobox_secciones = ttk.Combobox(
-            secciones_frame, bootstyle="primary", values=secciones, state="readonly"
+            secciones_frame, bootstyle="primary", state="readonly"
         )
         combobox_secciones.set("Sección")
         combobox_secciones.pack(pady=0, padx=0, side="left")
+        actualizar_secciones = self.enlazar_grado_seccion(
+            combobox_grados, combobox_secciones
+        )
 
         def set_validate_report():
             """Validar los datos y mostrar el reporte"""
@@ -1377,7 +1989,7 @@ class Main:
                 paterno_val,
                 materno_val,
                 fecha,
-                grados_dict[grado],
+                self.grados.grado_id(grado),
                 seccion,
             )
 
@@ -1389,94 +2001,137 @@ class Main:
             command=set_validate_report,
         ).pack(expand=True, fill="none", pady=20)
 
+        def limpiar_formulario():
+            """Dejar el formulario en blanco para el siguiente alumno"""
+            for entry in (codigo, nombres, paterno, materno):
+                entry.delete(0, END)
+            combobox_grados.set("Grado")
+            combobox_secciones.set("Sección")
+            actualizar_secciones()
+            codigo.focus()
+
+        self.al_mostrar(limpiar_formulario)
+
     def set_alumnos_view(self):
         """Ver todos los alumnos"""
-        self.reset_view("Alumnos", is_expand=False, padding=15)
-        # Asistencias del alumno seleccionado
-        alumnos = self.run_query(
-            """
-            SELECT
-                al.alumno_id,
-                al.codigo,
-                al.nombres,
-                al.apellido_paterno,
-                al.apellido_materno,
-                al.fecha_ingreso,
-                g.grado,
-                dg.seccion
-            FROM
-                alumnos al
-            INNER JOIN detalle_grados dg ON
-                al.detalle_grado_id = dg.detalle_grado_id
-            INNER JOIN grados g ON
-                dg.grado_id = g.grado_id
-            ORDER BY al.alumno_id ASC
-            """,
-            [],
-        ).fetchall()
+        if self.reset_view("Alumnos", is_expand=False, padding=15, clave="alumnos"):
+            return
 
-        coldata = [
-            {"text": "ID", "stretch": True},
-            {"text": "Código", "stretch": True},
-            {"text": "Nombres", "stretch": True},
-            {"text": "Apellido paterno", "stretch": True},
-            {"text": "Apellido materno", "stretch": True},
-            {"text": "Fecha de ingreso", "stretch": True},
-            {"text": "Grado", "stretch": True},
-            {"text": "Sección", "stretch": True},
+        # Solo se trae de la base de datos la página visible
+        paginador = self.escuela.alumnos.paginador(tamano_pagina=30)
+
+        columnas = [
+            ("alumno_id", "ID"),
+            ("codigo", "Código"),
+            ("nombres", "Nombres"),
+            ("apellido_paterno", "Apellido paterno"),
+            ("apellido_materno", "Apellido materno"),
+            ("fecha_ingreso", "Fecha de ingreso"),
+            ("grado", "Grado"),
+            ("seccion", "Sección"),
         ]
 
-        table_frame = ttk.Frame(self.wind)
-        table_frame.pack(expand=True, fill="both", padx=5, pady=5)
-        table_frame.configure(width=100, height=400)
-
-        scrolled_frame = ScrolledFrame(table_frame, autohide=False)
-        scrolled_frame.pack(expand=True, fill="both")
+        table_frame = ttk.Frame(self.vista)
+        table_frame.pack(expand=True, fill="both", padx=60, pady=5)
 
         ttk.Label(
-            scrolled_frame,
-            text="- Utiliza el scroll mouse (rueda) para navegar hacia abajo en la tabla.",
+            table_frame,
+            text="- Escribe y presiona ENTER para buscar por código, nombres o apellidos.",
             font=("Sans-serif", 10),
             justify="left",
             anchor="nw",
-        ).pack(fill="x", padx=60, pady=10)
+        ).pack(fill="x", pady=10)
 
         ttk.Label(
-            scrolled_frame,
-            text="- Escribe y presiona ENTER para buscar.",
+            table_frame,
+            text="- Haz click en una cabecera para ordenar por esa columna.",
             font=("Sans-serif", 10),
             justify="left",
             anchor="nw",
-        ).pack(fill="x", padx=60, pady=10)
+        ).pack(fill="x", pady=(0, 10))
 
-        def delete_alumno():
-            """Eliminar alumno"""
-            selection = dt.view.selection()[0]
-            row_data = dt.get_row(iid=selection).values
-            alumno_id = row_data[0]
+        buttons_frame = ttk.Frame(table_frame)
+        buttons_frame.pack(fill="x")
 
-            deleted = self.run_query(
-                "DELETE FROM alumnos WHERE alumno_id = ?", [alumno_id]
+        # Buscador
+        busqueda = ttk.Entry(buttons_frame, font=("Sans-Serif", 11), width=40)
+        busqueda.pack(side="left", pady=20)
+
+        tree = ttk.Treeview(
+            table_frame,
+            columns=[clave for clave, _ in columnas],
+            show="headings",
+            bootstyle=PRIMARY,
+            height=30,
+        )
+
+        paginacion_frame = ttk.Frame(table_frame)
+        info_pagina = ttk.Label(paginacion_frame, font=("Sans-serif", 10))
+
+        def mostrar_pagina(filas):
+            """Reemplazar las filas visibles por las de la página"""
+            tree.delete(*tree.get_children())
+            for fila in filas:
+                tree.insert(
+                    "",
+                    END,
+                    iid=fila[0],
+                    values=[valor if valor is not None else "" for valor in fila],
+                )
+
+            boton_anterior.configure(
+                state="normal" if paginador.hay_anterior else "disabled"
+            )
+            boton_siguiente.configure(
+                state="normal" if paginador.hay_siguiente else "disabled"
             )
+            info_pagina.configure(
+                text=f"Página {paginador.numero_pagina} - {paginador.total()} alumnos"
+            )
+
+        def ordenar_por(clave):
+            """Ordenar la tabla por la columna seleccionada"""
+            if clave == "seccion":
+                clave = "grado"
+            mostrar_pagina(paginador.alternar_orden(clave))
+
+        for clave, titulo in columnas:
+            tree.heading(
+                clave,
+                text=titulo,
+                anchor="center",
+                command=lambda clave=clave: ordenar_por(clave),
+            )
+            tree.column(clave, anchor="center", stretch=True)
+
+        def fila_seleccionada():
+            """ID del alumno seleccionado en la tabla"""
+            selection = tree.selection()
+            if len(selection) == 0:
+                self.display_error_box("Selecciona un alumno de la tabla")
+                return None
+            return int(selection[0])
+
+        def delete_alumno():
+            """Eliminar alumno"""
+            alumno_id = fila_seleccionada()
+            if alumno_id is None:
+                return None
 
-            if deleted:
+            if self.escuela.eliminar_alumno(alumno_id):
                 self.display_success_toast("Alumno eliminado")
-                # self.set_alumnos_view()
-                return dt.delete_row(iid=selection)
+                return mostrar_pagina(paginador.pagina_actual(recontar=True))
 
             return self.display_error_box("Error interno al eliminar un alumno")
 
         def edit_alumno():
-            """Eliminar alumno"""
-            selection = dt.view.selection()[0]
-            row_data = dt.get_row(iid=selection).values
-            alumno_id = row_data[0]
+            """Editar alumno"""
+            alumno_id = fila_seleccionada()
+            if alumno_id is None:
+                return
 
             self.set_alumno_edit_view(alumno_id)
 
-        buttons_frame = ttk.Frame(scrolled_frame)
-        buttons_frame.pack(expand=True, fill="x", padx=60)
-
         ttk.Button(
             buttons_frame,
             text="Eliminar seleccionado",
@@ -1491,55 +2146,46 @@ class Main:
             bootstyle=PRIMARY,
         ).pack(pady=20, padx=10, fill="none", side="right")
 
-        # Crear tabla
-        dt = Tableview(
-            master=scrolled_frame,
-            coldata=coldata,
-            rowdata=alumnos,
-            paginated=True,
-            searchable=True,
+        tree.pack(fill="both", expand=True)
+
+        # Controles de paginación
+        paginacion_frame.pack(fill="x", pady=10)
+        boton_anterior = ttk.Button(
+            paginacion_frame,
+            text="Anterior",
             bootstyle=PRIMARY,
-            autofit=True,
-            autoalign=True,
-            height=30,
-            pagesize=30,
+            command=lambda: mostrar_pagina(paginador.pagina_anterior()),
+        )
+        boton_anterior.pack(side="left")
+        boton_siguiente = ttk.Button(
+            paginacion_frame,
+            text="Siguiente",
+            bootstyle=PRIMARY,
+            command=lambda: mostrar_pagina(paginador.pagina_siguiente()),
         )
-        dt.pack(fill="both", expand=True, padx=60, pady=0)
-        dt.config(width=80)
+        boton_siguiente.pack(side="left", padx=10)
+        info_pagina.pack(side="left", padx=10)
 
-        # Centrar cabeceras y filas de la tabla
-        for col_id in dt.view["columns"]:
-            dt.view.column(col_id, anchor="center")
-            dt.view.heading(col_id, anchor="center")
+        busqueda.bind(
+            "<Return>",
+            lambda event: mostrar_pagina(paginador.configurar(busqueda=busqueda.get())),
+        )
+        busqueda.bind("<Control-BackSpace>", lambda event: busqueda.delete(0, END))
+
+        mostrar_pagina(paginador.pagina_actual())
+
+        # Al volver (por ejemplo, después de editar) conservar búsqueda, orden y página
+        self.al_mostrar(lambda: mostrar_pagina(paginador.pagina_actual(recontar=True)))
 
     def set_alumno_edit_view(self, alumno_id):
         """Editar alumno"""
-        alumno = self.run_query(
-            """
-            SELECT
-                al.alumno_id,
-                al.codigo,
-                al.nombres,
-                al.apellido_paterno,
-                al.apellido_materno,
-                al.fecha_ingreso,
-                g.grado,
-                dg.seccion
-            FROM
-                alumnos al
-            INNER JOIN detalle_grados dg ON
-                dg.detalle_grado_id = al.detalle_grado_id
-            INNER JOIN grados g ON
-                dg.grado_id = g.grado_id
-            WHERE
-                alumno_id = ?
-            """,
-            [alumno_id],
-        ).fetchone()
+        from ttkbootstrap.scrolled import ScrolledFrame
+
+        alumno = self.escuela.alumnos.obtener(alumno_id)
         self.reset_view("Editar alumno", is_expand=False, padding=15)
         self.set_change_view_link_corner("Regresar", self.set_alumnos_view)
 
-        form_frame = ScrolledFrame(self.wind, autohide=True)
+        form_frame = ScrolledFrame(self.vista, autohide=True)
         form_frame.pack(expand=True, fill="both")
 
         # codigo
@@ -1629,14 +2275,9 @@ class Main:
             font=("Sans-Serif", 12),
         ).pack(pady=(0, 15))
 
-        grados = self.run_query(
-            "SELECT grado_id, grado FROM grados WHERE grado_id >= 7"
-        ).fetchall()
-        grados_dict = {grado: grado_id for grado_id, grado in grados}
         combobox_grados = ttk.Combobox(
             grados_frame,
             bootstyle="primary",
-            values=list(grados_dict.keys()),
             state="readonly",
         )
         combobox_grados.pack(side="left")
@@ -1651,12 +2292,14 @@ class Main:
             font=("Sans-Serif", 12),
         ).pack(pady=(0, 15))
 
-        secciones = ["A", "B", "C", "D", "E", "F", "G", "H", "I"]
         combobox_secciones = ttk.Combobox(
-            secciones_frame, bootstyle="primary", values=secciones, state="readonly"
+            secciones_frame, bootstyle="primary", state="readonly"
         )
         combobox_secciones.set("Sección")
         combobox_secciones.pack(pady=0, padx=0, side="left")
+        actualizar_secciones = self.enlazar_grado_seccion(
+            combobox_grados, combobox_secciones
+        )
 
         def set_validate_report():
             """Validar los datos y mostrar el reporte"""
@@ -1685,7 +2328,7 @@ class Main:
                 paterno_val,
                 materno_val,
                 fecha,
-                grados_dict[grado],
+                self.grados.grado_id(grado),
                 seccion,
             )
 
@@ -1693,8 +2336,10 @@ class Main:
         nombres.insert(0, alumno[2])
         paterno.insert(0, alumno[3])
         materno.insert(0, alumno[4])
-        combobox_grados.set(alumno[6])
-        combobox_secciones.set(alumno[7])
+        # Sin grado ni sección válidos: se eligen de nuevo
+        combobox_grados.set(alumno[6] or "Grado")
+        actualizar_secciones()
+        combobox_secciones.set(alumno[7] or "Sección")
 
         ttk.Button(
             form_frame,
@@ -1704,6 +2349,541 @@ class Main:
             command=set_validate_report,
         ).pack(expand=True, fill="none", pady=20)
 
+    def set_diagnostico_view(self):
+        """Métricas de rendimiento: escaneos, consultas, cachés y memoria"""
+        from ttkbootstrap.tableview import Tableview
+
+        if self.reset_view(
+            "Diagnóstico", is_expand=False, padding=15, clave="diagnostico"
+        ):
+            return
+
+        resumen = ttk.Label(
+            self.main_frame, font=("Sans-serif", 11), justify="left", anchor="nw"
+        )
+        resumen.pack(expand=True, fill="x", pady=(20, 10))
+
+        coldata_vistas = [
+            {"text": "Vista", "stretch": True},
+            {"text": "Aperturas", "stretch": True},
+            {"text": "Consultas", "stretch": True},
+            {"text": "Tiempo (ms)", "stretch": True},
+            {"text": "Consultas por apertura", "stretch": True},
+        ]
+        coldata_tiempos = [
+            {"text": "Operación", "stretch": True},
+            {"text": "Muestras", "stretch": True},
+            {"text": "Promedio (ms)", "stretch": True},
+            {"text": "Máximo (ms)", "stretch": True},
+        ]
+
+        def filas_vistas():
+            """Consultas por vista, redondeadas para mostrar"""
+            return [
+                (vista, aperturas, consultas, round(total, 1), round(por_apertura, 1))
+                for vista, aperturas, consultas, total, por_apertura in (
+                    self.consultas.resumen_vistas()
+                )
+            ]
+
+        def filas_tiempos():
+            """Reportes y exportaciones recientes"""
+            return [
+                (nombre, muestras, round(promedio, 1), round(maximo, 1))
+                for nombre, muestras, promedio, maximo in metricas.tiempos()
+                if not nombre.startswith("escaneo.")
+            ]
+
+        def texto_resumen():
+            """Escaneos, latencia, base de datos, memoria y cachés"""
+            entradas = metricas.por_minuto("escaneo.entrada")
+            salidas = metricas.por_minuto("escaneo.salida")
+            latencia = metricas.percentiles("escaneo.entrada", "escaneo.salida")
+            db, wal = tamano_db(self.db_name)
+            memoria = memoria_bytes()
+            caches = " · ".join(
+                f"{nombre} {porcentaje:.0f}% ({aciertos}/{aciertos + fallos})"
+                for nombre, aciertos, fallos, porcentaje in metricas.caches()
+            )
+            consultas = sum(fila[2] for fila in self.consultas.resumen_vistas())
+
+            lineas = [
+                f"Escaneos en el último minuto: {entradas + salidas} "
+                f"(entradas {entradas}, salidas {salidas})",
+                "Latencia de escaneo: "
+                + (
+                    " · ".join(f"p{p} {ms:.1f} ms" for p, ms in latencia.items())
+                    or "sin escaneos"
+                ),
+                f"Base de datos: {db / 2**20:.1f} MB · WAL: {wal / 2**20:.1f} MB",
+                "Memoria: "
+                + ("no disponible" if memoria is None else f"{memoria / 2**20:.1f} MB"),
+                f"Cachés: {caches or 'sin uso'}",
+                f"Consultas: {consultas} "
+                f"({self.consultas.lentas} de más de {self.consultas.umbral_ms} ms, "
+                f"ver {self.consultas.archivo})",
+            ]
+            return "\n".join(lineas)
+
+        ttk.Label(
+            self.main_frame, text="Consultas por vista", font=("Sans-serif", 12)
+        ).pack(expand=True, fill="x", pady=(10, 0))
+        dt_vistas = Tableview(
+            master=self.main_frame,
+            coldata=coldata_vistas,
+            rowdata=filas_vistas(),
+            paginated=True,
+            searchable=False,
+            bootstyle=PRIMARY,
+            autofit=True,
+            autoalign=True,
+        )
+        dt_vistas.pack(fill=BOTH, expand=YES, padx=10, pady=10)
+
+        ttk.Label(
+            self.main_frame,
+            text="Reportes y exportaciones",
+            font=("Sans-serif", 12),
+        ).pack(expand=True, fill="x", pady=(10, 0))
+        dt_tiempos = Tableview(
+            master=self.main_frame,
+            coldata=coldata_tiempos,
+            rowdata=filas_tiempos(),
+            paginated=True,
+            searchable=False,
+            bootstyle=PRIMARY,
+            autofit=True,
+            autoalign=True,
+        )
+        dt_tiempos.pack(fill=BOTH, expand=YES, padx=10, pady=10)
+
+        pendiente = [None]
+
+        def actualizar_resumen():
+            """Refrescar el resumen mientras la vista esté visible"""
+            if pendiente[0] is not None:
+                self.wind.after_cancel(pendiente[0])
+                pendiente[0] = None
+            if self.clave_vista != "diagnostico":
+                return
+            resumen.config(text=texto_resumen())
+            pendiente[0] = self.wind.after(INTERVALO_DIAGNOSTICO_MS, actualizar_resumen)
+
+        def actualizar():
+            """Refrescar el resumen y las tablas"""
+            dt_vistas.build_table_data(coldata_vistas, filas_vistas())
+            dt_tiempos.build_table_data(coldata_tiempos, filas_tiempos())
+            actualizar_resumen()
+
+        def reiniciar():
+            """Volver a contar desde cero"""
+            metricas.reiniciar()
+            self.consultas.reiniciar()
+            actualizar()
+
+        botones_frame = ttk.Frame(self.main_frame)
+        botones_frame.pack(expand=True, pady=10)
+        ttk.Button(
+            botones_frame, text="Actualizar", bootstyle=PRIMARY, command=actualizar
+        ).pack(side="left", padx=10)
+        ttk.Button(
+            botones_frame, text="Reiniciar", bootstyle=DANGER, command=reiniciar
+        ).pack(side="left", padx=10)
+
+        actualizar_resumen()
+        self.al_mostrar(actualizar)
+
+    def set_promocion_view(self):
+        """Vista previa y aplicación de la promoción de fin de año"""
+        from ttkbootstrap.dialogs.dialogs import Messagebox
+        from ttkbootstrap.tableview import Tableview
+
+        if self.reset_view(
+            "Promoción de fin de año", is_expand=False, padding=15, clave="promocion"
+        ):
+            return
+
+        resumen = ttk.Label(
+            self.main_frame, font=("Sans-serif", 11), justify="left", anchor="nw"
+        )
+        resumen.pack(expand=True, fill="x", pady=(20, 10))
+
+        coldata = [
+            {"text": "Grado actual", "stretch": True},
+            {"text": "Sección", "stretch": True},
+            {"text": "Alumnos", "stretch": True},
+            {"text": "Pasan a", "stretch": True},
+        ]
+        dt = Tableview(
+            master=self.main_frame,
+            coldata=coldata,
+            rowdata=[],
+            paginated=True,
+            searchable=False,
+            bootstyle=PRIMARY,
+            autofit=True,
+            autoalign=True,
+        )
+        dt.pack(fill=BOTH, expand=YES, padx=10, pady=10)
+
+        def actualizar():
+            """Volver a calcular la vista previa"""
+            cambios, bloqueados = self.escuela.vista_promocion()
+            filas = [
+                (grado, seccion, alumnos, "Sin sección de destino")
+                for (grado, seccion), _, alumnos in bloqueados
+            ] + [
+                (
+                    grado,
+                    seccion,
+                    alumnos,
+                    "Egresan" if destino is None else f"{destino[0]} {destino[1]}",
+                )
+                for (grado, seccion), destino, alumnos in cambios
+            ]
+            dt.build_table_data(coldata, filas)
+
+            ultima = ultima_promocion(self.run_query)
+            lineas = [
+                f"Alumnos que pasan de grado: "
+                f"{sum(c.alumnos for c in cambios if c.destino is not None)}",
+                f"Alumnos que egresan: {sum(c.alumnos for c in cambios if c.destino is None)}",
+                "Última promoción: " + ("ninguna" if ultima is None else str(ultima)),
+            ]
+            if bloqueados:
+                lineas.append(
+                    "Cree las secciones que faltan en el grado siguiente o asigne "
+                    "un grado y sección válidos a esos alumnos antes de promover."
+                )
+            resumen.config(text="\n".join(lineas))
+            boton_aplicar.config(state="disabled" if bloqueados else "normal")
+
+        def aplicar():
+            """Confirmar y promover a todos los alumnos"""
+            year = date.today().year
+            answer = Messagebox.show_question(
+                message=f"¿Aplicar la promoción del año {year} a todos los alumnos?",
+                title="Promoción de fin de año",
+                alert=True,
+                parent=self.wind,
+                buttons=["No:secondary", "Sí:primary"],
+            )
+            if not answer or answer.lower() != "sí":
+                return
+
+            try:
+                promovidos, egresados = self.escuela.promover(year)
+            except PromocionInvalida as error:
+                self.display_error_box(str(error))
+                return
+
+            # Las vistas guardadas muestran las secciones anteriores
+            self.descartar_vistas()
+            self.display_success_toast(
+                f"{promovidos} alumnos promovidos, {egresados} egresados"
+            )
+            actualizar()
+
+        botones_frame = ttk.Frame(self.main_frame)
+        botones_frame.pack(expand=True, pady=10)
+        ttk.Button(
+            botones_frame, text="Actualizar", bootstyle=PRIMARY, command=actualizar
+        ).pack(side="left", padx=10)
+        boton_aplicar = ttk.Button(
+            botones_frame, text="Aplicar promoción", bootstyle=DANGER, command=aplicar
+        )
+        boton_aplicar.pack(side="left", padx=10)
+
+        actualizar()
+        self.al_mostrar(actualizar)
+
+    def set_archivo_view(self):
+        """Mover al archivo histórico los alumnos retirados o egresados y las
+        asistencias de años anteriores"""
+        from ttkbootstrap.dialogs.dialogs import Messagebox
+
+        if self.reset_view(
+            "Archivo histórico", is_expand=False, padding=15, clave="archivo"
+        ):
+            return
+
+        resumen = ttk.Label(
+            self.main_frame, font=("Sans-serif", 11), justify="left", anchor="nw"
+        )
+        resumen.pack(expand=True, fill="x", pady=(20, 10))
+
+        def actualizar():
+            """Cantidades que se moverían ahora"""
+            year = date.today().year
+            alumnos, asistencias, huerfanas = pendientes(self.run_query, year)
+            resumen.config(
+                text="\n".join(
+                    [
+                        f"Alumnos retirados o egresados: {alumnos}",
+                        f"Asistencias de esos alumnos o anteriores a {year}: {asistencias}",
+                        f"Asistencias de alumnos que ya no existen (se borran): {huerfanas}",
+                        f"Archivo: {archivo_historico(self.db_name)}",
+                    ]
+                )
+            )
+            boton_archivar.config(
+                state="normal" if alumnos or asistencias or huerfanas else "disabled"
+            )
+
+        def ejecutar():
+            """Confirmar y archivar"""
+            answer = Messagebox.show_question(
+                message="¿Mover al archivo histórico los alumnos y asistencias indicados?",
+                title="Archivo histórico",
+                alert=True,
+                parent=self.wind,
+                buttons=["No:secondary", "Sí:primary"],
+            )
+            if not answer or answer.lower() != "sí":
+                return
+
+            def terminar(resumen, error):
+                if error is not None:
+                    self.display_error_box(f"No se pudo archivar: {error}")
+                    return
+                self.descartar_vistas()
+                self.display_success_toast(
+                    f"{resumen.alumnos} alumnos y {resumen.asistencias} "
+                    "asistencias archivados"
+                )
+                actualizar()
+
+            # Con VACUUM puede tardar: se hace en un hilo
+            self.en_segundo_plano(
+                "Archivo histórico",
+                "Moviendo al archivo y compactando la base de datos...",
+                lambda: archivar(self.db_name, date.today().year, compactar=True),
+                terminar,
+            )
+
+        botones_frame = ttk.Frame(self.main_frame)
+        botones_frame.pack(expand=True, pady=10)
+        ttk.Button(
+            botones_frame, text="Actualizar", bootstyle=PRIMARY, command=actualizar
+        ).pack(side="left", padx=10)
+        boton_archivar = ttk.Button(
+            botones_frame, text="Archivar", bootstyle=DANGER, command=ejecutar
+        )
+        boton_archivar.pack(side="left", padx=10)
+
+        actualizar()
+        self.al_mostrar(actualizar)
+
+    def set_respaldos_view(self):
+        """Configurar las copias de seguridad, verificarlas y restaurarlas"""
+        from ttkbootstrap.dialogs.dialogs import Messagebox
+        from ttkbootstrap.tableview import Tableview
+
+        if self.reset_view(
+            "Copias de seguridad", is_expand=False, padding=15, clave="respaldos"
+        ):
+            return
+
+        programador = self.respaldos or ProgramadorRespaldos(
+            self.run_query, self.db_name, ""
+        )
+
+        form_frame = ttk.Frame(self.main_frame)
+        form_frame.pack(expand=True, fill="x", pady=(30, 20))
+
+        ttk.Label(form_frame, text="Carpeta:", font=("Sans-Serif", 11)).pack(
+            side="left", padx=(0, 10)
+        )
+        directorio = ttk.Entry(form_frame, font=("Sans-Serif", 11), width=40)
+        directorio.insert(0, programador.directorio)
+        directorio.pack(side="left", padx=(0, 10))
+
+        def elegir_directorio():
+            """Seleccionar la carpeta de las copias"""
+            ruta = filedialog.askdirectory()
+            if ruta:
+                directorio.delete(0, END)
+                directorio.insert(0, ruta)
+
+        ttk.Button(
+            form_frame, text="Elegir", bootstyle=INFO, command=elegir_directorio
+        ).pack(side="left", padx=(0, 20))
+
+        ttk.Label(form_frame, text="Cada (horas):", font=("Sans-Serif", 11)).pack(
+            side="left", padx=(0, 10)
+        )
+        intervalo = ttk.Entry(form_frame, font=("Sans-Serif", 11), width=4)
+        intervalo.insert(0, str(programador.intervalo_horas))
+        intervalo.pack(side="left", padx=(0, 20))
+
+        ttk.Label(form_frame, text="Conservar:", font=("Sans-Serif", 11)).pack(
+            side="left", padx=(0, 10)
+        )
+        conservar = ttk.Entry(form_frame, font=("Sans-Serif", 11), width=4)
+        conservar.insert(0, str(programador.conservar))
+        conservar.pack(side="left", padx=(0, 20))
+
+        estado = ttk.Label(self.main_frame, font=("Sans-serif", 10), anchor="nw")
+        estado.pack(expand=True, fill="x")
+
+        coldata = [
+            {"text": "Archivo", "stretch": True},
+            {"text": "Tamaño (MB)", "stretch": True},
+        ]
+        dt = Tableview(
+            master=self.main_frame,
+            coldata=coldata,
+            rowdata=[],
+            paginated=True,
+            searchable=False,
+            bootstyle=PRIMARY,
+            autofit=True,
+            autoalign=True,
+        )
+        dt.pack(fill=BOTH, expand=YES, padx=10, pady=10)
+
+        def actualizar_estado():
+            """Mostrar la programación, el último respaldo y las copias"""
+            if self.respaldos is None:
+                estado.config(text="Las copias de seguridad automáticas están desactivadas.")
+                dt.build_table_data(coldata, [])
+                return
+            ultimo = self.respaldos.ultimo
+            ultimo = ultimo.strftime("%d-%m-%Y %H:%M") if ultimo else "nunca"
+            estado.config(
+                text=f"{self.respaldos.describir()}. Última copia: {ultimo}."
+            )
+            dt.build_table_data(
+                coldata,
+                [
+                    (ruta, round(os.path.getsize(ruta) / 2**20, 1))
+                    for ruta in respaldos(self.respaldos.directorio)
+                ],
+            )
+
+        def guardar():
+            """Validar y guardar la configuración"""
+            try:
+                horas = int(intervalo.get())
+                copias = int(conservar.get())
+            except ValueError:
+                self.display_error_box("Ingresa números enteros en horas y copias")
+                return
+            if horas < 1 or copias < 1:
+                self.display_error_box("Las horas y las copias deben ser al menos 1")
+                return
+            if not directorio.get().strip():
+                self.display_error_box("Selecciona una carpeta")
+                return
+
+            self.respaldos = ProgramadorRespaldos(
+                self.run_query, self.db_name, directorio.get().strip(), horas, copias
+            )
+            self.respaldos.guardar_configuracion()
+            self.display_success_toast("Configuración guardada")
+            actualizar_estado()
+
+        def respaldar_ahora():
+            """Crear una copia sin esperar el intervalo"""
+            if self.respaldos is None:
+                self.display_error_box("Guarda la configuración primero")
+                return
+            if self.respaldo_ocupado:
+                self.display_error_box("Ya se está creando una copia")
+                return
+            self.ejecutar_respaldo(
+                on_finish=lambda: estado.winfo_exists() and actualizar_estado()
+            )
+
+        def copia_seleccionada():
+            """Ruta de la copia seleccionada en la tabla, o None"""
+            selection = dt.view.selection()
+            if len(selection) == 0:
+                self.display_error_box("Selecciona una copia de la tabla")
+                return None
+            return dt.get_row(iid=selection[0]).values[0]
+
+        def verificar_copia():
+            """Comprobar la suma SHA-256 de la copia seleccionada"""
+            ruta = copia_seleccionada()
+            if ruta is None:
+                return
+            try:
+                verificar(ruta)
+            except RespaldoInvalido as error:
+                self.display_error_box(str(error))
+                return
+            self.display_success_toast("La copia está completa y sin cambios")
+
+        def restaurar_copia():
+            """Reemplazar los datos actuales por la copia seleccionada"""
+            ruta = copia_seleccionada()
+            if ruta is None:
+                return
+            answer = Messagebox.show_question(
+                message=(
+                    f"¿Reemplazar todos los datos por la copia {os.path.basename(ruta)}? "
+                    "Antes se guardará una copia del estado actual."
+                ),
+                title="Restaurar copia de seguridad",
+                alert=True,
+                parent=self.wind,
+                buttons=["No:secondary", "Sí:primary"],
+            )
+            if not answer or answer.lower() != "sí":
+                return
+
+            def terminar(anterior, error):
+                if isinstance(error, RespaldoInvalido):
+                    self.display_error_box(str(error))
+                    return
+                if error is not None:
+                    self.display_error_box(f"No se pudo restaurar la copia: {error}")
+                    return
+
+                # Todo lo que está en memoria corresponde a los datos anteriores
+                self.grados.invalidar()
+                self.calendario.invalidar()
+                self.escuela.cargar_indice()
+                self.descartar_vistas()
+                Messagebox.show_info(
+                    message=f"Copia restaurada. El estado anterior se guardó en {anterior}",
+                    title="Copia restaurada",
+                    alert=True,
+                    parent=self.wind,
+                )
+                actualizar_estado()
+
+            # Copia de seguridad del estado actual, restauración y migración
+            self.en_segundo_plano(
+                "Restaurar copia de seguridad",
+                f"Restaurando {os.path.basename(ruta)}...",
+                lambda: restaurar(ruta, self.db_name),
+                terminar,
+            )
+
+        ttk.Button(
+            form_frame, text="Guardar", bootstyle=PRIMARY, command=guardar
+        ).pack(side="left", padx=(0, 10))
+        ttk.Button(
+            form_frame, text="Respaldar ahora", bootstyle=SUCCESS, command=respaldar_ahora
+        ).pack(side="left")
+
+        botones_frame = ttk.Frame(self.main_frame)
+        botones_frame.pack(expand=True, pady=10)
+        ttk.Button(
+            botones_frame, text="Verificar seleccionada", bootstyle=INFO, command=verificar_copia
+        ).pack(side="left", padx=10)
+        ttk.Button(
+            botones_frame,
+            text="Restaurar seleccionada",
+            bootstyle=DANGER,
+            command=restaurar_copia,
+        ).pack(side="left", padx=10)
+
+        actualizar_estado()
+        self.al_mostrar(actualizar_estado)
+
 
 if __name__ == "__main__":
     # Ventana principal
@@ -0,0 +1,153 @@
+"""Copias de seguridad desde la línea de comandos, con el sistema abierto o no.
+
+Ejemplos:
+    python respaldar.py crear --directorio respaldos/
+    python respaldar.py lista --directorio respaldos/
+    python respaldar.py verificar respaldos/escuela-20240415-170000.db
+    python respaldar.py restaurar respaldos/escuela-20240415-170000.db
+    python respaldar.py programado --directorio respaldos/ --intervalo-horas 6 --guardar
+    python respaldar.py programado --esperar
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from escuela.basedatos import asegurar_esquema, consultor
+from escuela.respaldo import (
+    CONSERVAR_DEFECTO,
+    INTERVALO_HORAS_DEFECTO,
+    ProgramadorRespaldos,
+    RespaldoInvalido,
+    respaldar,
+    respaldos,
+    restaurar,
+    rotar,
+    verificar,
+)
+
+
+def mostrar_progreso(copiadas, total):
+    """Páginas copiadas en la misma línea"""
+    print(f"\r{copiadas}/{total} páginas", end="", flush=True)
+
+
+def respaldo_programado(consultar, args):
+    """Copias periódicas con la configuración guardada o la indicada"""
+    programador = ProgramadorRespaldos.desde_configuracion(consultar, args.db)
+    if programador is None:
+        if not args.directorio:
+            raise SystemExit("Indique --directorio (no hay uno configurado)")
+        programador = ProgramadorRespaldos(consultar, args.db, args.directorio)
+
+    if args.directorio:
+        programador.directorio = args.directorio
+    if args.intervalo_horas is not None:
+        programador.intervalo_horas = args.intervalo_horas
+    if args.conservar is not None:
+        programador.conservar = args.conservar
+    if args.guardar:
+        programador.guardar_configuracion()
+
+    print(f"{programador.directorio}: {programador.describir()}")
+    while True:
+        if not args.esperar or programador.pendiente():
+            inicio = time.perf_counter()
+            ruta, borradas = programador.ejecutar()
+            print(f"{ruta} en {time.perf_counter() - inicio:.2f} s")
+            for borrada in borradas:
+                print(f"borrada {borrada}")
+        if not args.esperar:
+            return
+        time.sleep(60)
+
+
+def crear_parser():
+    """Argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Copias de seguridad de la base de datos")
+    parser.add_argument("--db", default="escuela.db", help="Base de datos")
+
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    crear = comandos.add_parser("crear", help="Crear una copia ahora")
+    crear.add_argument("--directorio", required=True, help="Carpeta de las copias")
+    crear.add_argument("--conservar", type=int, help="Borrar las copias más antiguas")
+
+    lista = comandos.add_parser("lista", help="Copias de la carpeta, de la más reciente")
+    lista.add_argument("--directorio", required=True)
+
+    verificar_copia = comandos.add_parser(
+        "verificar", help="Comprobar la suma SHA-256 de una copia"
+    )
+    verificar_copia.add_argument("archivo")
+
+    restaurar_copia = comandos.add_parser(
+        "restaurar", help="Reemplazar los datos por una copia verificada"
+    )
+    restaurar_copia.add_argument("archivo")
+
+    programado = comandos.add_parser(
+        "programado", help="Copias periódicas con rotación"
+    )
+    programado.add_argument("--directorio", help="Carpeta (por defecto, la guardada)")
+    programado.add_argument(
+        "--intervalo-horas",
+        type=int,
+        help=f"Horas entre copias (por defecto, {INTERVALO_HORAS_DEFECTO})",
+    )
+    programado.add_argument(
+        "--conservar",
+        type=int,
+        help=f"Copias que se conservan (por defecto, {CONSERVAR_DEFECTO})",
+    )
+    programado.add_argument(
+        "--guardar", action="store_true", help="Guardar estos valores como preferencias"
+    )
+    programado.add_argument(
+        "--esperar",
+        action="store_true",
+        help="Seguir ejecutándose y crear las copias cuando toque",
+    )
+
+    return parser
+
+
+def main(argv=None):
+    """Punto de entrada"""
+    args = crear_parser().parse_args(argv)
+
+    if args.comando == "crear":
+        inicio = time.perf_counter()
+        ruta = respaldar(args.db, args.directorio, progreso=mostrar_progreso)
+        print(f"\n{ruta} en {time.perf_counter() - inicio:.2f} s")
+        if args.conservar is not None:
+            for borrada in rotar(args.directorio, args.conservar):
+                print(f"borrada {borrada}")
+        return
+
+    if args.comando == "lista":
+        for ruta in respaldos(args.directorio):
+            print(f"{ruta}  {os.path.getsize(ruta) / 2**20:.1f} MB")
+        return
+
+    try:
+        if args.comando == "verificar":
+            verificar(args.archivo)
+            print(f"{args.archivo}: correcto")
+            return
+        if args.comando == "restaurar":
+            anterior = restaurar(args.archivo, args.db)
+            print(f"{args.db} restaurada desde {args.archivo}")
+            print(f"Estado anterior guardado en {anterior}")
+            return
+    except RespaldoInvalido as error:
+        raise SystemExit(str(error))
+
+    consultar = consultor(args.db)
+    asegurar_esquema(consultar)
+    respaldo_programado(consultar, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Bases de datos de prueba con el esquema de escuela.sql"""
+
+import os
+import sqlite3
+
+import pytest
+
+from escuela.basedatos import asegurar_esquema, consultor
+
+ESQUEMA_SQL = os.path.join(os.path.dirname(__file__), os.pardir, "escuela.sql")
+
+
+def base_en_memoria():
+    """Función consultar sobre una base en memoria (una sola conexión)"""
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    conn.execute("PRAGMA foreign_keys = ON")
+    with open(ESQUEMA_SQL, encoding="utf-8") as archivo:
+        conn.executescript(archivo.read())
+
+    def consultar(query, parameters=()):
+        return conn.execute(query, parameters)
+
+    asegurar_esquema(consultar)
+    return consultar
+
+
+@pytest.fixture
+def consultar():
+    return base_en_memoria()
+
+
+@pytest.fixture
+def db_name(tmp_path):
+    """Archivo de base de datos (para lo que abre sus propias conexiones)"""
+    ruta = str(tmp_path / "escuela.db")
+    conn = sqlite3.connect(ruta)
+    with open(ESQUEMA_SQL, encoding="utf-8") as archivo:
+        conn.executescript(archivo.read())
+    conn.close()
+    asegurar_esquema(consultor(ruta))
+    return ruta
@@ -0,0 +1,124 @@
+"""Rachas y porcentajes de inasistencia (alertas.MotorInasistencias)"""
+
+from datetime import date, timedelta
+
+from escuela import alertas
+from escuela.alertas import MotorInasistencias
+from escuela.calendario import CalendarioEscolar
+from escuela.fechas import numero_dia
+
+# Sin clases hasta el viernes 27 de febrero: el año empieza el lunes 2 de marzo
+INICIO = date(2026, 3, 2)
+
+
+def preparar(consultar):
+    calendario = CalendarioEscolar(consultar)
+    calendario.agregar(date(2026, 1, 1), INICIO - timedelta(days=3), "vacaciones")
+    return calendario
+
+
+def agregar_alumno(consultar, codigo, fecha_ingreso=None):
+    return consultar(
+        "INSERT INTO alumnos (codigo, nombres, apellido_paterno, apellido_materno, "
+        "fecha_ingreso, detalle_grado_id) VALUES (?, ?, 'P', 'M', ?, 1)",
+        [codigo, codigo, fecha_ingreso and fecha_ingreso.isoformat()],
+    ).lastrowid
+
+
+def marcar(consultar, alumno_id, *dias):
+    for dia in dias:
+        consultar(
+            "INSERT INTO asistencias (alumno_id, hora_entrada, fecha) VALUES (?, ?, ?)",
+            [alumno_id, 7 * 3600, numero_dia(dia)],
+        )
+
+
+def estados(motor):
+    """alumno_id -> (racha, racha_max, porcentaje, porcentaje_reciente)"""
+    return {fila[0]: fila[5:] for fila in motor.alertas(racha_minima=0)}
+
+
+def dia(numero):
+    """Día lectivo número `numero` (desde 0) de las dos primeras semanas"""
+    return [INICIO + timedelta(days=d) for d in (0, 1, 2, 3, 4, 7, 8, 9, 10, 11)][numero]
+
+
+def test_racha_de_inasistencias(consultar):
+    calendario = preparar(consultar)
+    puntual = agregar_alumno(consultar, "A")
+    ausente = agregar_alumno(consultar, "B")
+    marcar(consultar, puntual, *(dia(n) for n in range(5)))
+    marcar(consultar, ausente, dia(0), dia(1))
+
+    motor = MotorInasistencias(consultar, calendario)
+    motor.actualizar(dia(4))
+    assert [fila[0] for fila in motor.alertas(racha_minima=3)] == [ausente]
+    assert estados(motor)[ausente] == (3, 3, 40.0, 40.0)
+
+    # Solo se procesa el día nuevo: la racha se corta y queda el máximo
+    marcar(consultar, ausente, dia(5))
+    motor.actualizar(dia(5))
+    assert estados(motor)[ausente] == (0, 3, 50.0, 50.0)
+    assert estados(motor)[puntual][2] == round(5 / 6 * 100, 1)
+
+
+def test_correccion_de_un_dia_pasado_se_vuelve_a_calcular(consultar):
+    calendario = preparar(consultar)
+    alumno = agregar_alumno(consultar, "B")
+    marcar(consultar, alumno, dia(0), dia(1), dia(5))
+
+    motor = MotorInasistencias(consultar, calendario)
+    motor.actualizar(dia(5))
+    assert estados(motor)[alumno][:2] == (0, 3)
+
+    # Se registra tarde la asistencia del miércoles: la racha máxima baja a 1
+    marcar(consultar, alumno, dia(3))
+    motor.actualizar(dia(5))
+    assert estados(motor)[alumno][:2] == (0, 1)
+
+    nuevo = MotorInasistencias(consultar, calendario)
+    nuevo.actualizar(dia(5))
+    assert estados(motor) == estados(nuevo)
+
+    # Borrar una asistencia pasada también se nota: falta lunes y martes
+    consultar("DELETE FROM asistencias WHERE fecha = ?", [numero_dia(dia(1))])
+    motor.actualizar(dia(5))
+    assert estados(motor)[alumno] == (0, 2, 50.0, 50.0)
+
+
+def test_alumno_que_ingresa_a_mitad_de_año(consultar):
+    calendario = preparar(consultar)
+    antiguo = agregar_alumno(consultar, "A")
+    marcar(consultar, antiguo, *(dia(n) for n in range(6)))
+
+    motor = MotorInasistencias(consultar, calendario)
+    motor.actualizar(dia(4))
+
+    # Se registra después de procesar; ingresó el jueves de la primera semana
+    nuevo = agregar_alumno(consultar, "C", fecha_ingreso=dia(3))
+    marcar(consultar, nuevo, dia(3), dia(4))
+    motor.actualizar(dia(5))
+
+    # Solo cuentan sus días desde el ingreso: 2 de 3
+    racha, racha_max, porcentaje, _ = estados(motor)[nuevo]
+    assert (racha, racha_max) == (1, 1)
+    assert porcentaje == round(2 / 3 * 100, 1)
+    assert estados(motor)[antiguo] == (0, 0, 100.0, 100.0)
+
+
+def test_alumnos_nuevos_en_varias_consultas(consultar, monkeypatch):
+    monkeypatch.setattr(alertas, "ALUMNOS_POR_CONSULTA", 2)
+    calendario = preparar(consultar)
+    motor = MotorInasistencias(consultar, calendario)
+    motor.actualizar(dia(4))
+
+    # Cinco alumnos nuevos con asistencias distintas: tres consultas de hasta dos
+    for numero in range(5):
+        alumno_id = agregar_alumno(consultar, f"N{numero}")
+        marcar(consultar, alumno_id, *(dia(n) for n in range(numero)))
+    motor.actualizar(dia(4))
+
+    nuevo = MotorInasistencias(consultar, calendario)
+    nuevo.actualizar(dia(4))
+    assert len(estados(motor)) == 5
+    assert estados(motor) == estados(nuevo)
@@ -0,0 +1,102 @@
+"""Archivo histórico: mover alumnos no activos y asistencias de años anteriores"""
+
+from datetime import date, time
+
+import pytest
+
+from escuela.archivo import ArchivoInconsistente, archivar
+from escuela.basedatos import consultor
+from escuela.fechas import numero_dia, segundos
+
+YEAR = 2026
+
+
+def cargar(db_name):
+    """Ana (activa) con una asistencia de 2025 y otra de 2026; Luis retirado"""
+    consultar = consultor(db_name)
+    consultar(
+        "INSERT INTO alumnos (alumno_id, codigo, nombres, detalle_grado_id, estado) "
+        "VALUES (1, '001', 'Ana', 1, 'activo'), (2, '002', 'Luis', 1, 'retirado')"
+    )
+    for asistencia_id, alumno_id, fecha in (
+        (1, 1, date(2025, 11, 3)),
+        (2, 1, date(2026, 3, 2)),
+        (3, 2, date(2026, 3, 2)),
+    ):
+        consultar(
+            "INSERT INTO asistencias (asistencia_id, alumno_id, hora_entrada, fecha) "
+            "VALUES (?, ?, ?, ?)",
+            [asistencia_id, alumno_id, segundos(time(7, 45)), numero_dia(fecha)],
+        )
+    return consultar
+
+
+def asistencias(consultar):
+    return consultar(
+        "SELECT asistencia_id, alumno_id, fecha FROM asistencias ORDER BY asistencia_id"
+    ).fetchall()
+
+
+def test_archivar_mueve_alumnos_y_asistencias(db_name, tmp_path):
+    consultar = cargar(db_name)
+    destino = str(tmp_path / "archivo.db")
+
+    resumen = archivar(db_name, YEAR, destino)
+
+    assert (resumen.alumnos, resumen.asistencias, resumen.huerfanas) == (1, 2, 0)
+    assert asistencias(consultar) == [(2, 1, numero_dia(date(2026, 3, 2)))]
+    archivo = consultor(destino)
+    assert [fila[0] for fila in asistencias(archivo)] == [1, 3]
+    assert archivo("SELECT alumno_id FROM alumnos ORDER BY alumno_id").fetchall() == [(1,), (2,)]
+
+
+def test_archivar_dos_veces_no_duplica(db_name, tmp_path):
+    cargar(db_name)
+    destino = str(tmp_path / "archivo.db")
+    archivar(db_name, YEAR, destino)
+
+    resumen = archivar(db_name, YEAR, destino)
+
+    assert (resumen.alumnos, resumen.asistencias) == (0, 0)
+    assert len(asistencias(consultor(destino))) == 2
+
+
+def test_asistencia_ya_archivada_igual_se_salta(db_name, tmp_path):
+    consultar = cargar(db_name)
+    destino = str(tmp_path / "archivo.db")
+    archivar(db_name, YEAR, destino)
+    # Como si un archivo anterior se hubiera copiado sin borrar de la principal
+    consultar(
+        "INSERT INTO asistencias (asistencia_id, alumno_id, hora_entrada, fecha) "
+        "VALUES (1, 1, ?, ?)",
+        [segundos(time(7, 45)), numero_dia(date(2025, 11, 3))],
+    )
+
+    resumen = archivar(db_name, YEAR, destino)
+
+    assert resumen.asistencias == 0
+    assert [fila[0] for fila in asistencias(consultar)] == [2]
+    assert len(asistencias(consultor(destino))) == 2
+
+
+def test_asistencia_distinta_con_el_mismo_id_no_se_pierde(db_name, tmp_path):
+    consultar = cargar(db_name)
+    destino = str(tmp_path / "archivo.db")
+    archivar(db_name, YEAR, destino)
+    # Después de restaurar una copia vieja, los números vuelven a usarse
+    consultar(
+        "INSERT INTO asistencias (asistencia_id, alumno_id, hora_entrada, fecha) "
+        "VALUES (3, 1, ?, ?)",
+        [segundos(time(8, 0)), numero_dia(date(2025, 12, 1))],
+    )
+    antes = asistencias(consultar)
+
+    with pytest.raises(ArchivoInconsistente):
+        archivar(db_name, YEAR, destino)
+
+    # No se borró ni se copió nada
+    assert asistencias(consultar) == antes
+    assert asistencias(consultor(destino)) == [
+        (1, 1, numero_dia(date(2025, 11, 3))),
+        (3, 2, numero_dia(date(2026, 3, 2))),
+    ]
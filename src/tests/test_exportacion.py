@@ -0,0 +1,68 @@
+"""Formato columnar (ASISCOL1): lo que se escribe se vuelve a leer igual"""
+
+from datetime import date
+
+import pytest
+
+from escuela import exportacion
+from escuela.exportacion import Bloque, Reporte, escribir_columnar, leer_columnar
+
+CABECERAS = ["Código", "Alumno", "Entrada", "Salida", "Tardanza", "Nota", "Fecha", "Mixta"]
+
+
+def fila(numero):
+    """Una columna de cada tipo; cada tercera fila con nulos.
+
+    El tipo se elige por grupo: la última columna mezcla números y texto en
+    cualquier grupo de tres filas o más.
+    """
+    nulo = numero % 3 == 0
+    return (
+        numero,
+        None if nulo else f"Alumno {numero} ñandú",
+        27000 + numero,
+        None if nulo else 46800 + numero,
+        None if nulo else numero * 1.5,
+        None if nulo else (numero if numero % 2 else numero + 0.25),
+        date(2026, 3, 1 + numero % 28),
+        None if nulo else (numero if numero % 3 == 1 else f"texto {numero}"),
+    )
+
+
+def test_columnar_ida_y_vuelta(tmp_path, monkeypatch):
+    # Grupos pequeños para que cada bloque ocupe varios
+    monkeypatch.setattr(exportacion, "FILAS_POR_GRUPO", 4)
+    filas = [fila(numero) for numero in range(1, 11)]
+    reporte = Reporte(
+        "asistencias",
+        [("Desde", "2026-03-01")],
+        [
+            Bloque(("Sección", "1 A"), CABECERAS, iter(filas[:7])),
+            Bloque(None, CABECERAS, iter(filas[7:]), True),
+            Bloque(None, ["Vacío"], iter([])),
+        ],
+    )
+    ruta = str(tmp_path / "reporte.col")
+
+    assert escribir_columnar(ruta, reporte) == len(filas)
+
+    leidas = list(leer_columnar(ruta))
+    titulos = [(titulo, cabeceras) for titulo, cabeceras, _ in leidas]
+    assert titulos == [(["Sección", "1 A"], CABECERAS)] * 7 + [(None, CABECERAS)] * 3
+    # Las fechas se guardan como texto; los números (con o sin nulos) y los
+    # nulos se conservan, y una columna con números y texto queda en texto
+    esperadas = [
+        valores[:6] + (str(valores[6]), None if valores[7] is None else str(valores[7]))
+        for valores in filas
+    ]
+    assert [valores for _, _, valores in leidas] == esperadas
+    assert [type(valores[2]) for _, _, valores in leidas] == [int] * len(filas)
+    assert {type(valores[3]) for _, _, valores in leidas} == {int, type(None)}
+
+
+def test_columnar_rechaza_otro_archivo(tmp_path):
+    ruta = tmp_path / "otro.col"
+    ruta.write_bytes(b"PK\x03\x04 no es columnar")
+
+    with pytest.raises(ValueError):
+        list(leer_columnar(str(ruta)))
@@ -0,0 +1,136 @@
+"""Migración de asistencias con fecha y horas en texto a números
+(basedatos.MIGRACIONES) y esquema de referencia escuela.sql"""
+
+import os
+import sqlite3
+from datetime import date, time
+
+from escuela.basedatos import MIGRACIONES, asegurar_esquema, consultor, migrar
+from escuela.fechas import numero_dia, segundos
+
+ESQUEMA_SQL = os.path.join(os.path.dirname(__file__), os.pardir, "escuela.sql")
+
+# Tablas como estaban antes de las migraciones (fecha y horas como texto)
+ESQUEMA_ANTERIOR = """
+CREATE TABLE grados (grado_id INTEGER PRIMARY KEY AUTOINCREMENT, grado VARCHAR(250));
+CREATE TABLE detalle_grados (
+    detalle_grado_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    grado_id INTEGER,
+    seccion VARCHAR(10)
+);
+CREATE TABLE alumnos (
+    alumno_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    codigo VARCHAR(150),
+    nombres VARCHAR(250),
+    apellido_paterno VARCHAR(250),
+    apellido_materno VARCHAR(250),
+    fecha_ingreso DATE,
+    foto TEXT,
+    detalle_grado_id INTEGER DEFAULT 1
+);
+CREATE TABLE asistencias (
+    asistencia_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    alumno_id INTEGER,
+    hora_entrada TIME,
+    hora_salida TIME,
+    fecha DATE
+);
+INSERT INTO alumnos (codigo, nombres) VALUES ('001', 'Ana');
+"""
+
+ASISTENCIAS_TEXTO = [
+    (1, "07:45:30", "13:00:00", "2026-03-02"),
+    (1, "07:59:59", "", "2026-03-03"),
+    (1, "", "", "1970-01-01"),
+    (1, None, None, "2026-12-31"),
+]
+
+
+def base_anterior(tmp_path):
+    db_name = str(tmp_path / "anterior.db")
+    conn = sqlite3.connect(db_name)
+    conn.executescript(ESQUEMA_ANTERIOR)
+    conn.executemany(
+        "INSERT INTO asistencias (alumno_id, hora_entrada, hora_salida, fecha) "
+        "VALUES (?, ?, ?, ?)",
+        ASISTENCIAS_TEXTO,
+    )
+    conn.commit()
+    conn.close()
+    return db_name
+
+
+def test_migracion_de_texto_a_numeros(tmp_path):
+    consultar = consultor(base_anterior(tmp_path))
+    asegurar_esquema(consultar)
+
+    filas = consultar(
+        "SELECT hora_entrada, hora_salida, fecha FROM asistencias ORDER BY asistencia_id"
+    ).fetchall()
+    assert filas == [
+        (segundos(time(7, 45, 30)), segundos(time(13, 0)), numero_dia(date(2026, 3, 2))),
+        (segundos(time(7, 59, 59)), None, numero_dia(date(2026, 3, 3))),
+        (None, None, 0),
+        (None, None, numero_dia(date(2026, 12, 31))),
+    ]
+    tipos = consultar("SELECT DISTINCT typeof(fecha) FROM asistencias").fetchall()
+    assert tipos == [("integer",)]
+    assert consultar("PRAGMA user_version").fetchone()[0] == len(MIGRACIONES)
+
+
+def test_vista_texto_devuelve_los_valores_originales(tmp_path):
+    consultar = consultor(base_anterior(tmp_path))
+    asegurar_esquema(consultar)
+
+    filas = consultar(
+        "SELECT alumno_id, hora_entrada, hora_salida, fecha "
+        "FROM asistencias_texto ORDER BY asistencia_id"
+    ).fetchall()
+    # Las horas vacías ('') quedan como NULL
+    assert filas == [
+        tuple(None if valor == "" else valor for valor in fila)
+        for fila in ASISTENCIAS_TEXTO
+    ]
+
+
+def test_migrar_dos_veces_no_cambia_nada(tmp_path):
+    consultar = consultor(base_anterior(tmp_path))
+    asegurar_esquema(consultar)
+    antes = consultar("SELECT * FROM asistencias ORDER BY asistencia_id").fetchall()
+
+    assert migrar(consultar) == 0
+    # Aunque se pierda user_version, la migración solo toca filas en texto
+    consultar("PRAGMA user_version = 0")
+    assert migrar(consultar) == len(MIGRACIONES)
+    assert consultar("SELECT * FROM asistencias ORDER BY asistencia_id").fetchall() == antes
+
+
+def test_escuela_sql_coincide_con_una_base_migrada(tmp_path):
+    nueva = str(tmp_path / "nueva.db")
+    conn = sqlite3.connect(nueva)
+    with open(ESQUEMA_SQL, encoding="utf-8") as archivo:
+        conn.executescript(archivo.read())
+    conn.close()
+
+    migrada = consultor(base_anterior(tmp_path))
+    asegurar_esquema(migrada)
+    desde_sql = consultor(nueva)
+    asegurar_esquema(desde_sql)
+
+    for tabla in ("alumnos", "asistencias"):
+        columnas = f"SELECT name FROM pragma_table_info('{tabla}')"
+        assert desde_sql(columnas).fetchall() == migrada(columnas).fetchall()
+    assert desde_sql("PRAGMA user_version").fetchone()[0] == len(MIGRACIONES)
+
+    # Una asistencia marcada hoy se guarda igual en las dos
+    desde_sql("INSERT INTO alumnos (codigo, nombres) VALUES ('001', 'Ana')")
+    for consultar in (desde_sql, migrada):
+        consultar(
+            "INSERT INTO asistencias (alumno_id, hora_entrada, fecha) VALUES (1, ?, ?)",
+            [segundos(time(7, 30)), numero_dia(date(2026, 3, 4))],
+        )
+    ultima = (
+        "SELECT typeof(hora_entrada), typeof(fecha) "
+        "FROM asistencias ORDER BY asistencia_id DESC"
+    )
+    assert desde_sql(ultima).fetchone() == migrada(ultima).fetchone() == ("integer", "integer")
@@ -0,0 +1,89 @@
+"""Lista paginada de alumnos (paginacion.PaginadorAlumnos)"""
+
+from escuela.paginacion import PaginadorAlumnos, normalizar
+
+ALUMNOS = [
+    # codigo, nombres, apellido_paterno, estado
+    ("C1", "ANA", "Núñez", "activo"),
+    ("C2", "LUIS", "PEREZ", "activo"),
+    ("C3", "ANA", "Quispe", "activo"),
+    ("C4", "ANA", "NUNEZ", "retirado"),
+    ("C5", "Ángel", "Rojas", "activo"),
+    ("C6", "ANA", "Peña", "activo"),
+    ("C7", "LUIS", "Ruiz", "egresado"),
+    ("C8", "ANA", "Soto", "activo"),
+]
+
+
+def cargar(consultar):
+    for codigo, nombres, paterno, estado in ALUMNOS:
+        consultar(
+            "INSERT INTO alumnos (codigo, nombres, apellido_paterno, apellido_materno, "
+            "estado) VALUES (?, ?, ?, 'M', ?)",
+            [codigo, nombres, paterno, estado],
+        )
+    return PaginadorAlumnos(consultar, tamano_pagina=2)
+
+
+def todas_las_paginas(paginador, **configuracion):
+    """Códigos de todas las páginas, yendo hacia adelante y luego hacia atrás"""
+    paginas = [[fila[1] for fila in paginador.configurar(**configuracion)]]
+    while paginador.hay_siguiente:
+        paginas.append([fila[1] for fila in paginador.pagina_siguiente()])
+    atras = [[fila[1] for fila in paginador.pagina_actual()]]
+    while paginador.hay_anterior:
+        atras.insert(0, [fila[1] for fila in paginador.pagina_anterior()])
+    assert atras == paginas
+    return paginas
+
+
+def test_paginas_con_valores_de_orden_repetidos(consultar):
+    paginador = cargar(consultar)
+
+    # Cinco "ANA" activas: el desempate por alumno_id no repite ni salta a nadie
+    assert todas_las_paginas(paginador, orden="nombres") == [
+        ["C1", "C3"],
+        ["C6", "C8"],
+        ["C2", "C5"],
+    ]
+    assert todas_las_paginas(paginador, orden="nombres", descendente=True) == [
+        ["C5", "C2"],
+        ["C8", "C6"],
+        ["C3", "C1"],
+    ]
+    assert paginador.numero_pagina == 1
+
+
+def test_solo_alumnos_activos(consultar):
+    paginador = cargar(consultar)
+
+    codigos = sum(todas_las_paginas(paginador), [])
+    assert codigos == ["C1", "C2", "C3", "C5", "C6", "C8"]
+    assert paginador.total() == 6
+
+
+def test_busqueda_sin_mayusculas_ni_tildes(consultar):
+    paginador = cargar(consultar)
+
+    # "nunez" encuentra "Núñez" pero no al alumno retirado "NUNEZ"
+    assert sum(todas_las_paginas(paginador, busqueda="nunez"), []) == ["C1"]
+    # En cualquier parte del texto, en nombres o apellidos
+    assert sum(todas_las_paginas(paginador, busqueda="  pena "), []) == ["C6"]
+    assert sum(todas_las_paginas(paginador, busqueda="PEÑA"), []) == ["C6"]
+    assert sum(todas_las_paginas(paginador, busqueda="angel"), []) == ["C5"]
+    assert sum(todas_las_paginas(paginador, busqueda="uis"), []) == ["C2", "C3"]
+    assert normalizar("Ángel Núñez") == "ANGEL NUNEZ"
+
+
+def test_total_se_cuenta_una_vez_por_busqueda(consultar):
+    paginador = cargar(consultar)
+    paginador.configurar(busqueda="ana")
+    assert paginador.total() == 4
+
+    consultar("UPDATE alumnos SET estado = 'retirado' WHERE codigo = 'C8'")
+    paginador.pagina_siguiente()
+    assert paginador.total() == 4
+    paginador.pagina_actual(recontar=True)
+    assert paginador.total() == 3
+    paginador.configurar(busqueda="")
+    assert paginador.total() == 5
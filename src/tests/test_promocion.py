@@ -0,0 +1,119 @@
+"""Promoción de fin de año (promocion.mapa_promocion, vista_previa y promover)"""
+
+import pytest
+
+from escuela.promocion import (
+    SIN_GRADO,
+    Cambio,
+    PromocionInvalida,
+    mapa_promocion,
+    promover,
+    ultima_promocion,
+    vista_previa,
+)
+
+
+def detalle(consultar, grado_id, seccion):
+    return consultar(
+        "SELECT detalle_grado_id FROM detalle_grados WHERE grado_id = ? AND seccion = ?",
+        [grado_id, seccion],
+    ).fetchone()[0]
+
+
+def agregar_alumno(consultar, codigo, detalle_grado_id, estado="activo"):
+    return consultar(
+        "INSERT INTO alumnos (codigo, nombres, detalle_grado_id, estado) "
+        "VALUES (?, ?, ?, ?)",
+        [codigo, codigo, detalle_grado_id, estado],
+    ).lastrowid
+
+
+def alumno(consultar, alumno_id):
+    """(detalle_grado_id, estado)"""
+    return consultar(
+        "SELECT detalle_grado_id, estado FROM alumnos WHERE alumno_id = ?", [alumno_id]
+    ).fetchone()
+
+
+def aplicar(consultar, year=2026, forzar=False):
+    mapa, sin_destino = mapa_promocion(consultar)
+    return promover(consultar, mapa, sin_destino, year, forzar)
+
+
+def test_promocion_al_grado_siguiente(consultar):
+    primero_a = agregar_alumno(consultar, "1A", detalle(consultar, 1, "A"))
+    segundo_b = agregar_alumno(consultar, "2B", detalle(consultar, 2, "B"))
+    retirado = agregar_alumno(consultar, "R", detalle(consultar, 1, "A"), "retirado")
+
+    mapa, sin_destino = mapa_promocion(consultar)
+    cambios, bloqueados = vista_previa(consultar, mapa, sin_destino)
+    assert bloqueados == []
+    assert cambios == [
+        Cambio(("1ro de primaria", "A"), ("2do de primaria", "A"), 1),
+        Cambio(("2do de primaria", "B"), ("3ro de primaria", "B"), 1),
+    ]
+
+    assert aplicar(consultar) == (2, 0)
+    assert alumno(consultar, primero_a) == (detalle(consultar, 2, "A"), "activo")
+    assert alumno(consultar, segundo_b) == (detalle(consultar, 3, "B"), "activo")
+    assert alumno(consultar, retirado) == (detalle(consultar, 1, "A"), "retirado")
+    assert ultima_promocion(consultar) == 2026
+
+
+def test_el_ultimo_grado_egresa(consultar):
+    quinto_c = detalle(consultar, 11, "C")
+    egresa = agregar_alumno(consultar, "11C", quinto_c)
+    pasa = agregar_alumno(consultar, "10C", detalle(consultar, 10, "C"))
+
+    cambios, _ = vista_previa(consultar, *mapa_promocion(consultar))
+    assert Cambio(("5to de secundaria", "C"), None, 1) in cambios
+
+    assert aplicar(consultar) == (1, 1)
+    # Conserva su sección, ya no está activo y no se vuelve a promover
+    assert alumno(consultar, egresa) == (quinto_c, "egresado")
+    assert alumno(consultar, pasa) == (quinto_c, "activo")
+    assert aplicar(consultar, year=2027) == (0, 1)
+    assert alumno(consultar, egresa) == (quinto_c, "egresado")
+
+
+def test_secciones_y_alumnos_sin_destino_bloquean(consultar):
+    # 1ro tiene una sección K que 2do no tiene; un alumno no tiene sección y
+    # otro tiene una que ya no existe (como el alumno 837 de escuela.db)
+    consultar("INSERT INTO detalle_grados (grado_id, seccion) VALUES (1, 'K')")
+    en_k = agregar_alumno(consultar, "1K", detalle(consultar, 1, "K"))
+    sin_seccion = agregar_alumno(consultar, "X", None)
+    consultar("PRAGMA foreign_keys = OFF")
+    seccion_borrada = agregar_alumno(consultar, "Y", 9999)
+    consultar("PRAGMA foreign_keys = ON")
+    otro = agregar_alumno(consultar, "1A", detalle(consultar, 1, "A"))
+
+    _, bloqueados = vista_previa(consultar, *mapa_promocion(consultar))
+    assert bloqueados == [
+        Cambio(SIN_GRADO, None, 2),
+        Cambio(("1ro de primaria", "K"), None, 1),
+    ]
+
+    with pytest.raises(PromocionInvalida, match="Sin grado, 1ro de primaria K"):
+        aplicar(consultar, forzar=True)
+    assert alumno(consultar, otro) == (detalle(consultar, 1, "A"), "activo")
+    assert ultima_promocion(consultar) is None
+
+    # Corregidos los tres, se puede promover
+    consultar(
+        "UPDATE alumnos SET detalle_grado_id = ? WHERE alumno_id IN (?, ?, ?)",
+        [detalle(consultar, 1, "B"), en_k, sin_seccion, seccion_borrada],
+    )
+    assert aplicar(consultar) == (4, 0)
+
+
+def test_segunda_promocion_del_mismo_año(consultar):
+    alumno_id = agregar_alumno(consultar, "1A", detalle(consultar, 1, "A"))
+    aplicar(consultar)
+
+    with pytest.raises(PromocionInvalida, match="Ya se aplicó la promoción"):
+        aplicar(consultar)
+    assert alumno(consultar, alumno_id) == (detalle(consultar, 2, "A"), "activo")
+
+    # forzar la aplica igual
+    assert aplicar(consultar, forzar=True) == (1, 0)
+    assert alumno(consultar, alumno_id) == (detalle(consultar, 3, "A"), "activo")
@@ -0,0 +1,109 @@
+"""Copias de seguridad: respaldar, verificar, rotar y restaurar"""
+
+import os
+from datetime import datetime
+
+import pytest
+
+from escuela.basedatos import consultor
+from escuela.respaldo import (
+    RespaldoInvalido,
+    archivo_suma,
+    respaldar,
+    respaldos,
+    restaurar,
+    rotar,
+    verificar,
+)
+
+AHORA = datetime(2026, 3, 2, 18, 30, 0)
+
+
+def cargar(db_name):
+    consultar = consultor(db_name)
+    for numero in range(1, 4):
+        consultar(
+            "INSERT INTO alumnos (codigo, nombres, detalle_grado_id) VALUES (?, ?, 1)",
+            [f"C{numero}", f"Alumno {numero}"],
+        )
+        consultar(
+            "INSERT INTO asistencias (alumno_id, hora_entrada, fecha) VALUES (?, ?, ?)",
+            [numero, 7 * 3600 + numero, 20514],
+        )
+    return consultar
+
+
+def filas(consultar):
+    return (
+        consultar("SELECT * FROM alumnos ORDER BY alumno_id").fetchall(),
+        consultar("SELECT * FROM asistencias ORDER BY asistencia_id").fetchall(),
+    )
+
+
+def test_respaldar_y_restaurar(db_name, tmp_path):
+    consultar = cargar(db_name)
+    originales = filas(consultar)
+
+    ruta = respaldar(db_name, str(tmp_path / "copias"), AHORA, pausa=0)
+    assert os.path.basename(ruta) == "escuela-20260302-183000.db"
+    assert verificar(ruta)
+
+    # Cambios posteriores a la copia
+    consultar("DELETE FROM asistencias WHERE alumno_id = 2")
+    consultar("INSERT INTO alumnos (codigo, nombres) VALUES ('C9', 'Nuevo')")
+    cambiadas = filas(consultar)
+
+    anterior = restaurar(ruta, db_name, str(tmp_path / "seguridad"))
+    assert filas(consultar) == originales
+
+    # El estado de antes de restaurar quedó guardado y verificado
+    assert verificar(anterior)
+    assert filas(consultor(anterior)) == cambiadas
+
+
+def test_copia_corrupta_no_se_restaura(db_name, tmp_path):
+    consultar = cargar(db_name)
+    ruta = respaldar(db_name, str(tmp_path), AHORA, pausa=0)
+    consultar("DELETE FROM asistencias")
+
+    with open(ruta, "r+b") as archivo:
+        archivo.seek(-100, os.SEEK_END)
+        byte = archivo.read(1)
+        archivo.seek(-1, os.SEEK_CUR)
+        archivo.write(bytes([byte[0] ^ 0xFF]))
+
+    with pytest.raises(RespaldoInvalido, match="no coincide"):
+        verificar(ruta)
+    with pytest.raises(RespaldoInvalido):
+        restaurar(ruta, db_name)
+    # No se tocó la base de datos ni se hizo la copia de seguridad previa
+    assert filas(consultar)[1] == []
+    assert respaldos(str(tmp_path), "antes-de-restaurar-") == []
+
+    os.remove(archivo_suma(ruta))
+    with pytest.raises(RespaldoInvalido, match="no tiene suma"):
+        verificar(ruta)
+
+
+def test_nombres_unicos_y_rotacion(db_name, tmp_path):
+    cargar(db_name)
+    directorio = str(tmp_path / "copias")
+
+    # Tres copias en el mismo segundo no se pisan
+    rutas = [respaldar(db_name, directorio, AHORA, pausa=0) for _ in range(3)]
+    assert [os.path.basename(ruta) for ruta in rutas] == [
+        "escuela-20260302-183000.db",
+        "escuela-20260302-183000-02.db",
+        "escuela-20260302-183000-03.db",
+    ]
+    assert all(verificar(ruta) for ruta in rutas)
+    posterior = respaldar(db_name, directorio, datetime(2026, 3, 3, 8, 0, 0), pausa=0)
+    assert respaldos(directorio) == [posterior, *reversed(rutas)]
+
+    assert rotar(directorio, 2) == [rutas[1], rutas[0]]
+    assert respaldos(directorio) == [posterior, rutas[2]]
+    assert sorted(os.listdir(directorio)) == sorted(
+        os.path.basename(archivo)
+        for ruta in (posterior, rutas[2])
+        for archivo in (ruta, archivo_suma(ruta))
+    )